@@ -0,0 +1,171 @@
+"""Generation time of synthetic sites at several scales and worker counts.
+
+```bash
+python benchmarks/generate_site.py --posts 1000 10000 100000 --workers 0 1 4 16
+```
+A site is synthesized for every scale: Markdown posts, Jinja pages listing them, Sass styles and copied assets.
+Every site is generated with every number of workers; `0` writes the tasks sequentially, without a thread pool.
+The phases are timed by the checkpoints of a [MemoryProfile][lightweight.profiling] without tracing:
+- `add` — creating the content and including it in the site (reading the sources);
+- `generate` — the whole `Site.generate`, wall time;
+- `plan` — creating the generation tasks within `Site.generate`;
+- `write` — rendering and writing all of the tasks, wall time.
+
+Prints a JSON object with a result per scale and number of workers, including the pages per second
+and the number of written files, and the scaling curve of every scale: the speedup over the smallest
+number of workers.
+"""
+import json
+import logging
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
+
+from lightweight import Site, markdown, jinja, sass, template, directory, paths  # noqa: E402
+from lightweight.profiling import MemoryProfile  # noqa: E402
+
+POST = """---
+title: Post {n}
+created: 2020-{month:02}-{day:02} 10:00:00
+tags: [tag-{tag}, benchmarks]
+---
+# Post {n}
+
+Lorem ipsum dolor sit amet, *consectetur* adipiscing elit, sed do eiusmod tempor incididunt ut labore.
+Links to the [previous post](posts/{previous}.md) and [the styles](/css/style.css).
+
+<!--preview-->
+
+## Details
+
+- Ut enim ad minim veniam, quis nostrud exercitation ullamco.
+- Duis aute irure dolor in **reprehenderit** in voluptate velit esse.
+
+```python
+def post_{n}():
+    return {n}
+```
+"""
+
+BASE = """<!DOCTYPE html>
+<html><head><title>{% block title %}{% endblock %}</title><link rel="stylesheet" href="{{ site / 'css/style.css' }}">
+</head><body>{% block body %}{% endblock %}</body></html>
+"""
+
+POST_TEMPLATE = """{% extends 'templates/base.html' %}
+{% block title %}{{ content.title }}{% endblock %}
+{% block body %}<article>{{ markdown.html }}</article>{{ markdown.toc.html }}{% endblock %}
+"""
+
+LISTING = """{% extends 'templates/base.html' %}
+{% block title %}Posts {{ number }}{% endblock %}
+{% block body %}<ul>{% for n in range(start, end) %}<li><a href="{{ site / 'posts/' ~ n }}">{{ n }}</a></li>{% endfor %}
+</ul>{% endblock %}
+"""
+
+STYLE = """$accent: #{color:06x};
+.block-{n} {{ color: $accent; a {{ color: darken($accent, 10%); }} }}
+"""
+
+PAGE_SIZE = 100  # posts listed by a Jinja page
+STYLES = 20
+ASSETS = 50
+
+
+def synthesize(root: Path, posts: int):
+    """Write the sources of a site with the number of posts."""
+    (root / 'posts').mkdir(parents=True)
+    for n in range(posts):
+        (root / 'posts' / f'{n}.md').write_text(POST.format(
+            n=n, previous=max(n - 1, 0), month=n % 12 + 1, day=n % 28 + 1, tag=n % 50,
+        ))
+    (root / 'templates').mkdir()
+    (root / 'templates' / 'base.html').write_text(BASE)
+    (root / 'templates' / 'post.html').write_text(POST_TEMPLATE)
+    (root / 'templates' / 'listing.html').write_text(LISTING)
+    (root / 'styles').mkdir()
+    (root / 'styles' / 'style.scss').write_text(''.join(f'@import "block{n}";\n' for n in range(STYLES)))
+    for n in range(STYLES):
+        (root / 'styles' / f'_block{n}.scss').write_text(STYLE.format(n=n, color=n * 0x0a0b0c))
+    (root / 'img').mkdir()
+    for n in range(ASSETS):
+        (root / 'img' / f'{n}.bin').write_bytes(bytes(range(256)) * 64)
+
+
+def create_site(root: Path) -> Site:
+    site = Site(url='https://example.org/', title='Benchmark')
+    with directory(root):
+        post_template = template('templates/post.html')
+        posts = 0
+        for p in paths('posts/*.md'):
+            site.add(f'posts/{p.stem}.html', markdown(p, post_template))
+            posts += 1
+        for start in range(0, posts, PAGE_SIZE):
+            site.add(f'pages/{start // PAGE_SIZE}.html', jinja(
+                'templates/listing.html', number=start // PAGE_SIZE, start=start, end=min(start + PAGE_SIZE, posts),
+            ))
+        site.add('css/style.css', sass('styles/style.scss'))
+        site.add('img')
+    return site
+
+
+def measure(root: Path, out: Path, workers: int) -> Dict[str, float]:
+    start = perf_counter()
+    site = create_site(root)
+    add = perf_counter() - start
+
+    profile = MemoryProfile(trace=False)
+    start = perf_counter()
+    site.generate(out, workers=workers, profile_memory=profile)
+    generate = perf_counter() - start
+    seconds = {checkpoint.name: checkpoint.seconds for checkpoint in profile.checkpoints}  # the last of a name
+    return {
+        'files': sum(1 for p in out.rglob('*') if p.is_file()),
+        'add': add,
+        'generate': generate,
+        'plan': seconds['planned'] - seconds['included'],
+        'write': seconds['written'] - seconds['planned'],
+    }
+
+
+def main():
+    parser = ArgumentParser(description='Measure generation time of synthetic sites')
+    parser.add_argument('--posts', type=int, nargs='+', default=[1000], help='the numbers of posts (scales)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 4],
+                        help='the numbers of generation threads; 0 writes sequentially')
+    parser.add_argument('--repeat', type=int, default=1, help='the best of repeated runs is reported')
+    args = parser.parse_args()
+    logging.getLogger('lw').setLevel(logging.WARNING)
+
+    results: List[Dict] = []
+    scaling: Dict[str, Dict[str, float]] = {}
+    for posts in args.posts:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp) / 'site'
+            synthesize(root, posts)
+            for workers in args.workers:
+                runs = [measure(root, Path(tmp) / 'out', workers) for _ in range(args.repeat)]
+                best = min(runs, key=lambda run: run['generate'])
+                pages = posts + -(-posts // PAGE_SIZE)
+                results.append({
+                    'posts': posts,
+                    'workers': workers,
+                    'pages': pages,
+                    **{key: round(value, 4) for key, value in best.items()},
+                    'pages_per_second': round(pages / best['generate'], 1),
+                })
+        baseline = min((r for r in results if r['posts'] == posts), key=lambda r: r['workers'])
+        scaling[str(posts)] = {
+            str(r['workers']): round(baseline['generate'] / r['generate'], 2) for r in results if r['posts'] == posts
+        }
+
+    print(json.dumps({'benchmark': 'generate_site', 'results': results, 'scaling': scaling}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Throughput of the HTML minification stage.
+
+```bash
+python benchmarks/minify_html.py --size 20
+```
+Prints a JSON object with the input size, the output size and the throughput in MB/s.
+"""
+import json
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
+
+from lightweight.minify import minify_html  # noqa: E402
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <title>Post {n}</title>
+        <!-- navigation styles -->
+        <link rel="stylesheet" href="/css/style.css">
+    </head>
+    <body>
+        <nav>
+            <a href="/">Home</a>
+            <a href="/blog" title="All of the posts">Blog</a>
+        </nav>
+        <article>
+            <h1 id="post-{n}">Post {n}</h1>
+            <p>
+                Lorem ipsum dolor sit amet,    consectetur adipiscing elit,
+                sed do eiusmod tempor incididunt ut labore et dolore magna aliqua.
+            </p>
+            <!--preview-->
+            <pre><code>def main():
+    print("whitespace in here is kept")</code></pre>
+        </article>
+        <script>
+            document.querySelectorAll('a').forEach(a => a.rel = 'noopener');
+        </script>
+    </body>
+</html>
+"""
+
+
+def main():
+    parser = ArgumentParser(description='Measure HTML minification throughput')
+    parser.add_argument('--size', type=float, default=10, help='size of the minified HTML in MB')
+    parser.add_argument('--repeat', type=int, default=3, help='the best of repeated runs is reported')
+    args = parser.parse_args()
+
+    pages = []
+    size = 0
+    while size < args.size * 1_000_000:
+        page = PAGE.format(n=len(pages))
+        pages.append(page)
+        size += len(page.encode('utf-8'))
+
+    best = float('inf')
+    minified_size = 0
+    for _ in range(args.repeat):
+        start = perf_counter()
+        minified_size = sum(len(minify_html(page).encode('utf-8')) for page in pages)
+        best = min(best, perf_counter() - start)
+
+    print(json.dumps({
+        'benchmark': 'minify_html',
+        'pages': len(pages),
+        'input_bytes': size,
+        'output_bytes': minified_size,
+        'seconds': round(best, 4),
+        'mb_per_second': round(size / 1_000_000 / best, 2),
+    }))
+
+
+if __name__ == '__main__':
+    main()
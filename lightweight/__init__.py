@@ -32,7 +32,8 @@ site.generate()
 """
 import logging
 
-from .content import Content, markdown, jinja, from_ctx, sass
+from .content import Content, markdown, jinja, from_ctx, sass, image, sitemap, rss, atom, search_index, paginate, \
+    taxonomy
 from .files import paths, directory
 from .generation import GenPath, GenContext
 from .site import Site
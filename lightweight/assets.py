@@ -0,0 +1,162 @@
+"""Content-hash fingerprinting of assets: compiled Sass and copied files.
+
+```python
+site.add('css/style.css', sass('styles/style.scss'))
+site.add('img')
+site.generate('out', fingerprint=True)
+```
+Writes `out/css/style.3f2a9c01de.css` and `out/img/*.<hash>.*`, so they can be served with `Cache-Control: immutable`.
+
+Logical locations keep working: `site / 'css/style.css'`, [GenPath.url][lightweight.GenPath.url]
+and Markdown links resolve to fingerprinted URLs. The mapping is also written to `out/assets.json`.
+
+Files requested by their well-known locations keep their names: HTML pages and root files such as
+`robots.txt`, `favicon.ico` or `CNAME` (see `DEFAULT_EXCLUDE`). More can be excluded by glob patterns
+matched against the location relative to the out directory:
+```python
+site.generate('out', fingerprint=True, fingerprint_exclude=[*DEFAULT_EXCLUDE, 'downloads/*'])
+```
+
+Stylesheets (compiled Sass and copied `.css` files) are written after the other assets,
+with their `url(...)` references rewritten to the fingerprinted locations, e.g. `url(../img/photo.3a7bd3e236.jpg)`.
+References from JavaScript files are not rewritten: exclude the assets loaded by scripts from fingerprinting.
+"""
+from __future__ import annotations
+
+__all__ = ['Assets', 'DEFAULT_EXCLUDE']
+
+import json
+import posixpath
+import re
+from fnmatch import fnmatchcase
+from hashlib import sha256
+from pathlib import Path
+from threading import Lock
+from typing import Collection, Dict, Tuple, TYPE_CHECKING
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from .generation import GenPath
+
+HASH_LENGTH = 10
+_CHUNK = 1024 * 1024
+
+DEFAULT_EXCLUDE = (
+    '*.html',
+    'robots.txt',
+    'favicon.ico',
+    'apple-touch-icon*.png',
+    'CNAME',
+    'humans.txt',
+    'ads.txt',
+    'sitemap.xml',
+    '.well-known/*',
+)
+
+_CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")\s]+)\1\s*\)''')
+
+
+class Assets:
+    """Logical asset locations mapped to fingerprinted ones.
+
+    When `fingerprint` is disabled every location is left as is, as are the locations matching `exclude` patterns.
+    """
+    fingerprint: bool
+    exclude: Collection[str]  # glob patterns of locations relative to the out directory
+    locations: Dict[str, str]  # logical location -> fingerprinted location
+    _stylesheets: Dict[str, Tuple[GenPath, str]]  # logical location -> (path, css) written after the other assets
+
+    def __init__(self, *, fingerprint: bool = False, exclude: Collection[str] = DEFAULT_EXCLUDE):
+        self.fingerprint = fingerprint
+        self.exclude = exclude
+        self.locations = {}
+        self._stylesheets = {}
+        self._lock = Lock()
+
+    def copy(self, path: GenPath, source: Path):
+        """Copy the source file as an asset; stylesheets are copied by [Assets.write_stylesheets]."""
+        if self.fingerprint and path.suffix == '.css':
+            self.stylesheet(path, source.read_text(encoding='utf-8'))
+        else:
+            self.locate_file(path, source).copy(source)
+
+    def stylesheet(self, path: GenPath, css: str):
+        """Write the stylesheet; when fingerprinting, after the other assets by [Assets.write_stylesheets]."""
+        if not self.fingerprint:
+            path.create(css)
+            return
+        with self._lock:
+            self._stylesheets[str(path)] = (path, css)
+
+    def write_stylesheets(self):
+        """Write the pending stylesheets with their `url(...)` references resolved to fingerprinted locations.
+
+        Stylesheets referenced by others are written first, to be referenced by their fingerprinted locations.
+        """
+        while self._stylesheets:
+            self._write_stylesheet(next(iter(self._stylesheets)))
+
+    def _write_stylesheet(self, location: str):
+        path, css = self._stylesheets.pop(location)
+        contents = _CSS_URL.sub(lambda match: self._resolve_reference(match, location), css).encode('utf-8')
+        self.locate(path, contents).create(contents)
+
+    def _resolve_reference(self, match: re.Match[str], stylesheet: str) -> str:
+        quote, reference = match.group(1), match.group(2)
+        parts = urlsplit(reference)
+        if parts.scheme or parts.netloc or not parts.path:  # external, data or fragment-only
+            return match.group(0)
+        absolute = parts.path.startswith('/')
+        location = posixpath.normpath(
+            parts.path[1:] if absolute else posixpath.join(posixpath.dirname(stylesheet), parts.path)
+        )
+        if location in self._stylesheets:
+            self._write_stylesheet(location)
+        if location not in self.locations:
+            return match.group(0)
+        resolved = posixpath.join(posixpath.dirname(parts.path), posixpath.basename(self.locations[location]))
+        rest = reference[len(parts.path):]  # query and fragment
+        return f'url({quote}{resolved}{rest}{quote})'
+
+    def locate(self, path: GenPath, contents: bytes) -> GenPath:
+        """The path to write the asset contents to."""
+        if not self.fingerprints(path):
+            return path
+        return self._fingerprinted(path, sha256(contents).hexdigest())
+
+    def locate_file(self, path: GenPath, source: Path) -> GenPath:
+        """The path to write a copy of the source file to."""
+        if not self.fingerprints(path):
+            return path
+        digest = sha256()
+        with source.open('rb') as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b''):
+                digest.update(chunk)
+        return self._fingerprinted(path, digest.hexdigest())
+
+    def fingerprints(self, path: GenPath) -> bool:
+        """Whether the file at path is written under a fingerprinted name."""
+        return self.fingerprint and not any(fnmatchcase(str(path), pattern) for pattern in self.exclude)
+
+    def _fingerprinted(self, path: GenPath, digest: str) -> GenPath:
+        fingerprinted = path.with_name(_fingerprinted_name(path.name, digest[:HASH_LENGTH]))
+        with self._lock:
+            self.locations[str(path)] = str(fingerprinted)
+        return fingerprinted
+
+    def resolve(self, location: str) -> str:
+        """The fingerprinted location of the asset, or the location itself if it is not a fingerprinted asset."""
+        if location.startswith('/'):
+            return '/' + self.resolve(location[1:])
+        return self.locations.get(location, location)
+
+    def save(self, path: GenPath):
+        """Write the mapping of logical to fingerprinted locations as JSON."""
+        path.create(json.dumps({location: self.locations[location] for location in sorted(self.locations)}, indent=2))
+
+
+def _fingerprinted_name(name: str, digest: str) -> str:
+    stem, dot, suffix = name.rpartition('.')
+    if not stem:  # no extension or a dotfile
+        return f'{name}.{digest}'
+    return f'{stem}.{digest}{dot}{suffix}'
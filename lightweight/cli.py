@@ -14,10 +14,13 @@ if __name__ == '__main__':
 ```
 
 This allows to build the project: `./website.py build --url https://lightweight.site/`;
+to build a slice of it: `./website.py build --shard 0/4 --out out-0`;
+to find where the memory of the build goes: `./website.py build --profile-memory memory.json`;
 and to run the dev server: `./website.py serve --port 8069`
 """
 
 import inspect
+import tracemalloc
 from argparse import ArgumentParser
 from logging import getLogger
 from os import getcwd
@@ -26,6 +29,8 @@ from shutil import rmtree
 from typing import Callable, Any
 
 from .errors import InvalidCommand, InvalidSiteCliUsage
+from .generation import Shard
+from .profiling import FRAMES
 from .lw import start_server, FailedGeneration, set_log_level, add_log_arguments
 from .site import Site
 
@@ -85,6 +90,11 @@ class SiteCli:
         p.add_argument('--port', type=int, default=None, help=f'defaults to "{self.default_port}"')
         p.add_argument('--url', type=str, default=None,
                        help=f'defaults to "http://{self.default_host}:{self.default_port}/"')
+        p.add_argument('--shard', type=str, default=None,
+                       help='write only a slice of the site, e.g. "0/4"; shard outputs are combined with `lw merge`')
+        p.add_argument('--profile-memory', type=str, nargs='?', const='memory-profile.json', default=None,
+                       metavar='REPORT', help='trace memory of the build and save a report. '
+                                              'Defaults to "memory-profile.json"')
         add_log_arguments(p)
         p.set_defaults(func=self._run_build)
 
@@ -98,8 +108,26 @@ class SiteCli:
             host = args.host if args.host is not None else self.default_host
             port = args.port if args.port is not None else self.default_port
             url = f'http://{host}:{port}/'
+        shard = None
+        if args.shard is not None:
+            try:
+                shard = Shard.parse(args.shard)
+            except ValueError as e:
+                raise InvalidCommand(str(e)) from e
         logger.info(f' Starting building "{url}"')
-        self.build(url).generate(args.out)
+        tracing = args.profile_memory is not None and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start(FRAMES)  # before the content is created, to include it in the report
+        try:
+            self.build(url).generate(
+                args.out,
+                immutable_templates=True,
+                shard=shard,
+                profile_memory=args.profile_memory or False,
+            )
+        finally:
+            if tracing:
+                tracemalloc.stop()
 
     def _add_clean_cli(self, subparsers):
         p = subparsers.add_parser(name='clean', description='Remove the out directory')
@@ -127,6 +155,8 @@ class SiteCli:
         p.add_argument('--no-live-reload', action='store_true', default=False,
                        help='disable live reloading '
                             '(enabled by default calling the executable on every project file change)')
+        p.add_argument('--debounce', type=float, default=0.1,
+                       help='seconds without project file changes before regenerating. Defaults to 0.1')
         add_log_arguments(p)
         if inspect.ismethod(self.build):
             raise InvalidSiteCliUsage("SiteCli first argument (<build>) must be a module-level function. "
@@ -154,6 +184,7 @@ class SiteCli:
                 host=args.host,
                 port=args.port,
                 enable_reload=not args.no_live_reload,
+                debounce=args.debounce,
             )
         except FailedGeneration as e:
             pass
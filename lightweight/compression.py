@@ -0,0 +1,84 @@
+"""Precompressed siblings of generated text files, e.g. for nginx `gzip_static` or a CDN.
+
+```python
+site.generate('out', compress=('gzip', 'br'))
+```
+Writes `out/index.html.gz` and `out/index.html.br` next to `out/index.html`.
+
+Brotli requires the optional [`brotli`][1] package.
+
+[1]: https://pypi.org/project/Brotli/
+"""
+from __future__ import annotations
+
+__all__ = ['Compression', 'COMPRESSIBLE_SUFFIXES']
+
+import gzip
+from typing import Callable, Collection, Dict, Tuple, TYPE_CHECKING
+
+from .generation import OutputStage
+
+if TYPE_CHECKING:
+    from .generation import GenPath
+
+COMPRESSIBLE_SUFFIXES = frozenset({'.html', '.css', '.js', '.svg', '.json', '.xml'})
+
+Compress = Callable[[bytes], bytes]
+
+
+class Compression(OutputStage):
+    """An [output stage][OutputStage] writing compressed siblings of text files.
+
+    A sibling is written only for files of at least `min_size` bytes, and only when it is smaller than the original.
+    """
+    encodings: Tuple[Tuple[str, Compress], ...]  # (file suffix, compress function)
+    min_size: int
+    suffixes: Collection[str]
+
+    def __init__(
+            self,
+            encodings: Collection[str] = ('gzip',),
+            *,
+            min_size: int = 1024,
+            suffixes: Collection[str] = COMPRESSIBLE_SUFFIXES,
+    ):
+        self.encodings = tuple(_compressor(encoding) for encoding in encodings)
+        self.min_size = min_size
+        self.suffixes = suffixes
+
+    def wants(self, path: GenPath) -> bool:
+        return path.suffix in self.suffixes
+
+    def written(self, path: GenPath, contents: bytes):
+        if not self.wants(path) or len(contents) < self.min_size:
+            return
+        for suffix, compress in self.encodings:
+            compressed = compress(contents)
+            if len(compressed) < len(contents):
+                path.with_name(path.name + suffix).create(compressed)
+
+
+def _gzip(contents: bytes) -> bytes:
+    return gzip.compress(contents, compresslevel=9, mtime=0)  # zero mtime keeps the output reproducible
+
+
+def _brotli(contents: bytes) -> bytes:
+    import brotli  # type: ignore # optional dependency without typings
+    return bytes(brotli.compress(contents))
+
+
+_COMPRESSORS: Dict[str, Tuple[str, Compress]] = {
+    'gzip': ('.gz', _gzip),
+    'br': ('.br', _brotli),
+}
+
+
+def _compressor(encoding: str) -> Tuple[str, Compress]:
+    if encoding not in _COMPRESSORS:
+        raise ValueError(f'Unsupported compression "{encoding}", expecting one of {list(_COMPRESSORS.keys())}')
+    if encoding == 'br':
+        try:
+            import brotli  # noqa: F401
+        except ImportError as e:
+            raise ImportError('Brotli compression requires the "brotli" package: pip install brotli') from e
+    return _COMPRESSORS[encoding]
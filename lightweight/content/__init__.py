@@ -3,3 +3,9 @@ from .copies import copy
 from .jinja_page import jinja, from_ctx
 from .md_page import markdown
 from .sass_scss import sass
+from .images import image
+from .sitemap import sitemap
+from .feeds import rss, atom
+from .search import search_index
+from .pagination import paginate
+from .taxonomy import taxonomy
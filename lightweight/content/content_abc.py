@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Sequence, Tuple
 
 if TYPE_CHECKING:
     from lightweight import GenPath, GenContext
@@ -10,6 +10,20 @@ if TYPE_CHECKING:
 class Content(ABC):
     """An abstract content that can be included by a [Site][..site.Site]."""
 
+    asset: bool = False  # fingerprinted assets are written before the rest of the content
+
     @abstractmethod
     def write(self, path: GenPath, ctx: GenContext):
         """Write the content to the file at path."""
+
+    def cost(self) -> float:
+        """Relative expense of writing the content; used to balance sharded builds."""
+        return 1
+
+    def extra_files(self, path: GenPath, ctx: GenContext) -> Sequence[Tuple[GenPath, Content]]:
+        """Further files of the content at path, each written by a task of its own.
+
+        Called once [GenContext.tasks][lightweight.GenContext.tasks] holds the tasks of the included content;
+        the tasks of the extra files are then added to them.
+        """
+        return ()
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from shutil import copy as shcopy, copytree
+from shutil import copytree
 from typing import TYPE_CHECKING, Union
 
 from .content_abc import Content
@@ -15,20 +15,30 @@ if TYPE_CHECKING:
 class DirectoryCopy(Content):
     """Site content which is a copy of a directory from the path provided as source."""
     source: Union[Path, str]
+    asset = True
 
     def write(self, path: GenPath, ctx: GenContext):
         path.parent.mkdir()
-        copytree(str(self.source), str(path.absolute()))
+        assets = ctx.site.assets
+        if not path.stages and not assets.fingerprint:
+            copytree(str(self.source), str(path.absolute()))
+            return
+        root = path.absolute()
+
+        def copy_file(src: str, dst: str):
+            assets.copy(path / Path(dst).relative_to(root), Path(src))
+
+        copytree(str(self.source), str(root), copy_function=copy_file)
 
 
 @dataclass(frozen=True)
 class FileCopy(Content):
     """Site content which is a copy of a file from the path provided as source."""
     source: Union[Path, str]
+    asset = True
 
     def write(self, path: GenPath, ctx: GenContext):
-        path.parent.mkdir()
-        shcopy(str(self.source), str(path.absolute()))
+        ctx.site.assets.copy(path, Path(self.source))
 
 
 def copy(path: Union[str, Path]):
@@ -0,0 +1,194 @@
+"""[RSS][1] and [Atom][2] feeds of [Markdown pages][lightweight.content.md_page.MarkdownPage].
+
+Usage:
+```python
+from lightweight import rss, atom
+
+...
+
+site.add('posts.rss.xml', rss(include=lambda task: task.path.parts[0] == 'posts'))
+site.add('posts.atom.xml', atom(include=lambda task: task.path.parts[0] == 'posts', limit=10))
+```
+
+Only the latest `limit` posts are selected, without sorting all of them.
+Entries are streamed to disk one by one, reusing the Markdown already rendered for the post pages.
+
+[1]: https://www.rssboard.org/rss-specification
+[2]: https://tools.ietf.org/html/rfc4287
+"""
+from __future__ import annotations
+
+__all__ = ['RssFeed', 'AtomFeed', 'rss', 'atom']
+
+import heapq
+from abc import abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple, BinaryIO, Iterable
+from xml.sax.saxutils import escape, quoteattr
+
+from .content_abc import Content
+from .md_page import MarkdownPage, MarkdownReader
+
+if TYPE_CHECKING:
+    from lightweight import GenPath, GenContext
+    from lightweight.generation import GenTask
+
+Post = Tuple['GenTask', MarkdownPage]
+
+
+def _any_task(task: GenTask) -> bool:
+    return True
+
+
+@dataclass(frozen=True)
+class Feed(Content, MarkdownReader):
+    """Common options of [RSS][RssFeed] and [Atom][AtomFeed] feeds."""
+    title: Optional[str]  # defaults to the site title
+    description: Optional[str]
+    include: Callable[[GenTask], bool]  # tasks of Markdown pages to select posts from
+    limit: int  # the number of latest posts
+    preview: bool  # use the part of the post before `<!--preview-->` when present
+
+    def write(self, path: GenPath, ctx: GenContext):
+        with path.stream() as f:
+            self._write(f, path, ctx)
+
+    def cost(self) -> float:
+        """Grows with the number of entries; in a shard the posts may have to be rendered for the feed alone."""
+        return 1.0 + self.limit
+
+    def read_pages(self, ctx: GenContext) -> Iterable[MarkdownPage]:
+        return [page for _, page in self._latest(ctx)]
+
+    @abstractmethod
+    def _write(self, f: BinaryIO, path: GenPath, ctx: GenContext):
+        """Stream the feed to f."""
+
+    @staticmethod
+    @abstractmethod
+    def _date(page: MarkdownPage) -> Optional[datetime]:
+        """The date posts are selected and ordered by."""
+
+    def _latest(self, ctx: GenContext) -> List[Post]:
+        """The latest posts by date, newest first. Pages without the date are skipped."""
+        posts = (
+            (task, task.content) for task in ctx.tasks
+            if isinstance(task.content, MarkdownPage) and self._date(task.content) is not None and self.include(task)
+        )
+        return heapq.nlargest(self.limit, posts, key=lambda post: self._date(post[1]))  # type: ignore
+
+    def _html(self, page: MarkdownPage, ctx: GenContext) -> str:
+        rendered = page.render(ctx)
+        if self.preview and rendered.preview_html is not None:
+            return rendered.preview_html
+        return rendered.html
+
+    def _title(self, ctx: GenContext) -> str:
+        return self.title or ctx.site.title or ctx.site.url
+
+
+class RssFeed(Feed):
+    """An RSS 2.0 feed of the latest posts by their `created` date."""
+
+    @staticmethod
+    def _date(page: MarkdownPage) -> Optional[datetime]:
+        return page.created
+
+    def _write(self, f: BinaryIO, path: GenPath, ctx: GenContext):
+        posts = self._latest(ctx)
+        f.write(_line('<?xml version="1.0" encoding="UTF-8"?>'))
+        f.write(_line('<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"><channel>'))
+        f.write(_line(f'<title>{escape(self._title(ctx))}</title>'))
+        f.write(_line(f'<link>{escape(ctx.site.url)}</link>'))
+        f.write(_line(f'<description>{escape(self.description or self._title(ctx))}</description>'))
+        f.write(_line(f'<atom:link href={quoteattr(path.url)} rel="self" type="application/rss+xml"/>'))
+        f.write(_line(f'<generator>Lightweight {ctx.version}</generator>'))
+        f.write(_line(f'<lastBuildDate>{format_datetime(_utc(ctx.generated))}</lastBuildDate>'))
+        for task, page in posts:
+            url = escape(task.path.url)
+            f.write(_line(
+                '<item>'
+                f'<title>{escape(page.title or str(task.path))}</title>'
+                f'<link>{url}</link>'
+                f'<guid isPermaLink="true">{url}</guid>'
+                f'<pubDate>{format_datetime(page.created)}</pubDate>'  # type: ignore # selected by the date
+                f'<description>{escape(self._html(page, ctx))}</description>'
+                '</item>'
+            ))
+        f.write(_line('</channel></rss>'))
+
+
+class AtomFeed(Feed):
+    """An Atom feed of the latest posts by their `updated` date."""
+
+    @staticmethod
+    def _date(page: MarkdownPage) -> Optional[datetime]:
+        return page.updated
+
+    def _write(self, f: BinaryIO, path: GenPath, ctx: GenContext):
+        posts = self._latest(ctx)
+        updated = posts[0][1].updated if posts else _utc(ctx.generated)
+        f.write(_line('<?xml version="1.0" encoding="UTF-8"?>'))
+        f.write(_line('<feed xmlns="http://www.w3.org/2005/Atom">'))
+        f.write(_line(f'<title>{escape(self._title(ctx))}</title>'))
+        if self.description:
+            f.write(_line(f'<subtitle>{escape(self.description)}</subtitle>'))
+        f.write(_line(f'<id>{escape(ctx.site.url)}</id>'))
+        f.write(_line(f'<link href={quoteattr(ctx.site.url)}/>'))
+        f.write(_line(f'<link href={quoteattr(path.url)} rel="self"/>'))
+        f.write(_line(f'<updated>{updated.isoformat()}</updated>'))  # type: ignore # selected by the date
+        f.write(_line(f'<generator version={quoteattr(ctx.version)}>Lightweight</generator>'))
+        for task, page in posts:
+            url = escape(task.path.url)
+            f.write(_line(
+                '<entry>'
+                f'<title>{escape(page.title or str(task.path))}</title>'
+                f'<id>{url}</id>'
+                f'<link href={quoteattr(task.path.url)}/>'
+                f'<updated>{page.updated.isoformat()}</updated>'  # type: ignore # selected by the date
+                + (f'<published>{page.created.isoformat()}</published>' if page.created else '')
+                + (f'<summary>{escape(page.summary)}</summary>' if page.summary else '') +
+                f'<content type="html">{escape(self._html(page, ctx))}</content>'
+                '</entry>'
+            ))
+        f.write(_line('</feed>'))
+
+
+def _line(text: str) -> bytes:
+    return (text + '\n').encode('utf-8')
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+
+def rss(
+        *,
+        title: Optional[str] = None,
+        description: Optional[str] = None,
+        include: Callable[[GenTask], bool] = _any_task,
+        limit: int = 20,
+        preview: bool = False,
+) -> RssFeed:
+    """Create an RSS feed of the latest Markdown pages with a `created` date.
+
+    Pages are selected from [GenContext.tasks][lightweight.GenContext.tasks] matching `include`.
+    """
+    return RssFeed(title=title, description=description, include=include, limit=limit, preview=preview)
+
+
+def atom(
+        *,
+        title: Optional[str] = None,
+        description: Optional[str] = None,
+        include: Callable[[GenTask], bool] = _any_task,
+        limit: int = 20,
+        preview: bool = False,
+) -> AtomFeed:
+    """Create an Atom feed of the latest Markdown pages with an `updated` (or `created`) date.
+
+    Pages are selected from [GenContext.tasks][lightweight.GenContext.tasks] matching `include`.
+    """
+    return AtomFeed(title=title, description=description, include=include, limit=limit, preview=preview)
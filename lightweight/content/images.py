@@ -0,0 +1,309 @@
+"""Responsive images: width variants and modern encodings of JPEG, PNG and WebP files.
+
+Usage:
+```python
+from lightweight import image
+
+...
+
+site.add('img/cover.jpg', image('img/cover.jpg', widths=(480, 960)))
+site.add('img', image('img', formats=('webp', 'avif')))
+```
+For `img/cover.jpg` 1600 pixels wide this writes `img/cover.jpg`, `img/cover-480w.jpg`, `img/cover-960w.jpg`
+and the same widths as `img/cover-480w.webp`, `img/cover-960w.webp`, `img/cover-1600w.webp`.
+
+Variants are encoded in a process pool, shut down at the end of the generation,
+and cached on disk by the hash of the source and the encoding parameters.
+Markdown pages render images with variants using `srcset`, `sizes` and intrinsic `width`/`height`.
+The EXIF orientation of photos is applied to the variants and to the intrinsic size.
+
+Requires the optional [Pillow][1] package. AVIF encoding requires Pillow 11.2 or the [pillow-avif-plugin][2].
+
+[1]: https://python-pillow.org
+[2]: https://pypi.org/project/pillow-avif-plugin/
+"""
+from __future__ import annotations
+
+__all__ = ['ResponsiveImage', 'ResponsiveImages', 'image']
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, Future
+from dataclasses import dataclass
+from functools import lru_cache
+from hashlib import sha256
+from pathlib import Path
+from os.path import abspath
+from typing import TYPE_CHECKING, Tuple, List, Dict, Union, Sequence
+
+from .content_abc import Content
+from .lwmd import ImageSet
+
+if TYPE_CHECKING:
+    from lightweight import GenPath, GenContext
+
+FORMATS = {  # file suffix -> (Pillow format, mime type)
+    '.jpg': ('JPEG', 'image/jpeg'),
+    '.jpeg': ('JPEG', 'image/jpeg'),
+    '.png': ('PNG', 'image/png'),
+    '.webp': ('WEBP', 'image/webp'),
+    '.avif': ('AVIF', 'image/avif'),
+}
+RESIZABLE_SUFFIXES = frozenset({'.jpg', '.jpeg', '.png', '.webp'})
+
+
+@dataclass(frozen=True)
+class Variant:
+    """A single encoding of an image at a width."""
+    name: str  # file name next to the original
+    width: int
+    suffix: str
+
+
+@dataclass(frozen=True)
+class ResponsiveImage(Content):
+    """Content writing an image together with its width variants in additional formats."""
+    source: Path
+    widths: Tuple[int, ...]
+    formats: Tuple[str, ...]  # additional encodings as file suffixes, e.g. ".webp"
+    sizes: str  # the value of `sizes` attribute
+    quality: int
+    cache: Path  # a directory with already encoded variants
+    asset = True
+
+    def cost(self) -> float:
+        return float(len(self.widths) * (1 + len(self.formats)))
+
+    def write(self, path: GenPath, ctx: GenContext):
+        _write_image(self, self.source, path, ctx)
+
+    def image_sets(self, path: GenPath) -> Dict[str, ImageSet]:
+        """[Image sets][ImageSet] by the location of the written image."""
+        return {str(path): _image_set(self, self.source, path)}
+
+
+@dataclass(frozen=True)
+class ResponsiveImages(Content):
+    """Content writing a directory, adding responsive variants of every JPEG, PNG and WebP image in it."""
+    source: Path
+    widths: Tuple[int, ...]
+    formats: Tuple[str, ...]
+    sizes: str
+    quality: int
+    cache: Path
+    asset = True
+
+    def cost(self) -> float:
+        return float(len(self.images()) * len(self.widths) * (1 + len(self.formats)))
+
+    def write(self, path: GenPath, ctx: GenContext):
+        assets = ctx.site.assets
+        for file in sorted(self.source.rglob('*')):
+            if not file.is_file():
+                continue
+            target = path / file.relative_to(self.source)
+            if file.suffix.lower() in RESIZABLE_SUFFIXES:
+                _write_image(self, file, target, ctx)
+            else:
+                assets.copy(target, file)
+
+    def images(self) -> List[Path]:
+        return sorted(p for p in self.source.rglob('*') if p.suffix.lower() in RESIZABLE_SUFFIXES and p.is_file())
+
+    def image_sets(self, path: GenPath) -> Dict[str, ImageSet]:
+        """[Image sets][ImageSet] by the location of every written image."""
+        sets = {}
+        for file in self.images():
+            target = path / file.relative_to(self.source)
+            sets[str(target)] = _image_set(self, file, target)
+        return sets
+
+
+Options = Union[ResponsiveImage, ResponsiveImages]
+
+
+def variants(options: Options, source: Path) -> List[Variant]:
+    """Width variants of the source image: smaller widths and the full width in every additional format.
+
+    The full width in the original format is the original itself and is not included.
+    """
+    width, _ = image_size(source)
+    widths = sorted({w for w in options.widths if w < width} | {width})
+    original = source.suffix.lower()
+    result = []
+    for suffix in dict.fromkeys((original, *options.formats)):
+        for w in widths:
+            if w == width and suffix == original:
+                continue
+            result.append(Variant(name=f'{source.stem}-{w}w{suffix}', width=w, suffix=suffix))
+    return result
+
+
+def _write_image(options: Options, source: Path, path: GenPath, ctx: GenContext):
+    assets = ctx.site.assets
+    assets.locate_file(path, source).copy(source)
+    source_hash = _file_hash(source)
+    encodings = [
+        (variant, _encoded(source, source_hash, variant, quality=options.quality, cache=options.cache, ctx=ctx))
+        for variant in variants(options, source)
+    ]
+    for variant, encoding in encodings:
+        contents = Path(encoding.result()).read_bytes()
+        assets.locate(path.with_name(variant.name), contents).create(contents)
+
+
+def _image_set(options: Options, source: Path, path: GenPath) -> ImageSet:
+    width, height = image_size(source)
+    original = source.suffix.lower()
+    sources: Dict[str, List[Tuple[str, int]]] = {}
+    for suffix in (*options.formats, original):
+        sources[FORMATS[suffix][1]] = []
+    sources[FORMATS[original][1]].append((path.url, width))
+    for variant in variants(options, source):
+        sources[FORMATS[variant.suffix][1]].append((path.with_name(variant.name).url, variant.width))
+    return ImageSet(
+        src=path.url,
+        width=width,
+        height=height,
+        sizes=options.sizes,
+        sources={mime: sorted(candidates, key=lambda c: c[1]) for mime, candidates in sources.items()},
+        fallback=FORMATS[original][1],
+    )
+
+
+def _encoded(source: Path, source_hash: str, variant: Variant, *, quality: int, cache: Path, ctx: GenContext) -> Future:
+    orientation = _header(source)[2]
+    key = sha256(f'{source_hash}:{orientation}:{variant.width}:{variant.suffix}:{quality}'.encode('utf-8')).hexdigest()
+    cached = cache / f'{key}{variant.suffix}'
+    if cached.exists():
+        done: Future = Future()
+        done.set_result(str(cached))
+        return done
+    cache.mkdir(parents=True, exist_ok=True)
+    return _pool(ctx).submit(_encode, str(source.absolute()), variant.width, FORMATS[variant.suffix][0], quality,
+                          str(cached))
+
+
+def _encode(source: str, width: int, format: str, quality: int, target: str) -> str:
+    """Encode the resized image to target. Executed in the process pool."""
+    from PIL import Image, ImageOps  # type: ignore # optional dependency
+
+    if format == 'AVIF':
+        _register_avif()
+    with Image.open(source) as opened:
+        original = ImageOps.exif_transpose(opened)  # the variants are written without the EXIF orientation
+        height = round(original.height * width / original.width)
+        if width != original.width:
+            resized = original.resize((width, height), Image.Resampling.LANCZOS)
+        else:
+            resized = original.copy()
+    if format == 'JPEG' and resized.mode not in ('RGB', 'L'):
+        resized = resized.convert('RGB')
+    temporary = f'{target}.{os.getpid()}.tmp'
+    resized.save(temporary, format=format, quality=quality)
+    os.replace(temporary, target)
+    return target
+
+
+_TRANSPOSED = frozenset({5, 6, 7, 8})  # EXIF orientations rotating the image by 90 degrees
+
+
+@lru_cache(maxsize=None)
+def _cached_header(source: str, mtime: float) -> Tuple[int, int, int]:
+    from PIL import Image
+
+    with Image.open(source) as img:  # reads only the header
+        orientation = int(img.getexif().get(0x0112, 1))
+        if orientation in _TRANSPOSED:
+            return int(img.height), int(img.width), orientation
+        return int(img.width), int(img.height), orientation
+
+
+def _header(source: Path) -> Tuple[int, int, int]:
+    """Width and height of the image as displayed, with its EXIF orientation."""
+    return _cached_header(str(source.absolute()), source.stat().st_mtime)
+
+
+def image_size(source: Path) -> Tuple[int, int]:
+    """Intrinsic width and height of the image, as displayed according to its EXIF orientation."""
+    width, height, _ = _header(source)
+    return width, height
+
+
+def _file_hash(source: Path) -> str:
+    digest = sha256()
+    with source.open('rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _pool(ctx: GenContext) -> ProcessPoolExecutor:
+    return ctx.cached(
+        ('images', 'pool'),
+        # spawned rather than forked: the pool is started from generation threads
+        lambda: ctx.closing(ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'))),
+    )
+
+
+def _register_avif():
+    """Register the AVIF plugin with older Pillow versions, which do not encode AVIF on their own."""
+    try:
+        import pillow_avif  # type: ignore # noqa: F401 # optional plugin
+    except ImportError:
+        pass
+
+
+def _supports(format: str) -> bool:
+    from PIL import Image
+
+    if format == 'AVIF':
+        _register_avif()
+    Image.init()
+    return format in Image.SAVE
+
+
+def image(
+        location: Union[str, Path],
+        *,
+        widths: Sequence[int] = (480, 960, 1920),
+        formats: Sequence[str] = ('webp',),
+        sizes: str = '100vw',
+        quality: int = 80,
+        cache: Union[str, Path] = '.lw-cache/images',
+) -> Union[ResponsiveImage, ResponsiveImages]:
+    """Write the image at location along with its variants of smaller widths and additional formats.
+
+    Location can be an image file or a directory: images in the directory get variants, other files are copied.
+
+    `formats` are additional encodings: `"webp"` and `"avif"`.
+    `sizes` is used as the `sizes` attribute when the image is rendered in Markdown.
+    The cache directory is resolved from the current working directory.
+    """
+    try:
+        import PIL  # noqa: F401
+    except ImportError as e:
+        raise ImportError('Responsive images require the "Pillow" package: pip install Pillow') from e
+    path = Path(location)
+    if not path.exists():
+        raise FileNotFoundError(f'Image not found: {location}')
+    suffixes = tuple(f'.{f.lower().lstrip(".")}' for f in formats)
+    for suffix in suffixes:
+        if suffix not in FORMATS:
+            raise ValueError(f'Unsupported image format "{suffix}", expecting one of {list(FORMATS.keys())}')
+        if suffix == '.avif' and not _supports('AVIF'):
+            raise ImportError('AVIF images require Pillow 11.2 or the "pillow-avif-plugin" package: '
+                              'pip install "Pillow>=11.2"')
+    options = dict(
+        source=Path(abspath(path)),
+        widths=tuple(sorted(widths)),
+        formats=suffixes,
+        sizes=sizes,
+        quality=quality,
+        cache=Path(cache).absolute(),
+    )
+    if path.is_dir():
+        return ResponsiveImages(**options)  # type: ignore
+    if path.suffix.lower() not in RESIZABLE_SUFFIXES:
+        raise ValueError(f'Cannot create variants of {location}: only JPEG, PNG and WebP images are supported.')
+    return ResponsiveImage(**options)  # type: ignore
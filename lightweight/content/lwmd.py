@@ -1,7 +1,7 @@
 """Lightweight [Markdown][1] toolkit.
 
 [`LwRenderer`][LwRenderer] is an implementation of the [`mistune.Renderer`][2] adding table of contents,
- and overriding some elements.
+ responsive images, and overriding some elements.
 
 [1]: https://daringfireball.net/projects/markdown/
 [2]: https://github.com/lepture/mistune/tree/v1#renderer
@@ -9,7 +9,8 @@
 
 from __future__ import annotations
 
-from typing import List, Dict, NamedTuple, Optional
+from dataclasses import dataclass
+from typing import List, Dict, NamedTuple, Optional, Tuple
 
 from mistune import Renderer, escape, escape_link  # type: ignore # no typings
 from slugify import slugify  # type: ignore # no typings
@@ -129,6 +130,20 @@ class TocMixin(object):
         return self.toc.compile(level)
 
 
+@dataclass(frozen=True)
+class ImageSet:
+    """Variants of an image rendered with `srcset` by [LwRenderer]."""
+    src: str  # URL of the original image
+    width: int  # intrinsic width of the original
+    height: int  # intrinsic height of the original
+    sizes: str  # the `sizes` attribute
+    sources: Dict[str, List[Tuple[str, int]]]  # mime type -> [(URL, width)] sorted by width
+    fallback: str  # mime type of the original
+
+    def srcset(self, mime_type: str) -> str:
+        return ', '.join(f'{url} {width}w' for url, width in self.sources[mime_type])
+
+
 class LwRenderer(TocMixin, Renderer):
     """Renders Markdown overriding the following:
     - links — allows linking to other Markdown pages by their `.md` file paths.
@@ -137,18 +152,22 @@ class LwRenderer(TocMixin, Renderer):
     Also provides a way to compile a [table of contents][TableOfContents] via [`LwRenderer.table_of_contents`].
     """
 
-    def __init__(self, link_mapping: Dict[str, str]):
+    def __init__(self, link_mapping: Dict[str, str], images: Optional[Dict[str, ImageSet]] = None):
         super().__init__()
         self.url_mapping = link_mapping
+        self.images = images or {}
 
     def link(self, link, title, text):
+        return super().link(self._map(link), title, text)
+
+    def _map(self, link):
         if link.startswith('/'):
             without_slash = link[1:]
             if without_slash in self.url_mapping:
-                link = self.url_mapping[without_slash]
+                return self.url_mapping[without_slash]
         elif link in self.url_mapping:
-            link = self.url_mapping[link]
-        return super().link(link, title, text)
+            return self.url_mapping[link]
+        return link
 
     def image(self, src, title, text):
         """Rendering a image with title and text.
@@ -157,7 +176,10 @@ class LwRenderer(TocMixin, Renderer):
         :param title: title text of the image.
         :param text: alt text of the image.
         """
-        src = escape_link(src)
+        image_set = self.images.get(src[1:] if src.startswith('/') else src)
+        if image_set is not None:
+            return self._responsive_image(image_set, title, text)
+        src = escape_link(self._map(src))
         text = escape(text, quote=True)
         if title:
             title = escape(title, quote=True)
@@ -167,3 +189,22 @@ class LwRenderer(TocMixin, Renderer):
         if self.options.get('use_xhtml'):
             return f'<img {attributes}/>'
         return f'<img {attributes}>'
+
+    def _responsive_image(self, image_set: ImageSet, title, text):
+        close = '/>' if self.options.get('use_xhtml') else '>'
+        sizes = escape(image_set.sizes, quote=True)
+        attributes = (f'src="{escape_link(image_set.src)}" '
+                      f'srcset="{escape_link(image_set.srcset(image_set.fallback))}" sizes="{sizes}" '
+                      f'alt="{escape(text, quote=True)}"')
+        if title:
+            attributes += f' title="{escape(title, quote=True)}"'
+        attributes += f' width="{image_set.width}" height="{image_set.height}"'
+        img = f'<img {attributes}{close}'
+        alternatives = [mime for mime in image_set.sources if mime != image_set.fallback]
+        if not alternatives:
+            return img
+        sources = ''.join(
+            f'<source type="{mime}" srcset="{escape_link(image_set.srcset(mime))}" sizes="{sizes}"{close}'
+            for mime in alternatives
+        )
+        return f'<picture>{sources}{img}</picture>'
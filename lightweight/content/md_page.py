@@ -13,22 +13,28 @@ site.add('hello.html', markdown('posts/hello.md', template('templates/post.html'
 """
 from __future__ import annotations
 
+from abc import ABC, abstractmethod
+from collections import Counter
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, Union, TYPE_CHECKING, Type, Dict, Any
+from threading import Lock
+from typing import Optional, Union, TYPE_CHECKING, Type, Dict, Any, Iterable
 
 import frontmatter  # type: ignore
 from jinja2 import Template
 from mistune import Markdown  # type: ignore
 
 from .content_abc import Content
+from .images import ResponsiveImage, ResponsiveImages
 from .jinja_page import _eval_if_lazy
-from .lwmd import LwRenderer, TableOfContents
+from .lwmd import LwRenderer, TableOfContents, ImageSet
 
 if TYPE_CHECKING:
     from lightweight import GenPath, GenContext
 
+COST_UNIT = 10_000  # characters of Markdown rendered per unit of [Content.cost()][lightweight.content.Content.cost]
+
 
 @dataclass(frozen=True)
 class MarkdownPage(Content):
@@ -61,10 +67,22 @@ class MarkdownPage(Content):
             **self._evaluated_props(ctx),
         ))
 
+    def cost(self) -> float:
+        """Grows with the length of the Markdown: one more unit per [COST_UNIT] characters."""
+        return 1 + len(self.text) / COST_UNIT
+
     def render(self, ctx: GenContext) -> RenderedMarkdown:
-        """Render Markdown to html, extracting the ToC."""
+        """Render Markdown to html, extracting the ToC.
+
+        Pages read by other content, e.g. a [feed][lightweight.rss], are rendered once per generation:
+        the result is kept until the last of its readers is written. Other pages are not retained.
+        """
+        return ctx.cached('markdown-renders', lambda: _SharedRenders.of(ctx)).render(self, ctx)
+
+    def _render(self, ctx: GenContext) -> RenderedMarkdown:
         link_mapping = self._map_links(ctx)
-        renderer = self.renderer(link_mapping)
+        images = ctx.cached('markdown-images', lambda: self._map_images(ctx))
+        renderer = self.renderer(link_mapping, images=images)
         html = Markdown(renderer).render(self.text)
         toc = renderer.table_of_contents(level=3)
         preview_html = self._extract_preview(html)
@@ -77,15 +95,25 @@ class MarkdownPage(Content):
     @staticmethod
     def _map_links(ctx: GenContext):
         """Map links allowing in Markdown to reference other Markdown pages by their ".md" files
-        and using relative paths for other files."""
+        and using relative paths for other files, including the files of fingerprinted directories."""
         link_mapping = {str(task.path): task.path.url for task in ctx.tasks}
         link_mapping.update({
             str(task.content.source_path): task.path.url
             for task in ctx.tasks
             if isinstance(task.content, MarkdownPage)
         })
+        link_mapping.update({location: ctx.site / location for location in ctx.site.assets.locations})
         return link_mapping
 
+    @staticmethod
+    def _map_images(ctx: GenContext) -> Dict[str, ImageSet]:
+        """Map locations of [responsive images][lightweight.content.images] to their variants."""
+        images: Dict[str, ImageSet] = {}
+        for task in ctx.tasks:
+            if isinstance(task.content, (ResponsiveImage, ResponsiveImages)):
+                images.update(task.content.image_sets(task.path))
+        return images
+
     @staticmethod
     def _extract_preview(html):
         preview_split = html.split('<!--preview-->', maxsplit=1)
@@ -96,6 +124,52 @@ class MarkdownPage(Content):
         return {key: _eval_if_lazy(value, ctx) for key, value in self.props.items()}
 
 
+class MarkdownReader(ABC):
+    """Content rendering the Markdown of other pages, e.g. a feed or a search index."""
+
+    @abstractmethod
+    def read_pages(self, ctx: GenContext) -> Iterable[MarkdownPage]:
+        """The Markdown pages rendered while writing the content."""
+
+
+class _SharedRenders:
+    """Rendered Markdown of the pages with [readers][MarkdownReader], dropped after its last use."""
+
+    def __init__(self, uses: Dict[int, int]):
+        self._remaining = uses  # id of the page -> renders left, including the page itself
+        self._rendered: Dict[int, RenderedMarkdown] = {}
+        self._lock = Lock()
+        self._page_locks: Dict[int, Lock] = {}
+
+    @classmethod
+    def of(cls, ctx: GenContext) -> _SharedRenders:
+        uses = Counter(
+            id(page)
+            for task in ctx.tasks if isinstance(task.content, MarkdownReader)
+            for page in task.content.read_pages(ctx)
+        )
+        for task in ctx.tasks:
+            if id(task.content) in uses:
+                uses[id(task.content)] += 1
+        return cls(uses)
+
+    def render(self, page: MarkdownPage, ctx: GenContext) -> RenderedMarkdown:
+        key = id(page)
+        if key not in self._remaining:
+            return page._render(ctx)
+        with self._lock:
+            page_lock = self._page_locks.setdefault(key, Lock())
+        with page_lock:
+            rendered = self._rendered.get(key) or page._render(ctx)
+            with self._lock:
+                self._remaining[key] -= 1
+                if self._remaining[key] > 0:
+                    self._rendered[key] = rendered
+                else:
+                    self._rendered.pop(key, None)
+            return rendered
+
+
 def markdown(md_path: Union[str, Path], template: Union[Template], *, renderer=LwRenderer, **kwargs) -> MarkdownPage:
     """Create a markdown page that can be included by a Site.
     Markdown page is compiled from a markdown file at path (*.md) and a [Jinja Template][lightweight.template].
@@ -0,0 +1,149 @@
+"""Listing pages of a collection rendered from a single [Jinja template][lightweight.template].
+
+Usage:
+```python
+from lightweight import paginate, template
+
+...
+
+site.add('blog/index.html', paginate(
+    template('templates/listing.html'),
+    select=lambda task: task.path.parts[0] == 'posts',
+    sort=lambda task: task.content.created,
+    reverse=True,
+    per_page=20,
+    location='blog/page/{n}.html',
+))
+```
+The first page is written to the added location (`blog/index.html`), the following ones to `location`
+(`blog/page/2.html`, `blog/page/3.html`, ...).
+
+The collection is selected from [GenContext.tasks][lightweight.GenContext.tasks] and sorted once for all pages.
+Every page is rendered with `page` — the [Page] with its `items`, `number` and `previous`/`next` paths.
+The following pages are written by tasks of their own, so they are listed in the sitemap and spread between shards.
+"""
+from __future__ import annotations
+
+__all__ = ['Pagination', 'FollowingPage', 'Page', 'paginate']
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from jinja2 import Template
+
+from .content_abc import Content
+from .jinja_page import _eval_if_lazy
+
+if TYPE_CHECKING:
+    from lightweight import GenPath, GenContext
+    from lightweight.generation import GenTask
+
+
+def _task_order(task: GenTask) -> Any:
+    return 0  # keeps the order of ctx.tasks, as the sort is stable
+
+
+@dataclass(frozen=True)
+class Page:
+    """A single listing page passed to the template as `page`."""
+    number: int  # starting from 1
+    count: int  # the total number of pages
+    items: Sequence[GenTask]  # the slice of the collection on this page
+    path: GenPath
+    previous: Optional[GenPath]
+    next: Optional[GenPath]
+
+    @property
+    def first(self) -> bool:
+        return self.number == 1
+
+    @property
+    def last(self) -> bool:
+        return self.number == self.count
+
+
+@dataclass(frozen=True)
+class Pagination(Content):
+    """Content writing the first listing page of a collection; the following pages are [extra files][FollowingPage]."""
+    template: Template = field(repr=False)
+    select: Callable[[GenTask], bool]
+    sort: Callable[[GenTask], Any]
+    reverse: bool
+    per_page: int
+    location: str  # of the pages after the first, formatted with the page number `n`
+    props: Dict[str, Any] = field(repr=False)
+
+    def write(self, path: GenPath, ctx: GenContext):
+        self._render(1, path, ctx)
+
+    def extra_files(self, path: GenPath, ctx: GenContext) -> Sequence[Tuple[GenPath, Content]]:
+        pages, _ = self._pages(path, ctx)
+        return [(page.path, FollowingPage(self, first=path, number=page.number)) for page in pages[1:]]
+
+    def _pages(self, path: GenPath, ctx: GenContext) -> Tuple[List[Page], Dict[str, Any]]:
+        """All of the pages with the evaluated props, computed once per generation."""
+        return ctx.cached(('pagination', id(self), str(path)), lambda: self._paginate(path, ctx))
+
+    def _paginate(self, path: GenPath, ctx: GenContext) -> Tuple[List[Page], Dict[str, Any]]:
+        items = sorted((task for task in ctx.tasks if self.select(task)), key=self.sort, reverse=self.reverse)
+        count = max(1, -(-len(items) // self.per_page))  # an empty first page when nothing is selected
+        paths = [path, *(ctx.path(self.location.format(n=n)) for n in range(2, count + 1))]
+        props = {key: _eval_if_lazy(value, ctx) for key, value in self.props.items()}
+        pages = [
+            Page(
+                number=i + 1,
+                count=count,
+                items=items[i * self.per_page:(i + 1) * self.per_page],
+                path=page_path,
+                previous=paths[i - 1] if i > 0 else None,
+                next=paths[i + 1] if i + 1 < count else None,
+            )
+            for i, page_path in enumerate(paths)
+        ]
+        return pages, props
+
+    def _render(self, number: int, first: GenPath, ctx: GenContext):
+        pages, props = self._pages(first, ctx)
+        page = pages[number - 1]
+        page.path.create(self.template.render(site=ctx.site, ctx=ctx, content=self, page=page, **props))
+
+
+@dataclass(frozen=True)
+class FollowingPage(Content):
+    """A listing page after the first one, written by a task of its own."""
+    pagination: Pagination
+    first: GenPath  # the path of the first page, identifying the pagination within the generation
+    number: int
+
+    def write(self, path: GenPath, ctx: GenContext):
+        self.pagination._render(self.number, self.first, ctx)
+
+
+def paginate(
+        template: Template,
+        *,
+        select: Callable[[GenTask], bool],
+        sort: Callable[[GenTask], Any] = _task_order,
+        reverse: bool = False,
+        per_page: int = 10,
+        location: str,
+        **props,
+) -> Pagination:
+    """Render the tasks matching `select` to listing pages of `per_page` items.
+
+    The first page is written to the location of the content; the rest to `location` formatted with page number `n`,
+    e.g. `'blog/page/{n}.html'`. Props are passed to the template like in [jinja][lightweight.jinja].
+    """
+    if per_page < 1:
+        raise ValueError(f'A page should list at least a single item, got per_page={per_page}.')
+    if '{n}' not in location:
+        raise ValueError(f'Pagination location "{location}" should include the page number as "{{n}}".')
+    return Pagination(
+        template=template,
+        select=select,
+        sort=sort,
+        reverse=reverse,
+        per_page=per_page,
+        location=location,
+        props=props,
+    )
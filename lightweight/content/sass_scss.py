@@ -35,30 +35,31 @@ class Sass(Content):
     """Content created by compiling Sass and SCSS."""
     path: Path
     sourcemap: bool
+    asset = True
 
     def write(self, path: GenPath, ctx: GenContext):
         if self.path.is_dir():
-            css_at_target = _construct_relative_css_path(self.path, target=path.absolute(), ctx=ctx)
+            css_at_target = _construct_relative_css_path(self.path, target=path)
             for p in paths(f'{self.path}/**/*.sass'):
-                _write(p, css_at_target(p), include_sourcemap=self.sourcemap)
+                _write(p, css_at_target(p), include_sourcemap=self.sourcemap, ctx=ctx)
             for p in paths(f'{self.path}/**/*.scss'):
-                _write(p, css_at_target(p), include_sourcemap=self.sourcemap)
+                _write(p, css_at_target(p), include_sourcemap=self.sourcemap, ctx=ctx)
         else:
-            _write(self.path, path, include_sourcemap=self.sourcemap)
+            _write(self.path, path, include_sourcemap=self.sourcemap, ctx=ctx)
 
 
-def _construct_relative_css_path(source: Path, *, target: Path, ctx: GenContext) -> Callable[[Path], GenPath]:
+def _construct_relative_css_path(source: Path, *, target: GenPath) -> Callable[[Path], GenPath]:
     start = len(source.parts)
 
     def remap(path: Path) -> GenPath:
         relative_parts = path.parts[start:]
-        return ctx.path(Path(*target.parts, *relative_parts)).with_suffix('.css')
+        return (target / Path(*relative_parts)).with_suffix('.css')
 
     return remap
 
 
-def _write(source: Path, target: GenPath, *, include_sourcemap: bool):
-    sourcemap_path = target.with_name(target.name + '.map')
+def _write(source: Path, target: GenPath, *, include_sourcemap: bool, ctx: GenContext):
+    sourcemap_path = target.with_name(target.name + '.map')  # the map keeps the logical name referenced by the css
     result, sourcemap = compile(
         filename=str(source),
         source_map_filename=str(source.parent / sourcemap_path.name),
@@ -66,8 +67,7 @@ def _write(source: Path, target: GenPath, *, include_sourcemap: bool):
         source_map_contents=True,
         output_style='compact',
     )
-    target.parent.mkdir()
-    target.create(result)
+    ctx.site.assets.stylesheet(target, result)
     if include_sourcemap:
         sourcemap_path.create(sourcemap)
 
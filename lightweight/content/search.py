@@ -0,0 +1,126 @@
+"""A prebuilt index for client-side search of [Markdown pages][lightweight.content.md_page.MarkdownPage].
+
+Usage:
+```python
+from lightweight import search_index
+
+...
+
+site.add('search', search_index(include=lambda task: task.path.parts[0] == 'docs'))
+```
+Writes:
+- `search/index.json` — the documents (URL and title by document number), the prefix length and the shard names;
+- `search/terms/<prefix>.json` — terms starting with the prefix, sorted, and their posting lists.
+
+A posting list contains the increasing numbers of the documents with the term, delta-encoded:
+`[3, 7, 8]` is stored as `[3, 4, 1]`. A browser looking up a term fetches only the shard of its prefix.
+
+The text of the pages is taken from the Markdown rendered during the build, so no file is read again.
+"""
+from __future__ import annotations
+
+__all__ = ['SearchIndex', 'search_index', 'tokenize', 'decode_postings']
+
+import json
+import re
+from array import array
+from dataclasses import dataclass
+from html import unescape
+from itertools import groupby
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Set, Tuple
+
+from .content_abc import Content
+from .md_page import MarkdownPage, MarkdownReader
+
+if TYPE_CHECKING:
+    from lightweight import GenPath, GenContext
+    from lightweight.generation import GenTask
+
+_TAGS = re.compile(r'<[^>]*>')
+_WORDS = re.compile(r'\w+')
+
+
+def _any_task(task: GenTask) -> bool:
+    return True
+
+
+def tokenize(html: str, *, min_length: int = 2) -> Set[str]:
+    """Distinct lowercase words of the plain text in HTML."""
+    text = unescape(_TAGS.sub(' ', html))
+    return {word for word in _WORDS.findall(text.lower()) if len(word) >= min_length}
+
+
+@dataclass(frozen=True)
+class SearchIndex(Content, MarkdownReader):
+    """Content writing an inverted index of Markdown pages as prefix-sharded JSON files to a directory."""
+    include: Callable[[GenTask], bool]  # tasks of Markdown pages to index
+    prefix_length: int  # the number of leading term characters selecting the shard
+    min_length: int  # shorter words are not indexed
+
+    def write(self, path: GenPath, ctx: GenContext):
+        documents: List[Dict[str, str]] = []
+        postings: Dict[str, array] = {}  # term -> increasing document numbers
+        for number, (task, page) in enumerate(self._pages(ctx)):
+            documents.append({'url': task.path.url, 'title': page.title or str(task.path)})
+            text = page.render(ctx).html
+            if page.title:
+                text = f'{page.title} {text}'
+            for term in tokenize(text, min_length=self.min_length):
+                if term not in postings:
+                    postings[term] = array('I')
+                postings[term].append(number)
+        shards = []
+        for prefix, terms in groupby(sorted(postings), key=lambda term: term[:self.prefix_length]):
+            shard = _encode_shard((term, postings[term]) for term in terms)
+            (path / 'terms' / f'{prefix}.json').create(json.dumps(shard, ensure_ascii=False, separators=(',', ':')))
+            shards.append(prefix)
+        (path / 'index.json').create(json.dumps(
+            {'prefix_length': self.prefix_length, 'shards': shards, 'documents': documents},
+            ensure_ascii=False,
+            separators=(',', ':'),
+        ))
+
+    def read_pages(self, ctx: GenContext) -> Iterable[MarkdownPage]:
+        return [page for _, page in self._pages(ctx)]
+
+    def _pages(self, ctx: GenContext) -> Iterator[Tuple[GenTask, MarkdownPage]]:
+        for task in ctx.tasks:
+            if isinstance(task.content, MarkdownPage) and self.include(task):
+                yield task, task.content
+
+
+def _encode_shard(terms: Iterator[Tuple[str, array]]) -> Dict[str, list]:
+    """Terms in sorted order with their delta-encoded posting lists."""
+    shard: Dict[str, list] = {'terms': [], 'postings': []}
+    for term, documents in terms:
+        deltas = array('I', documents)
+        for i in range(len(deltas) - 1, 0, -1):
+            deltas[i] -= deltas[i - 1]
+        shard['terms'].append(term)
+        shard['postings'].append(deltas.tolist())
+    return shard
+
+
+def decode_postings(deltas: List[int]) -> List[int]:
+    """Document numbers of a delta-encoded posting list."""
+    documents = []
+    number = 0
+    for delta in deltas:
+        number += delta
+        documents.append(number)
+    return documents
+
+
+def search_index(
+        *,
+        include: Callable[[GenTask], bool] = _any_task,
+        prefix_length: int = 2,
+        min_length: int = 2,
+) -> SearchIndex:
+    """Create a search index of the Markdown pages selected from [GenContext.tasks][lightweight.GenContext.tasks].
+
+    The index is written to a directory at the location the content is added to.
+    """
+    if prefix_length < 1:
+        raise ValueError(f'Shard prefix should be at least a single character long, got {prefix_length}.')
+    return SearchIndex(include=include, prefix_length=prefix_length, min_length=min_length)
@@ -0,0 +1,155 @@
+"""A [sitemap][1] of the site pages streamed directly to disk.
+
+Usage:
+```python
+from lightweight import sitemap
+
+...
+
+site.add('sitemap.xml', sitemap())
+```
+
+Entries are collected in a single pass over [GenContext.tasks][lightweight.GenContext.tasks] using the page URL,
+and the `updated` date of [Markdown pages][lightweight.content.md_page.MarkdownPage] as `<lastmod>`.
+
+Past 50,000 URLs or 50 MB the entries are split into `sitemap-1.xml`, `sitemap-2.xml`, ...
+and `sitemap.xml` becomes a [sitemap index][2] referencing them.
+Only the entries of the URL set being written are kept in memory.
+With `gzip=True` the URL sets are always written as gzipped parts (`sitemap-1.xml.gz`) referenced from the index.
+
+[1]: https://www.sitemaps.org/protocol.html
+[2]: https://www.sitemaps.org/protocol.html#index
+"""
+from __future__ import annotations
+
+__all__ = ['Sitemap', 'sitemap']
+
+import gzip as _gzip
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import chain, count
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, Optional, Tuple, BinaryIO, ContextManager
+from xml.sax.saxutils import escape
+
+from .content_abc import Content
+
+if TYPE_CHECKING:
+    from lightweight import GenPath, GenContext
+    from lightweight.generation import GenTask
+
+MAX_URLS = 50_000
+MAX_SIZE = 50 * 1024 * 1024  # uncompressed bytes
+
+_XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+_URLSET_START = f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{_XMLNS}">\n'.encode('utf-8')
+_URLSET_END = b'</urlset>\n'
+_INDEX_START = f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{_XMLNS}">\n'.encode('utf-8')
+_INDEX_END = b'</sitemapindex>\n'
+
+_Entry = Tuple[bytes, Optional[datetime]]  # a `<url>` with its modification date
+
+
+def _is_page(task: GenTask) -> bool:
+    return task.path.suffix == '.html'
+
+
+@dataclass(frozen=True)
+class Sitemap(Content):
+    """Content streaming `<url>` entries of the site pages to one or more sitemap files."""
+    include: Callable[[GenTask], bool]  # tasks to list in the sitemap
+    max_urls: int
+    max_size: int
+    gzip: bool
+
+    def write(self, path: GenPath, ctx: GenContext):
+        entries = _entries(ctx.tasks, self.include)
+        (urls, lastmod), overflow = self._fill(entries)
+        if overflow is None and not self.gzip:  # fits a single file: no index needed
+            _write_urlset(path, urls, compress=False)
+            return
+        with path.stream() as f:
+            f.write(_INDEX_START)
+            for number in count(start=1):
+                part = _part_path(path, number, self.gzip)
+                _write_urlset(part, urls, compress=self.gzip)
+                f.write(_sitemap_entry(part.url, lastmod))
+                if overflow is None:
+                    break
+                (urls, lastmod), overflow = self._fill(chain([overflow], entries))
+            f.write(_INDEX_END)
+
+    def _fill(self, entries: Iterator[_Entry]) -> Tuple[Tuple[List[bytes], Optional[datetime]], Optional[_Entry]]:
+        """Take the entries of a single URL set within the limits.
+
+        Returns the URLs of the set with their latest modification date,
+        and the entry starting the next set if there are more.
+        """
+        urls: List[bytes] = []
+        size, lastmod = len(_URLSET_START) + len(_URLSET_END), None
+        for url, updated in entries:
+            if urls and (len(urls) == self.max_urls or size + len(url) > self.max_size):
+                return (urls, lastmod), (url, updated)
+            urls.append(url)
+            size += len(url)
+            if updated is not None and (lastmod is None or updated > lastmod):
+                lastmod = updated
+        return (urls, lastmod), None
+
+
+def _entries(tasks, include) -> Iterator[_Entry]:
+    for task in tasks:
+        if not include(task):
+            continue
+        updated = getattr(task.content, 'updated', None)
+        if not isinstance(updated, datetime):
+            updated = None
+        yield _url_entry(task.path.url, updated), updated
+
+
+def _url_entry(url: str, lastmod: Optional[datetime]) -> bytes:
+    if lastmod is None:
+        return f'<url><loc>{escape(url)}</loc></url>\n'.encode('utf-8')
+    return f'<url><loc>{escape(url)}</loc><lastmod>{lastmod.isoformat()}</lastmod></url>\n'.encode('utf-8')
+
+
+def _sitemap_entry(url: str, lastmod: Optional[datetime]) -> bytes:
+    if lastmod is None:
+        return f'<sitemap><loc>{escape(url)}</loc></sitemap>\n'.encode('utf-8')
+    return f'<sitemap><loc>{escape(url)}</loc><lastmod>{lastmod.isoformat()}</lastmod></sitemap>\n'.encode('utf-8')
+
+
+def _part_path(path: GenPath, number: int, gzip: bool) -> GenPath:
+    name = f'{path.relative_path.stem}-{number}{path.suffix}'
+    return path.with_name(name + '.gz' if gzip else name)
+
+
+def _write_urlset(path: GenPath, entries: Iterable[bytes], *, compress: bool):
+    with path.stream() as f, _compressed(f, compress) as out:
+        out.write(_URLSET_START)
+        for entry in entries:
+            out.write(entry)
+        out.write(_URLSET_END)
+
+
+def _compressed(f: BinaryIO, compress: bool) -> ContextManager[BinaryIO]:
+    if compress:
+        return _gzip.GzipFile(fileobj=f, mode='wb', compresslevel=9, mtime=0)  # type: ignore
+    return nullcontext(f)
+
+
+def sitemap(
+        *,
+        include: Callable[[GenTask], bool] = _is_page,
+        max_urls: int = MAX_URLS,
+        max_size: int = MAX_SIZE,
+        gzip: bool = False,
+) -> Sitemap:
+    """Create a sitemap of the site pages, i.e. of every task writing an `.html` file.
+
+    Other tasks can be selected with `include`, e.g. `include=lambda task: task.path.parts[0] == 'blog'`.
+    The limits of a single sitemap file default to the protocol maximums.
+    """
+    if max_urls < 1:
+        raise ValueError(f'A sitemap should contain at least a single URL, got max_urls={max_urls}.')
+    return Sitemap(include=include, max_urls=max_urls, max_size=max_size, gzip=gzip)
@@ -0,0 +1,171 @@
+"""Groups of [Markdown pages][lightweight.content.md_page.MarkdownPage] by front matter: tags, categories, archives.
+
+A taxonomy is built once per generation and looked up by term:
+```jinja
+{% for task in ctx.taxonomy('tags')['python'] %}
+    <a href="{{ task.path.url }}">{{ task.content.title }}</a>
+{% endfor %}
+```
+
+Pages with a list in front matter belong to every term of the list.
+Terms differing only in case, e.g. "Python" and "python", are merged under the most used spelling.
+Besides front-matter keys, pages are grouped by the date they were created with `created:year` and `created:month`.
+
+Every term can be rendered to its own page:
+```python
+site.add('tags', taxonomy('tags', template('templates/tag.html')))
+```
+"""
+from __future__ import annotations
+
+__all__ = ['Taxonomy', 'TaxonomyPages', 'taxonomy', 'term_slug']
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Iterator, List, Mapping, Tuple
+
+from jinja2 import Template
+from slugify import slugify  # type: ignore # no typings
+
+from .content_abc import Content
+from .jinja_page import _eval_if_lazy
+from .md_page import MarkdownPage
+from ..errors import InvalidTaxonomyTerm, TermSlugCollision
+
+if TYPE_CHECKING:
+    from lightweight import GenPath, GenContext
+    from lightweight.generation import GenTask
+
+_DERIVED: Dict[str, Callable[[MarkdownPage], Any]] = {
+    'created:year': lambda page: page.created.year if page.created else None,
+    'created:month': lambda page: page.created.strftime('%Y-%m') if page.created else None,
+}
+
+
+class Taxonomy(Mapping[Hashable, Tuple['GenTask', ...]]):
+    """Tasks of Markdown pages by term, newest first (by `created`); pages without a date come last.
+
+    Terms are looked up regardless of the case: `taxonomy['Python']` is `taxonomy['python']`.
+    Looking up a missing term raises a `KeyError`; `taxonomy.get(term, ())` defaults to no pages.
+    """
+    key: str
+    terms: List[Hashable]  # sorted
+
+    def __init__(self, key: str, members: Dict[Hashable, Tuple[GenTask, ...]]):
+        self.key = key
+        self._members = {_folded(term): tasks for term, tasks in members.items()}
+        self.terms = sorted(members, key=str)
+
+    @classmethod
+    def of(cls, key: str, tasks: Tuple[GenTask, ...]) -> Taxonomy:
+        """Group the tasks of Markdown pages by the front-matter value at key (or a derived `created:...` key)."""
+        value = _DERIVED.get(key, lambda page: page.front_matter.get(key))
+        members: Dict[Hashable, List[GenTask]] = {}
+        spellings: Dict[Hashable, Counter] = {}
+        for task in _newest_first(tasks):
+            page: MarkdownPage = task.content  # type: ignore # only Markdown pages
+            for term in _terms(value(page), key, page):
+                folded = _folded(term)
+                members.setdefault(folded, []).append(task)
+                spellings.setdefault(folded, Counter())[term] += 1
+        return cls(key, {spellings[folded].most_common(1)[0][0]: tuple(tasks) for folded, tasks in members.items()})
+
+    def __getitem__(self, term: Hashable) -> Tuple[GenTask, ...]:
+        try:
+            return self._members[_folded(term)]
+        except KeyError:
+            raise KeyError(term) from None
+
+    def __contains__(self, term: object) -> bool:
+        return _folded(term) in self._members  # type: ignore # unhashable terms fail like with a dict
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self.terms)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def counts(self) -> Dict[Hashable, int]:
+        """The number of pages by term."""
+        return {term: len(self[term]) for term in self.terms}
+
+
+def _folded(term: Hashable) -> Hashable:
+    return term.casefold() if isinstance(term, str) else term
+
+
+def _newest_first(tasks: Tuple[GenTask, ...]) -> List[GenTask]:
+    pages = [task for task in tasks if isinstance(task.content, MarkdownPage)]
+    dated = [task for task in pages if task.content.created is not None]  # type: ignore
+    undated = [task for task in pages if task.content.created is None]  # type: ignore
+    dated.sort(key=lambda task: task.content.created, reverse=True)  # type: ignore
+    return dated + undated
+
+
+def _terms(value: Any, key: str, page: MarkdownPage) -> List[Hashable]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set, frozenset)):
+        terms = [term for term in value if term is not None]
+    elif isinstance(value, datetime):
+        terms = [value.date()]
+    else:
+        terms = [value]
+    for term in terms:
+        try:
+            hash(term)
+        except TypeError:
+            raise InvalidTaxonomyTerm(key, term, page.source_path) from None
+    return terms
+
+
+@dataclass(frozen=True)
+class TaxonomyPages(Content):
+    """Content writing a page for every term of a [taxonomy][Taxonomy] to a directory."""
+    key: str
+    template: Template = field(repr=False)
+    props: Dict[str, Any] = field(repr=False)
+
+    def write(self, path: GenPath, ctx: GenContext):
+        terms = ctx.taxonomy(self.key)
+        slugs = _unique_slugs(self.key, terms.terms)
+        props = {key: _eval_if_lazy(value, ctx) for key, value in self.props.items()}
+        for term in terms:
+            (path / f'{slugs[term]}.html').create(self.template.render(
+                site=ctx.site,
+                ctx=ctx,
+                content=self,
+                taxonomy=terms,
+                term=term,
+                pages=terms[term],
+                **props,
+            ))
+
+
+def term_slug(term: Hashable) -> str:
+    """The file name of a term page without the extension."""
+    return slugify(str(term)) or 'term'
+
+
+def _unique_slugs(key: str, terms: List[Hashable]) -> Dict[Hashable, str]:
+    """Slugs by term, failing when terms like "C" and "C++" would overwrite the page of one another."""
+    by_slug: Dict[str, List[Hashable]] = {}
+    for term in terms:
+        by_slug.setdefault(term_slug(term), []).append(term)
+    for slug, same in by_slug.items():
+        if len(same) > 1:
+            raise TermSlugCollision(key, slug, same)
+    return {term: slug for slug, same in by_slug.items() for term in same}
+
+
+def taxonomy(key: str, template: Template, **props) -> TaxonomyPages:
+    """Render a page per term of the front-matter key to `<location>/<term slug>.html`.
+
+    Terms with the same slug, e.g. "C" and "C++", fail the generation
+    with [TermSlugCollision][lightweight.errors.TermSlugCollision].
+
+    The template receives the `term`, its `pages` (tasks of Markdown pages) and the whole `taxonomy`.
+    Props are passed to the template like in [jinja][lightweight.jinja].
+    """
+    return TaxonomyPages(key=key, template=template, props=props)
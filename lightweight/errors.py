@@ -14,4 +14,23 @@ class InvalidCommand(Exception):
 
 
 class InvalidSiteCliUsage(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class ShardMergeError(Exception):
+    """Shard out directories cannot be merged into a complete site."""
+
+
+class TermSlugCollision(Exception):
+    """Different taxonomy terms would be written to the same page."""
+
+    def __init__(self, key: str, slug: str, terms: list):
+        super().__init__(f'Terms {", ".join(map(repr, terms))} of "{key}" share the page slug "{slug}".')
+
+
+class InvalidTaxonomyTerm(Exception):
+    """A front-matter value cannot be used as a taxonomy term."""
+
+    def __init__(self, key: str, value: object, source: object):
+        super().__init__(f'Value {value!r} of "{key}" in "{source}" cannot be a taxonomy term, as it is not hashable. '
+                         f'Use a string, a number or a date, or a list of those.')
@@ -40,5 +40,7 @@ def directory(location: Union[str, Path]):
     """
     cwd = os.getcwd()
     os.chdir(str(location))
-    yield
-    os.chdir(cwd)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
@@ -1,3 +1,5 @@
 from .path import GenPath
+from .stage import OutputStage
 from .task import GenTask
 from .context import GenContext
+from .shard import Shard
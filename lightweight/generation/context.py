@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+from contextlib import ExitStack
 from datetime import datetime
 from pathlib import Path
 from typing import TYPE_CHECKING
-from typing import Tuple, Union
+from threading import Lock
+from typing import Tuple, Union, Dict, Hashable, Any, Callable, TypeVar, ContextManager
 
 from .path import GenPath
 
+T = TypeVar('T')
+
 if TYPE_CHECKING:
     from ..site import Site
+    from .stage import OutputStage
     from .task import GenTask
+    from ..content.taxonomy import Taxonomy
 
 
 class GenContext:
@@ -22,16 +28,56 @@ class GenContext:
     site: Site
     out: Path
     tasks: Tuple[GenTask, ...]
+    stages: Tuple[OutputStage, ...]  # applied to every file created via paths of the context
     generated: datetime  # UTC datetime of generation
     version: str
 
     def __init__(self, out: Path, site: Site):
         self.out = out
         self.site = site
+        self.stages = ()
+        self._cache: Dict[Hashable, Any] = {}
+        self._cache_lock = Lock()
+        self._key_locks: Dict[Hashable, Lock] = {}
+        self._resources = ExitStack()
         self.generated = datetime.utcnow()
         import lightweight
         self.version = lightweight.__version__
 
     def path(self, p: Union[Path, str]) -> GenPath:
         """Create a new [GenPath] in this generation context from a regular path."""
-        return GenPath(Path(p), self.out, lambda location: self.site / location)
+        return GenPath(Path(p), self.out, lambda location: self.site / location, self.stages)
+
+    def cached(self, key: Hashable, compute: Callable[[], T]) -> T:
+        """Compute a value once per generation, e.g. a lookup derived from [tasks][GenContext.tasks]
+        shared by all pages.
+
+        Concurrent callers wait only for the computation of the same key.
+        """
+        with self._cache_lock:
+            if key in self._cache:
+                return self._cache[key]  # type: ignore
+            key_lock = self._key_locks.setdefault(key, Lock())
+        with key_lock:
+            if key not in self._cache:
+                self._cache[key] = compute()
+            return self._cache[key]  # type: ignore
+
+    def closing(self, resource: ContextManager[T]) -> T:
+        """Enter the resource, e.g. a process pool, for the rest of the generation.
+        It is exited once all of the content is written, or the generation fails.
+        """
+        with self._cache_lock:
+            return self._resources.enter_context(resource)
+
+    def close(self):
+        """Exit the resources entered with [GenContext.closing]. Called by the [Site] at the end of the generation."""
+        self._resources.close()
+
+    def taxonomy(self, key: str) -> Taxonomy:
+        """Tasks of Markdown pages grouped by the front-matter key, e.g. `ctx.taxonomy('tags')['python']`.
+
+        Built once per generation; see [Taxonomy][lightweight.content.taxonomy.Taxonomy].
+        """
+        from ..content.taxonomy import Taxonomy
+        return self.cached(('taxonomy', key), lambda: Taxonomy.of(key, self.tasks))
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, replace
+from contextlib import contextmanager
+from dataclasses import dataclass, replace, field
 from pathlib import Path, PurePath
-from typing import Callable, Tuple, Union, IO, Any
+from shutil import copy
+from typing import Callable, Collection, Tuple, Union, IO, Any, Iterator, BinaryIO, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .stage import OutputStage
 
 UrlFactory = Callable[[str], str]  # A url factory a full URL with a provided relative location.
 
@@ -39,6 +44,7 @@ class GenPath:
     relative_path: Path
     out: Path
     url_factory: UrlFactory
+    stages: Tuple[OutputStage, ...] = field(default=(), compare=False, repr=False)
 
     @property
     def real_path(self) -> Path:
@@ -156,8 +162,51 @@ class GenPath:
         return replace(self, relative_path=self.relative_path.with_suffix(suffix))
 
     def create(self, contents: Union[str, bytes]) -> None:
-        """Create a file with provided contents. Contents can be `str` or `bytes`."""
+        """Create a file with provided contents. Contents can be `str` or `bytes`; `str` is encoded as UTF-8.
+
+        The contents pass through the [output stages][OutputStage] of the path.
+        """
+        self.parent.mkdir()
+        data = contents.encode('utf-8') if isinstance(contents, str) else contents
+        for stage in self.stages:
+            data = stage.transform(self, data)
+        with self.open('wb') as f:
+            f.write(data)
+        for stage in self.stages:
+            stage.written(self, data)
+
+    @contextmanager
+    def stream(self) -> Iterator[BinaryIO]:
+        """Open the file for writing bytes incrementally, without holding all of the contents in memory.
+
+        Streamed contents are not transformed by [output stages][OutputStage];
+        the stages are notified of the file once it is closed.
+        Only the stages that [want][OutputStage.wants] the file get its contents read back into memory.
+        """
+        self.parent.mkdir()
+        with self.real_path.open('wb') as f:
+            yield f
+        wanting = [stage for stage in self.stages if stage.wants(self)]
+        if wanting:
+            contents = self.real_path.read_bytes()
+            for stage in wanting:
+                stage.written(self, contents)
+        self._notify_unwanted(wanting)
+
+    def copy(self, source: Union[Path, str]) -> None:
+        """Create a copy of the file at source.
+
+        When an [output stage][OutputStage] [wants][OutputStage.wants] the file, it is read and [created][create];
+        otherwise it is copied directly.
+        """
+        if any(stage.wants(self) for stage in self.stages):
+            self.create(Path(source).read_bytes())
+            return
         self.parent.mkdir()
-        binary_mode = isinstance(contents, bytes)
-        with self.open('wb' if binary_mode else 'w') as f:
-            f.write(contents)  # type: ignore
+        copy(str(source), str(self.real_path))
+        self._notify_unwanted(())
+
+    def _notify_unwanted(self, wanting: Collection[OutputStage]):
+        for stage in self.stages:
+            if stage not in wanting:
+                stage.written_file(self)
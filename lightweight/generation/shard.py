@@ -0,0 +1,180 @@
+"""Split site generation between multiple independent runners.
+
+Every runner plans the whole site, so the content still has the complete [`ctx.tasks`][GenContext.tasks],
+but writes only the tasks of its own [Shard]:
+```bash
+./website.py build --shard 0/2 --out out-0
+./website.py build --shard 1/2 --out out-1
+lw merge out out-0 out-1
+```
+
+Every shard records the files it wrote; `lw merge` checks that together they cover every planned path,
+and that files written by more than one shard (e.g. the fingerprinted assets) are identical.
+
+Tasks are partitioned deterministically: heavier tasks (by [`Content.cost()`][lightweight.content.Content.cost])
+are distributed first, each to the least loaded shard; tasks of equal cost are ordered by a stable hash of their path.
+"""
+from __future__ import annotations
+
+__all__ = ['Shard', 'merge_shards']
+
+import heapq
+import json
+from collections import defaultdict
+from dataclasses import dataclass
+from filecmp import cmp
+from hashlib import sha1
+from pathlib import Path
+from shutil import copytree, ignore_patterns, rmtree
+from threading import Lock
+from typing import List, Sequence, Dict, Set, Any, Collection, TYPE_CHECKING
+
+from .stage import OutputStage
+from ..errors import ShardMergeError
+
+if TYPE_CHECKING:
+    from .path import GenPath
+    from .task import GenTask
+
+SHARD_RECORD = '.lw-shard.json'  # written to the out directory of every shard
+
+
+@dataclass(frozen=True)
+class Shard:
+    """One of `count` disjoint slices of the generation tasks."""
+    index: int
+    count: int
+
+    def __post_init__(self):
+        if self.count < 1 or not 0 <= self.index < self.count:
+            raise ValueError(f'Invalid shard {self.index}/{self.count}.')
+
+    @classmethod
+    def parse(cls, value: str) -> Shard:
+        """Parse a shard from `"<index>/<count>"`, e.g. `"0/4"`."""
+        try:
+            index, count = value.split('/')
+            return cls(int(index), int(count))
+        except ValueError as e:
+            raise ValueError(f'Shard must be formatted as "<index>/<count>", got "{value}".') from e
+
+    def select(self, tasks: Sequence[GenTask]) -> List[GenTask]:
+        """Tasks assigned to this shard, in the original order."""
+        assigned = partition(tasks, self.count)[self.index]
+        return [task for task in tasks if id(task) in assigned]
+
+    def record(self, out: Path, *, planned: Collection[str], written: Collection[str]):
+        """Write down which locations were planned for the whole site and which files were written by this shard."""
+        (out / SHARD_RECORD).write_text(json.dumps({
+            'index': self.index,
+            'count': self.count,
+            'planned': sorted(planned),
+            'written': sorted(written),
+        }, indent=2))
+
+    def __str__(self):
+        return f'{self.index}/{self.count}'
+
+
+class WrittenFiles(OutputStage):
+    """An [output stage][OutputStage] collecting the relative paths of every file written by a shard."""
+    paths: Set[str]
+
+    def __init__(self):
+        self.paths = set()
+        self._lock = Lock()
+
+    def wants(self, path: GenPath) -> bool:
+        return False
+
+    def written(self, path: GenPath, contents: bytes):
+        self._add(path)
+
+    def written_file(self, path: GenPath):
+        self._add(path)
+
+    def _add(self, path: GenPath):
+        with self._lock:
+            self.paths.add(path.relative_path.as_posix())
+
+
+def partition(tasks: Sequence[GenTask], count: int) -> List[Set[int]]:
+    """Ids of tasks for each of the shards."""
+    costs = {id(task): task.content.cost() for task in tasks}
+    ordered = sorted(tasks, key=lambda task: (-costs[id(task)], _stable_hash(str(task.path))))
+    shards: List[Set[int]] = [set() for _ in range(count)]
+    loads = [(0.0, index) for index in range(count)]
+    for task in ordered:
+        load, index = heapq.heappop(loads)
+        shards[index].add(id(task))
+        heapq.heappush(loads, (load + costs[id(task)], index))
+    return shards
+
+
+def _stable_hash(value: str) -> int:
+    return int.from_bytes(sha1(value.encode('utf-8')).digest()[:8], 'big')
+
+
+def merge_shards(out: Path, shards: Sequence[Path]):
+    """Combine the out directories of shards to out, checking them against the files recorded by every shard.
+
+    Every planned path must be written by one of the shards, and a file written by several shards
+    must be identical in all of them.
+
+    If the out directory already exists – it will be deleted with all of it contents.
+    Hence, it cannot be one of the shards, nor contain or be contained by one.
+    """
+    target = out.resolve()
+    for shard in shards:
+        source = shard.resolve()
+        if target == source or target in source.parents or source in target.parents:
+            raise ShardMergeError(f'Cannot merge to {out}, as it overlaps with shard {shard}.')
+    records = [_read_record(shard) for shard in shards]
+    count = records[0]['count']
+    if any(record['count'] != count for record in records):
+        raise ShardMergeError('Shards were built with different shard counts.')
+    indexes = sorted(record['index'] for record in records)
+    if indexes != list(range(count)):
+        raise ShardMergeError(f'Expected shards 0..{count - 1}, got {indexes}.')
+    planned = records[0]['planned']
+    if any(record['planned'] != planned for record in records):
+        raise ShardMergeError('Shards were built from different sites.')
+    _check_written(shards, records)
+    missing = _missing(planned, {path for record in records for path in record['written']})
+    if missing:
+        raise ShardMergeError(f'Shards did not write {len(missing)} planned paths: {", ".join(missing[:10])}')
+
+    if out.exists():
+        rmtree(out)
+    out.mkdir(parents=True)
+    for shard in shards:
+        copytree(shard, out, ignore=ignore_patterns(SHARD_RECORD), dirs_exist_ok=True)
+
+
+def _check_written(shards: Sequence[Path], records: Sequence[Dict[str, Any]]):
+    """Every recorded file is present in its shard and the files written by several shards do not conflict."""
+    writers: Dict[str, List[Path]] = defaultdict(list)
+    for shard, record in zip(shards, records):
+        for path in record['written']:
+            if not (shard / path).is_file():
+                raise ShardMergeError(f'Shard {shard} is missing {path}, which it has written.')
+            writers[path].append(shard)
+    for path, written_by in writers.items():
+        first, *others = written_by
+        conflicting = [shard for shard in others if not cmp(first / path, shard / path, shallow=False)]
+        if conflicting:
+            raise ShardMergeError(f'Shards {first} and {conflicting[0]} wrote different contents to {path}.')
+
+
+def _missing(planned: Sequence[str], written: Set[str]) -> List[str]:
+    """Planned locations neither written as a file nor containing one, e.g. the directory of a copy."""
+    directories = {str(parent) for path in written for parent in Path(path).parents}
+    return [location for location in planned
+            if location not in written and location.rstrip('/') not in directories]
+
+
+def _read_record(shard: Path) -> Dict[str, Any]:
+    record = shard / SHARD_RECORD
+    if not record.exists():
+        raise ShardMergeError(f'{shard} is not a shard out directory: missing {SHARD_RECORD}.')
+    return dict(json.loads(record.read_text()))
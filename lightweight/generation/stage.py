@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from abc import ABC
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .path import GenPath
+
+
+class OutputStage(ABC):
+    """A step applied to every file created through a [GenPath] during generation.
+
+    Stages are provided to [`Site.generate(...)`][lightweight.Site.generate] via its options
+    and run in the generation workers, right where the content is written.
+    """
+
+    def wants(self, path: GenPath) -> bool:
+        """Whether the stage needs the contents of a copied or streamed file in memory.
+
+        Files no stage wants are copied and streamed straight to disk;
+        the stages are then notified with [`written_file(...)`][OutputStage.written_file] instead.
+        """
+        return True
+
+    def transform(self, path: GenPath, contents: bytes) -> bytes:
+        """Change the contents before they are written to path."""
+        return contents
+
+    def written(self, path: GenPath, contents: bytes):
+        """Called after the contents were written to path."""
+
+    def written_file(self, path: GenPath):
+        """Called after a file the stage does not [want][OutputStage.wants] was copied or streamed to path."""
@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from logging import getLogger
 
 from lightweight import Content
+from lightweight.profiling import content_writer
 from .context import GenContext
 from .path import GenPath
 
@@ -30,4 +31,4 @@ class GenTask:
     def execute(self):
         self.ctx.site.info(f'Writing "{self.path}"')
         self.ctx.site.debug(f'{self.path}: CWD={self.cwd} CONTENT={self.content}')
-        self.content.write(self.path, self.ctx)
+        content_writer(type(self.content))(self.content, self.path, self.ctx)  # attributes memory to the type
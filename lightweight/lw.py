@@ -28,12 +28,23 @@ Additional help:
 ```bash
 lw serve --help
 ```
+
+Combine the outputs of a sharded build:
+```bash
+lw merge out out-0 out-1 out-2
+```
+
+List files changed between builds with manifests:
+```bash
+lw diff old-manifest.json new-manifest.json
+```
 """
 import asyncio
 import inspect
 import multiprocessing as mp
 import os
 import re
+import signal
 import stat
 import sys
 import traceback
@@ -46,13 +57,18 @@ from importlib.util import module_from_spec, spec_from_loader
 from logging import getLogger, DEBUG, INFO, ERROR, WARNING
 from pathlib import Path
 from random import randint, sample
-from typing import Any, Optional, Callable
+from shutil import rmtree
+from threading import Lock
+from typing import Any, Optional, Callable, List
 
 from slugify import slugify  # type: ignore
 
 from lightweight import Site, jinja, directory, jinja_env, paths
-from lightweight.errors import InvalidCommand
+from lightweight.errors import InvalidCommand, ShardMergeError
+from lightweight.generation.shard import merge_shards
+from lightweight.manifest import Manifest, diff
 from lightweight.server import DevServer, LiveReloadServer
+from lightweight.templates import immutable_templates
 
 logger = getLogger('lw')
 
@@ -96,6 +112,10 @@ class FailedGeneration(Exception):
     pass
 
 
+class CancelledGeneration(Exception):
+    pass
+
+
 class Generator:
 
     def __init__(self, func_file: Path, func_name: str, *, source: Path, out: Path, host: str, port: int):
@@ -103,33 +123,89 @@ class Generator:
         self.func_name = func_name
         self.source = source
         self.out = out
+        self.staging = out.with_name(f'.{out.name}.lw-next')  # swapped in for the out directory once complete
+        self.previous = out.with_name(f'.{out.name}.lw-previous')
         self.host = host
         self.port = port
         self._loaded = False
+        self._lock = Lock()  # guards the process, as generate and cancel are called from different threads
+        self._process: Optional[Process] = None
+        self._cancelled = False
 
     @property
     def url(self) -> str:
         return f'http://{self.host}:{self.port}/'
 
-    def __call__(self):
+    def __call__(self, out: Path):
         func = self.load_executable()
 
         site = func(self.url)
         if not hasattr(site, 'generate') or not positional_args_count(site.generate, equals=1):
             raise InvalidCommand(f'"{self.func_name}" did not return an instance of Site '
                                  f'with a "site.generate(out)" method.')
-        site.generate(self.out)
+        with immutable_templates():  # templates cannot change within the generation process
+            site.generate(out)
+
+    @property
+    def ignored(self) -> List[Path]:
+        """Directories written by the generator, to be ignored when watching the source."""
+        return [self.out, self.staging, self.previous]
+
+    def _generate_in_group(self, out: Path):
+        if hasattr(os, 'setpgrp'):
+            os.setpgrp()  # the worker processes of the site join the group, and are killed with it on cancel
+        self(out)
 
     def generate(self):
-        p = Process(target=self)
-        p.start()
+        """Generate the site to a staging directory in a separate process, and swap it in for out once complete.
+
+        Until then the previous generation is left in out; a cancelled or failed generation is discarded.
+        """
+        p = Process(target=self._generate_in_group, args=(self.staging,))
+        with self._lock:
+            self._process = p
+            self._cancelled = False
+            p.start()
         p.join()
+        with self._lock:
+            self._process = None
+            if self._cancelled:
+                rmtree(self.staging, ignore_errors=True)
+                raise CancelledGeneration()
         if p.exception:
+            rmtree(self.staging, ignore_errors=True)
             if isinstance(p.exception, InvalidCommand):
                 raise p.exception
             else:
                 logger.error(p.traceback)
                 raise FailedGeneration() from p.exception
+        self._swap()
+
+    def _swap(self):
+        if not self.staging.exists():  # the site did not write anything
+            return
+        rmtree(self.previous, ignore_errors=True)
+        if self.out.exists():
+            self.out.rename(self.previous)
+        self.staging.rename(self.out)
+        rmtree(self.previous, ignore_errors=True)
+
+    def cancel(self):
+        """Kill the process group of the generation in progress, if any; it raises [CancelledGeneration]."""
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                self._cancelled = True
+                self._kill(self._process)
+
+    @staticmethod
+    def _kill(process: Process):
+        if hasattr(os, 'killpg') and process.pid is not None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+                return
+            except ProcessLookupError:  # the group is not created yet
+                pass
+        process.terminate()
 
     def load_executable(self):
         module = load_module(self.func_file)
@@ -177,7 +253,8 @@ def sys_path_starting(with_: Path):
 
 
 def start_server(func_file: Path, func_name: str,
-                 *, source: Path, out: Path, host: str, port: int, enable_reload: bool, loop=None):
+                 *, source: Path, out: Path, host: str, port: int, enable_reload: bool, debounce: float = 0.1,
+                 loop=None):
     source = source.absolute()
     out = absolute_out(out, source)
 
@@ -187,7 +264,14 @@ def start_server(func_file: Path, func_name: str,
     if not enable_reload:
         server = DevServer(out)
     else:
-        server = LiveReloadServer(out, watch=source, regenerate=generator.generate, ignored=[out])
+        server = LiveReloadServer(
+            out,
+            watch=source,
+            regenerate=generator.generate,
+            cancel_regeneration=generator.cancel,
+            ignored=generator.ignored,
+            debounce=debounce,
+        )
 
     logger.info(f'Runner: {func_name} in {func_file}')
     logger.info(f'Sources: {source}')
@@ -302,6 +386,8 @@ def argument_parser():
 
     add_init_cli(subparsers)
     add_version_cli(subparsers)
+    add_merge_cli(subparsers)
+    add_diff_cli(subparsers)
 
     return parser
 
@@ -314,6 +400,38 @@ def add_init_cli(subparsers):
     add_log_arguments(qs_parser)
 
 
+def add_merge_cli(subparsers):
+    merge_parser = subparsers.add_parser(name='merge', description='Combine out directories of a sharded build')
+    merge_parser.add_argument('out', type=str, help='the directory to write the complete site to')
+    merge_parser.add_argument('shards', type=str, nargs='+', help='out directories of all shards')
+    merge_parser.set_defaults(func=lambda args: merge(Path(args.out), [Path(shard) for shard in args.shards]))
+    add_log_arguments(merge_parser)
+
+
+def merge(out: Path, shards: List[Path]):
+    try:
+        merge_shards(out.absolute(), shards)
+    except ShardMergeError as e:
+        raise InvalidCommand(str(e)) from e
+    logger.info(f' Merged {len(shards)} shards to: {out.absolute()}')
+
+
+def add_diff_cli(subparsers):
+    diff_parser = subparsers.add_parser(name='diff', description='Print paths added (+), changed (~) and removed (-) '
+                                                                 'between two build manifests')
+    diff_parser.add_argument('old', type=str, help='manifest of the previous build')
+    diff_parser.add_argument('new', type=str, help='manifest of the current build')
+    diff_parser.set_defaults(func=lambda args: print_diff(Path(args.old), Path(args.new)))
+
+
+def print_diff(old: Path, new: Path):
+    for location in (old, new):
+        if not location.exists():
+            raise InvalidCommand(f'Manifest does not exist: {location}')
+    for line in diff(Manifest.load(old), Manifest.load(new)).lines():
+        print(line)
+
+
 def add_log_arguments(parser):
     parser.add_argument('--log', default='info', type=str,
                         help='Set log level, options: debug, info, warning, error')
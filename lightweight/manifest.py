@@ -0,0 +1,107 @@
+"""A manifest of generated files: their paths, sizes, content hashes and content types.
+
+The manifest is recorded while the files are written, from the bytes already in memory;
+copied and streamed files are hashed from disk in chunks:
+```python
+site.generate('out', manifest='manifest.json')
+```
+
+Two manifests can be compared to upload only the changed files:
+```bash
+lw diff previous-manifest.json manifest.json
+```
+"""
+from __future__ import annotations
+
+__all__ = ['Manifest', 'ManifestEntry', 'ManifestDiff', 'diff']
+
+import json
+from dataclasses import dataclass, asdict
+from hashlib import sha256
+from mimetypes import guess_type
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Union, TYPE_CHECKING
+
+from .generation import OutputStage
+
+if TYPE_CHECKING:
+    from .generation import GenPath
+
+_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """A single generated file."""
+    path: str  # relative to the generation out directory
+    size: int
+    sha256: str
+    content_type: str
+
+
+class Manifest(OutputStage):
+    """An [output stage][OutputStage] recording every written file."""
+    entries: Dict[str, ManifestEntry]
+
+    def __init__(self, entries: Dict[str, ManifestEntry] | None = None):
+        self.entries = dict(entries or {})
+        self._lock = Lock()
+
+    def wants(self, path: GenPath) -> bool:
+        return False
+
+    def written(self, path: GenPath, contents: bytes):
+        self._record(path, len(contents), sha256(contents).hexdigest())
+
+    def written_file(self, path: GenPath):
+        digest = sha256()
+        with path.real_path.open('rb') as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        self._record(path, path.real_path.stat().st_size, digest.hexdigest())
+
+    def _record(self, path: GenPath, size: int, hexdigest: str):
+        entry = ManifestEntry(
+            path=str(path),
+            size=size,
+            sha256=hexdigest,
+            content_type=guess_type(path.name)[0] or 'application/octet-stream',
+        )
+        with self._lock:
+            self.entries[entry.path] = entry
+
+    def save(self, location: Union[str, Path]):
+        """Write the manifest as JSON."""
+        files = {path: asdict(self.entries[path]) for path in sorted(self.entries)}
+        Path(location).write_text(json.dumps({'files': files}, indent=2))
+
+    @classmethod
+    def load(cls, location: Union[str, Path]) -> Manifest:
+        """Read a manifest previously written with [Manifest.save]."""
+        files = json.loads(Path(location).read_text())['files']
+        return cls({path: ManifestEntry(**entry) for path, entry in files.items()})
+
+
+@dataclass(frozen=True)
+class ManifestDiff:
+    """Paths that differ between two manifests."""
+    added: List[str]
+    changed: List[str]
+    removed: List[str]
+
+    def lines(self) -> List[str]:
+        """A line per path prefixed with `+` when added, `~` when changed and `-` when removed."""
+        return [*(f'+ {p}' for p in self.added), *(f'~ {p}' for p in self.changed), *(f'- {p}' for p in self.removed)]
+
+
+def diff(old: Manifest, new: Manifest) -> ManifestDiff:
+    """Compare the files of the old and new manifests."""
+    return ManifestDiff(
+        added=sorted(new.entries.keys() - old.entries.keys()),
+        changed=sorted(
+            path for path in new.entries.keys() & old.entries.keys()
+            if new.entries[path].sha256 != old.entries[path].sha256
+        ),
+        removed=sorted(old.entries.keys() - new.entries.keys()),
+    )
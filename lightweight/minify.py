@@ -0,0 +1,64 @@
+"""HTML minification of generated pages.
+
+```python
+site.generate('out', minify=True)
+```
+
+Whitespace between and around elements is collapsed to a single space and comments are dropped.
+Kept intact:
+- contents of `<pre>`, `<textarea>`, `<script>` and `<style>`;
+- the insides of tags, including attribute values;
+- `<!--preview-->` markers and conditional comments.
+"""
+from __future__ import annotations
+
+__all__ = ['HtmlMinification', 'minify_html']
+
+import re
+from typing import Match, TYPE_CHECKING
+
+from .generation import OutputStage
+
+if TYPE_CHECKING:
+    from .generation import GenPath
+
+_TOKENS = re.compile(r'''
+    (?P<raw><(?P<tag>pre|textarea|script|style)\b.*?</(?P=tag)\s*>)
+  | (?P<comment><!--.*?-->)(?P<trailing>\s*)
+  | (?P<element><[a-zA-Z/!?][^>"']*(?:(?:"[^"]*"|'[^']*')[^>"']*)*>)
+  | (?P<space>\s{2,}|[\t\n\r\f\v])  # single spaces are left as is
+''', re.IGNORECASE | re.DOTALL | re.VERBOSE | re.ASCII)  # ASCII: no-break spaces are kept
+
+_KEPT_COMMENTS = ('<!--preview-->', '<!--[if', '<![endif]')
+
+
+def minify_html(html: str) -> str:
+    """Collapse whitespace and drop comments of an HTML document."""
+    return _TOKENS.sub(_minify_token, html).strip()
+
+
+def _minify_token(match: Match[str]) -> str:
+    if match.group('space') is not None:
+        return ' '
+    comment = match.group('comment')
+    if comment is not None:
+        if not comment.startswith(_KEPT_COMMENTS):
+            return ''
+        return comment + ' ' if match.group('trailing') else comment
+    return match.group(0)
+
+
+class HtmlMinification(OutputStage):
+    """An [output stage][OutputStage] minifying `.html` files before they are written."""
+
+    def wants(self, path: GenPath) -> bool:
+        return path.suffix == '.html'
+
+    def transform(self, path: GenPath, contents: bytes) -> bytes:
+        if not self.wants(path):
+            return contents
+        try:
+            html = contents.decode('utf-8')
+        except UnicodeDecodeError:
+            return contents
+        return minify_html(html).encode('utf-8')
@@ -0,0 +1,186 @@
+"""Memory profiling of the site generation.
+
+```python
+site.generate('out', profile_memory='memory.json')
+```
+[tracemalloc][1] snapshots are taken at the boundaries of generation phases:
+- `included` — at the start, holding the included content;
+- `planned` — once the generation tasks are created;
+- `written` — after every phase of writing (assets are written in a phase of their own when fingerprinted);
+- `completed` — after the files recorded during generation are saved.
+
+Every checkpoint records the time since the start of the generation, so the profile also times the phases.
+A `MemoryProfile(trace=False)` passed as `profile_memory` only times them, without the overhead of tracing:
+```python
+profile = MemoryProfile(trace=False)
+site.generate('out', profile_memory=profile)
+print(profile.summary())
+```
+
+At every boundary the live allocations are attributed to the innermost `lightweight` module on their stack,
+and to a content type: allocations made while writing a task go to the class of its content.
+Other allocations (e.g. made while the content was created) go to the content type of the innermost module
+on the stack, if the module defines a single one of the included types. The peak RSS of the process is sampled as well.
+
+Allocations made before `generate` (e.g. while adding content) are included only when tracing was started earlier:
+by `build --profile-memory` or with `PYTHONTRACEMALLOC=25`.
+
+[1]: https://docs.python.org/3/library/tracemalloc.html
+"""
+from __future__ import annotations
+
+__all__ = ['MemoryProfile', 'Checkpoint', 'content_writer']
+
+import json
+import sys
+import tracemalloc
+from dataclasses import dataclass, asdict
+from functools import lru_cache
+from inspect import getsourcefile
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Iterable, Set, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .content import Content
+    from .generation import GenPath, GenContext
+
+FRAMES = 25  # traceback depth, deep enough to reach the content from template internals
+TOP = 20  # the number of the largest modules in a report
+
+_PACKAGE = Path(__file__).absolute().parent
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+)
+_WRITERS: Dict[str, str] = {}  # file name of a content writer -> content type
+
+
+@lru_cache(maxsize=None)
+def content_writer(cls: type) -> Callable[[Content, GenPath, GenContext], None]:
+    """A function writing the content of the class, used by [GenTask][lightweight.generation.GenTask].
+
+    Its code has a file name of its own, so allocations made while writing are attributed to the class.
+    """
+    filename = f'<lightweight write {cls.__module__}.{cls.__qualname__}>'
+    namespace: Dict[str, Any] = {}
+    exec(compile('def write(content, path, ctx):\n    content.write(path, ctx)\n', filename, 'exec'), namespace)
+    _WRITERS[filename] = cls.__name__
+    return namespace['write']  # type: ignore
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """Memory usage at a phase boundary."""
+    name: str
+    seconds: float  # since the profile was started
+    traced_bytes: int  # live allocations traced by tracemalloc
+    traced_peak_bytes: int  # since tracing started
+    peak_rss_bytes: Optional[int]  # of the process; None where unavailable
+    modules: Dict[str, int]  # live bytes by the innermost lightweight module
+    content: Dict[str, int]  # live bytes by content type
+
+
+class MemoryProfile:
+    """Tracemalloc checkpoints of a generation; without `trace` only the time and the peak RSS are recorded."""
+    checkpoints: List[Checkpoint]
+
+    def __init__(self, *, trace: bool = True):
+        self.trace = trace
+        self.checkpoints = []
+        self._content_files: Dict[str, Set[str]] = {}  # source file -> content types defined there
+        self._started = False
+        self._start_time = perf_counter()
+
+    def start(self):
+        """Start the clock and tracing, unless it is already on."""
+        self._start_time = perf_counter()
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(FRAMES)
+            self._started = True
+
+    def stop(self):
+        """Stop tracing if it was started by this profile."""
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def content_types(self, contents: Iterable[Content]):
+        """Register the types of contents, attributing allocations outside of tasks in their modules to them."""
+        for content in contents:
+            cls = type(content)
+            try:
+                source = getsourcefile(cls)
+            except TypeError:  # a built-in
+                continue
+            if source is not None:
+                self._content_files.setdefault(str(Path(source).absolute()), set()).add(cls.__name__)
+
+    def checkpoint(self, name: str):
+        """Take a snapshot and attribute the live allocations."""
+        seconds = perf_counter() - self._start_time
+        modules: Dict[str, int] = {}
+        content: Dict[str, int] = {}
+        traces = tracemalloc.take_snapshot().filter_traces(_IGNORED).traces if self.trace else []
+        for trace in traces:
+            module = None
+            content_type = None
+            defined_in: Optional[Set[str]] = None  # content types of the innermost module defining any
+            for frame in reversed(trace.traceback):  # from the most recent
+                if module is None:
+                    module = _lightweight_module(frame.filename)
+                if defined_in is None:
+                    defined_in = self._content_files.get(frame.filename)
+                if content_type is None:
+                    content_type = _WRITERS.get(frame.filename)
+                if module is not None and content_type is not None:
+                    break
+            if content_type is None and defined_in is not None and len(defined_in) == 1:
+                content_type, = defined_in
+            modules[module or 'other'] = modules.get(module or 'other', 0) + trace.size
+            if content_type is not None:
+                content[content_type] = content.get(content_type, 0) + trace.size
+        traced, peak = tracemalloc.get_traced_memory() if self.trace else (0, 0)
+        self.checkpoints.append(Checkpoint(
+            name=name,
+            seconds=seconds,
+            traced_bytes=traced,
+            traced_peak_bytes=peak,
+            peak_rss_bytes=_peak_rss(),
+            modules=dict(sorted(modules.items(), key=lambda item: item[1], reverse=True)[:TOP]),
+            content=dict(sorted(content.items(), key=lambda item: item[1], reverse=True)),
+        ))
+
+    def summary(self) -> List[str]:
+        """A line per checkpoint."""
+        return [
+            f'{c.name} at {c.seconds:.2f} s'
+            + (f': traced {_mb(c.traced_bytes)} (peak {_mb(c.traced_peak_bytes)})' if self.trace else '')
+            + (f', peak RSS {_mb(c.peak_rss_bytes)}' if c.peak_rss_bytes is not None else '')
+            for c in self.checkpoints
+        ]
+
+    def save(self, location: Union[str, Path]):
+        """Write the report as JSON."""
+        Path(location).write_text(json.dumps({'checkpoints': [asdict(c) for c in self.checkpoints]}, indent=2))
+
+
+def _lightweight_module(filename: str) -> Optional[str]:
+    try:
+        relative = Path(filename).relative_to(_PACKAGE)
+    except ValueError:
+        return None
+    return '.'.join(('lightweight', *relative.with_suffix('').parts))
+
+
+def _peak_rss() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # bytes on macOS, kilobytes elsewhere
+
+
+def _mb(size: int) -> str:
+    return f'{size / 1024 / 1024:.1f} MB'
@@ -2,32 +2,57 @@
 Dev HTTP server serving static files using asyncio.
 
 Highlights:
+- HTTP/1.1 with persistent connections, pipelining and `HEAD` requests.
 - Allows to drop ".html" in URLs
     - which corresponds to nginx `try_files $uri $uri.html $uri/index.html =404;`
-- Can inject live-reload JS to HTML.
+    - resolved by an index of the served directory, rebuilt after every regeneration.
+- Can inject live-reload JS to HTML, which is pushed a message over Server-Sent Events once the site is regenerated.
+    - source changes are debounced and coalesced: a single regeneration runs at a time in a thread pool,
+      cancelled when new changes make it stale.
+- Caches small files in memory, revalidating them by modification time.
+- Sends strong `ETag` and `Last-Modified` validators, answering conditional requests with `304 Not Modified`.
+- Honors `Accept-Encoding`: serves precompressed `.br`/`.gz` siblings of text files when present,
+  otherwise compresses them on the fly in a thread pool, caching the result with the response.
+- Answers `Range` requests for single and multiple ranges with `206 Partial Content`, e.g. to seek in videos.
+- Serves larger files with the kernel `sendfile`, falling back to chunks read in a thread pool,
+  so large files neither block the event loop nor get loaded into memory.
 
 Mostly stolen from picoweb -- web pico-framework for Pycopy 2019 MIT
 """
 from __future__ import annotations
 
-from asyncio import StreamReader, StreamWriter, start_server, Event, sleep, Task, AbstractEventLoop
-from dataclasses import dataclass
+import gzip
+import os
+import posixpath
+from asyncio import StreamReader, StreamWriter, start_server, Event, Task, AbstractEventLoop, \
+    SendfileNotAvailableError, IncompleteReadError, TimeoutError, Queue, get_running_loop, sleep, wait_for
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
 from enum import Enum
+from functools import lru_cache
+from hashlib import sha1
+from http import HTTPStatus
+from inspect import isawaitable
 from logging import getLogger
+from os import stat_result
 from pathlib import Path
-from typing import Dict, Collection, Callable
+from stat import S_ISLNK
+from typing import Dict, Collection, Callable, BinaryIO, Any, Iterable, Optional, Tuple, List, Set, FrozenSet
 from uuid import uuid4
 
 from watchgod import awatch  # type: ignore
 
+from .compression import COMPRESSIBLE_SUFFIXES
+
 logger = getLogger('lw.server')
 
 
 @dataclass(frozen=True)
 class HttpRequest:
     """A request processed by the server."""
-    headers: Dict[str, str]
+    headers: Dict[str, str]  # names in lower case
     reader: StreamReader
     qs: str
     location: str
@@ -39,11 +64,80 @@ class File:
     """A file that is served via HTTP."""
     path: Path
     mime_type: MimeType
+    encoding: Optional[str] = None  # Content-Encoding of the response, e.g. "gzip"
+    precompressed: bool = False  # the path is a sibling already in the encoding; otherwise compressed on the fly
+    # recorded by the [index][index_files]; None for files found on disk
+    indexed_size: Optional[int] = field(default=None, compare=False)
+    siblings: Optional[FrozenSet[str]] = field(default=None, compare=False)  # encodings of precompressed siblings
 
     def read(self) -> bytes:
         with self.path.open('rb') as f:
             return f.read()
 
+    @property
+    def size(self) -> int:
+        return self.path.stat().st_size
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A ready-to-send response to a file."""
+    mtime_ns: int  # of the file when it was read
+    size: int  # of the file when it was read
+    content_type: str
+    headers: Dict[str, str]
+    body: bytes
+
+
+class ResponseCache:
+    """A bounded LRU cache of responses by [file][File], i.e. its path and encoding.
+
+    Entries are validated against the modification time and size of the file on every lookup.
+    """
+    max_bytes: int  # the total size of cached bodies
+    max_file_size: int  # larger files are streamed instead
+
+    def __init__(self, *, max_bytes: int = 64 * 1024 * 1024, max_file_size: int = 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_file_size = max_file_size
+        self._entries: OrderedDict[File, CachedResponse] = OrderedDict()
+        self._size = 0
+
+    def get(self, file: File, stat: stat_result) -> Optional[CachedResponse]:
+        """The response to the file if it did not change since it was cached."""
+        response = self._entries.get(file)
+        if response is None:
+            return None
+        if response.mtime_ns != stat.st_mtime_ns or response.size != stat.st_size:
+            self._remove(file)
+            return None
+        self._entries.move_to_end(file)
+        return response
+
+    def put(self, file: File, response: CachedResponse):
+        """Cache the response, evicting the least recently used ones over the limit.
+
+        Responses larger than `max_file_size` are not cached.
+        """
+        if len(response.body) > self.max_file_size:
+            return
+        if file in self._entries:
+            self._remove(file)
+        self._entries[file] = response
+        self._size += len(response.body)
+        while self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, file: File):
+        self._size -= len(self._entries.pop(file).body)
+
 
 class MimeType(Enum):
     """Mime-type of the file written to response Content-Type."""
@@ -53,6 +147,10 @@ class MimeType(Enum):
     png = 'image/png'
     gif = 'image/gif'
     svg = 'image/svg+xml'
+    mp4 = 'video/mp4'
+    webm = 'video/webm'
+    mp3 = 'audio/mpeg'
+    ogg = 'audio/ogg'
     plaintext = 'text/plain'
 
     @classmethod
@@ -69,6 +167,14 @@ class MimeType(Enum):
             return cls.gif
         if path.suffix == '.svg':
             return cls.svg
+        if path.suffix == '.mp4':
+            return cls.mp4
+        if path.suffix == '.webm':
+            return cls.webm
+        if path.suffix == '.mp3':
+            return cls.mp3
+        if path.suffix == '.ogg':
+            return cls.ogg
         return cls.plaintext
 
 
@@ -91,11 +197,16 @@ class DevServer:
     ```
     """
     _server_task: Task
+    idle_timeout: float = 5  # seconds a persistent connection waits for the next request
+    encodings: Tuple[str, ...] = ('br', 'gzip')  # in the order of preference
+    min_compressed_size: int = 1024  # smaller files are not compressed on the fly, like in `generate(compress=...)`
 
     def __init__(self, location: Path):
         self._server = None
+        self.cache = ResponseCache()
         self.working_dir = location
         check_directory(self.working_dir)
+        self.index = index_files(self.working_dir)
 
     def serve(self, host, port, loop: AbstractEventLoop):
         """Creates an asyncio coroutine, that serves requests on the provided host and port.
@@ -123,24 +234,52 @@ class DevServer:
         loop.run_until_complete(await_shutdown())
 
     def handle(self, writer: StreamWriter, request: HttpRequest):
-        """Handle the request and write the response."""
+        """Handle the request and write the response. Can return an awaitable."""
         return self.handle_static(writer, request)
 
-    def handle_static(self, writer: StreamWriter, request: HttpRequest):
+    async def handle_static(self, writer: StreamWriter, request: HttpRequest):
         """Look for file and write it to the writer.
         In case the file not found or there are other problems -- write an error.
         """
         try:
-            file = self.find_file(request.location[1:])
-            return self.sendfile(writer, file)
+            ranged = request.method == 'GET' and 'range' in request.headers
+            file = self.select_encoding(
+                self.find_file(request.location[1:]), request.headers.get('accept-encoding'), compress=not ranged,
+            )
+            if request.method in ('GET', 'HEAD'):
+                validators = await self.validators(file)
+                if not_modified(request.headers, validators):
+                    self.start_response(writer, file.mime_type.value, '304', {
+                        **validators, **_encoding_headers(file, None),
+                    })
+                    return
+                range_header = request.headers.get('range')
+                if range_header is not None and request.method == 'GET' and if_range(request.headers, validators):
+                    await self.send_ranges(writer, file, range_header)
+                    return
+            await _completed(self.sendfile(writer, file))
         except PermissionError:
-            return self.http_error(writer, '403')
+            self.http_error(writer, '403')
         except FileNotFoundError:
-            return self.http_error(writer, '404')
+            self.http_error(writer, '404')
+
+    def reindex(self):
+        """Rebuild the [index][index_files] of served files, e.g. after the site is generated.
+
+        The new index replaces the previous one at once, so requests never see a partial index.
+        """
+        self.index = index_files(self.working_dir)
 
     def find_file(self, location: str) -> File:
-        """Override to change how path is resolved to file."""
-        # TODO:mdrachuk:10.01.2020: read file asynchronously
+        """Override to change how path is resolved to file.
+
+        The location is normalised first, rejecting ones outside of the working directory, e.g. `../secret.txt`.
+        It is then looked up in the index; files added since the index was built are looked up on disk.
+        """
+        location = _normalized(location)
+        file = self.index.get(location)
+        if file is not None:
+            return file
         exact = self.working_dir / location
         html = self.working_dir / f'{location}.html'
         index = self.working_dir / location / 'index.html'
@@ -156,45 +295,243 @@ class DevServer:
             raise FileNotFoundError()
         return File(path=path, mime_type=MimeType.of(path))
 
-    def sendfile(self, writer: StreamWriter, file: File):
-        """Override to response with file is put together."""
-        self.start_response(writer, file.mime_type.value, '200')
-        writer.write(file.read())
+    def select_encoding(self, file: File, accept_encoding: Optional[str], *, compress: bool = True) -> File:
+        """The variant of the file in the encoding preferred by the client.
+
+        Precompressed siblings (`index.html.br`, `index.html.gz`) are preferred, unless the body is
+        [transformed][DevServer.transforms]. Otherwise, files small enough to be cached are compressed on the fly,
+        unless `compress` is off, as it is for `Range` requests: their byte ranges refer to the file itself.
+        Indexed files are selected from the siblings and sizes recorded by the index, without touching the disk.
+        """
+        if file.path.suffix not in COMPRESSIBLE_SUFFIXES:
+            return file
+        accepted = [encoding for encoding in self.encodings if accepts(accept_encoding, encoding)]
+        if not self.transforms(file):
+            for encoding in accepted:
+                sibling = file.path.with_name(file.path.name + _SIBLING_SUFFIXES[encoding])
+                if encoding in file.siblings if file.siblings is not None else sibling.is_file():
+                    return File(path=sibling, mime_type=file.mime_type, encoding=encoding, precompressed=True)
+        if not compress:
+            return file
+        size = file.indexed_size if file.indexed_size is not None else file.size
+        if size < self.min_compressed_size or (size > self.cache.max_file_size and not self.transforms(file)):
+            return file
+        for encoding in accepted:
+            if _can_compress(encoding):
+                return File(path=file.path, mime_type=file.mime_type, encoding=encoding)
+        return file
+
+    async def sendfile(self, writer: StreamWriter, file: File):
+        """Override to response with file is put together.
+
+        Small files are answered from the [response cache][ResponseCache]; larger ones are streamed.
+        The file is opened before the response is started, so a missing or forbidden file still results in an error.
+        """
+        response = await self.cached_response(file)
+        if response is not None:
+            self.start_response(writer, response.content_type, '200', response.headers)
+            writer.write(response.body)
+            return
+        with file.path.open('rb') as f:
+            size = file.size
+            headers = {'Content-Length': str(size), **await self._streamed_headers(file)}
+            self.start_response(writer, file.mime_type.value, '200', headers)
+            await write_file(writer, f, size)
+
+    async def send_ranges(self, writer: StreamWriter, file: File, range_header: str):
+        """Respond with the byte ranges of the file: a single one or `multipart/byteranges`.
+
+        An invalid `Range` header is ignored, sending the whole file; unsatisfiable ranges result in a `416`.
+        Ranges of files too large for the cache are sent with `sendfile` from their offsets.
+        """
+        response = await self.cached_response(file)
+        if response is not None:
+            size = len(response.body)
+            content_type = response.content_type
+            headers = {k: v for k, v in response.headers.items() if k != 'Content-Length'}
+        else:
+            size = file.size
+            content_type = file.mime_type.value
+            headers = await self._streamed_headers(file)
+        ranges = parse_ranges(range_header, size)
+        if ranges is None:
+            await _completed(self.sendfile(writer, file))
+            return
+        if not ranges:
+            unsatisfiable = {'Content-Range': f'bytes */{size}', 'Content-Length': '3'}
+            self.start_response(writer, status='416', headers=unsatisfiable)
+            writer.write(u('416'))
+            return
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            headers.update({'Content-Range': f'bytes {start}-{end - 1}/{size}', 'Content-Length': str(end - start)})
+            parts = [(b'', start, end)]
+            closing = b''
+        else:
+            boundary = uuid4().hex
+            parts = [
+                (u(f'\r\n--{boundary}\r\nContent-Type: {content_type}\r\n'
+                   f'Content-Range: bytes {start}-{end - 1}/{size}\r\n\r\n'), start, end)
+                for start, end in ranges
+            ]
+            closing = u(f'\r\n--{boundary}--\r\n')
+            length = sum(len(head) + end - start for head, start, end in parts) + len(closing)
+            headers['Content-Length'] = str(length)
+            content_type = f'multipart/byteranges; boundary={boundary}'
+        self.start_response(writer, content_type, '206', headers)
+        if response is not None:
+            body = memoryview(response.body)
+            for head, start, end in parts:
+                writer.write(head)
+                writer.write(body[start:end])
+        else:
+            with file.path.open('rb') as f:
+                for head, start, end in parts:
+                    writer.write(head)
+                    f.seek(start)
+                    await write_file(writer, f, end - start)
+        writer.write(closing)
+
+    async def _streamed_headers(self, file: File) -> Dict[str, str]:
+        return {**_encoding_headers(file, file.encoding), 'Accept-Ranges': 'bytes', **await self.validators(file)}
+
+    async def cached_response(self, file: File) -> Optional[CachedResponse]:
+        """The response to the file from the cache, reading the file on a miss.
+
+        None for files too large to be cached, unless their body is [transformed][DevServer.transforms].
+        """
+        stat = file.path.stat()
+        response = self.cache.get(file, stat)
+        if response is not None:
+            return response
+        on_the_fly = file.encoding is not None and not file.precompressed
+        if stat.st_size > self.cache.max_file_size and not self.transforms(file) and not on_the_fly:
+            return None
+        loop = get_running_loop()
+        contents = await loop.run_in_executor(None, file.read)
+        body = contents if file.precompressed else self.prepare_body(file, contents)
+        encoding = file.encoding
+        if on_the_fly:
+            compressed = await loop.run_in_executor(None, _compress, file.encoding, body)
+            if len(compressed) < len(body):
+                body = compressed
+            else:
+                encoding = None
+        response = CachedResponse(
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            content_type=file.mime_type.value,
+            headers={
+                'Content-Length': str(len(body)),
+                **_encoding_headers(file, encoding),
+                'Accept-Ranges': 'bytes',
+                **_validators(sha1(body).hexdigest(), stat),
+            },
+            body=body,
+        )
+        self.cache.put(file, response)
+        return response
+
+    async def validators(self, file: File) -> Dict[str, str]:
+        """`ETag`, `Last-Modified` and `Cache-Control` headers of the current version of the file.
+
+        The ETag of a cached response is a hash of its body. Files too large to be cached are streamed
+        without reading them up front, so their ETag is made of the modification time and the size.
+        """
+        response = await self.cached_response(file)
+        if response is not None:
+            return {name: response.headers[name] for name in VALIDATORS}
+        stat = file.path.stat()
+        encoding = f'-{file.encoding}' if file.encoding is not None else ''
+        return _validators(f'{stat.st_mtime_ns:x}-{stat.st_size:x}{encoding}', stat)
+
+    def transforms(self, file: File) -> bool:
+        """Override to mark files with bodies changed by [prepare_body][DevServer.prepare_body].
+
+        These are always read into memory, however large.
+        """
+        return False
+
+    def prepare_body(self, file: File, contents: bytes) -> bytes:
+        """Override to transform the contents of files before they are cached and sent."""
+        return contents
 
     @staticmethod
     def start_response(writer: StreamWriter,
                        content_type: str = "text/html; charset=utf-8",
                        status: str = "200",
                        headers: Dict[str, str] | None = None):
-        writer.write(u(f'HTTP/1.0 {status} NA\r\n'))
-        writer.write(u(f'Content-Type: {content_type}'))
-        if headers:
-            writer.write(u('\r\n'))
-            for k, v in headers.items():
-                writer.write(u(f'{k}: {v}'))
-        writer.write(u('\r\n\r\n'))
+        """Write the status line and headers.
+
+        Without a `Content-Length` header the connection is closed after the response to mark its end.
+        """
+        lines = [f'HTTP/1.1 {status} {_reason(status)}', f'Content-Type: {content_type}']
+        lines.extend(f'{k}: {v}' for k, v in (headers or {}).items())
+        if isinstance(writer, ResponseWriter):
+            writer.length_known = status in _NO_BODY or any(k.lower() == 'content-length' for k in (headers or {}))
+            writer.keep_alive = writer.keep_alive and writer.length_known
+            lines.append(f'Connection: {"keep-alive" if writer.keep_alive else "close"}')
+        else:
+            lines.append('Connection: close')
+        writer.write(u('\r\n'.join(lines) + '\r\n\r\n'))
+        if isinstance(writer, ResponseWriter):
+            writer.started = True
 
     @classmethod
     def http_error(cls, writer: StreamWriter, status: str):
-        cls.start_response(writer, status=status)
+        cls.start_response(writer, status=status, headers={'Content-Length': str(len(status))})
         writer.write(u(status))
 
     async def respond(self, reader: StreamReader, writer: StreamWriter):
-        first_line = await reader.readline()
-        method: str
-        path: str
-        proto: str
-        method, path, proto = first_line.decode().split()
-        if path != '/__live_reload_id__':
+        """Serve the requests of a connection one after another, including pipelined ones.
+
+        HTTP/1.1 connections are kept open until the client asks to close or is idle for `idle_timeout` seconds.
+        """
+        try:
+            while True:
+                try:
+                    first_line = await wait_for(reader.readline(), self.idle_timeout)
+                except TimeoutError:
+                    break
+                if not first_line:  # closed by the client
+                    break
+                response = await self._respond_once(first_line, reader, writer)
+                await writer.drain()
+                if not response.keep_alive:
+                    break
+        except (ConnectionError, IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _respond_once(self, first_line: bytes, reader: StreamReader, writer: StreamWriter) -> ResponseWriter:
+        try:
+            method, path, proto = first_line.decode('latin-1').split()
+        except ValueError:
+            response = ResponseWriter(writer, keep_alive=False, head=False)
+            self.http_error(response, '400')  # type: ignore # a StreamWriter proxy
+            return response
+        if not path.startswith('/__live_reload'):
             logger.info(f'{now_repr()}: {method} {path} Requested')
         else:
             logger.debug(f'{now_repr()}: {method} {path} Requested')
+        response = ResponseWriter(writer, keep_alive=False, head=method == 'HEAD')
+        try:
+            headers = await self._parse_headers(reader)
+        except ValueError as e:  # the rest of the request cannot be trusted: the connection is closed
+            self.http_error(response, '400')  # type: ignore # a StreamWriter proxy
+            logger.info(f'{now_repr()}: {method} {path} {e}')
+            return response
         try:
             if '?' in path:
                 path, qs = path.split('?', 1)
             else:
                 qs = ''
-            headers = await self._parse_headers(reader)
+            response.keep_alive = _keep_alive(proto, headers) and not _has_body(headers)
             request = HttpRequest(
                 method=method,
                 location=path,
@@ -202,32 +539,290 @@ class DevServer:
                 qs=qs,
                 reader=reader,
             )
-            self.handle(writer, request)
+            await _completed(self.handle(response, request))  # type: ignore # a StreamWriter proxy
+        except (ConnectionError, IncompleteReadError):
+            raise
         except Exception as e:
-            self.http_error(writer, '500')
-            logger.error(f'{now_repr()}: {method} {path}', exc_info=e)
-        finally:
-            await writer.drain()
-            writer.close()
-            await sleep(0.01)
-            await writer.wait_closed()
-            if path != '/__live_reload_id__':
-                logger.info(f'{now_repr()}: {method} {path} Done')
+            if response.started:  # the response cannot be replaced by an error anymore
+                response.keep_alive = False
             else:
-                logger.debug(f'{now_repr()}: {method} {path} Done')
+                self.http_error(response, '500')  # type: ignore # a StreamWriter proxy
+            logger.error(f'{now_repr()}: {method} {path}', exc_info=e)
+        if not response.started or not response.length_known:
+            response.keep_alive = False  # the end of the response is marked by closing the connection
+        if not path.startswith('/__live_reload'):
+            logger.info(f'{now_repr()}: {method} {path} Done')
+        else:
+            logger.debug(f'{now_repr()}: {method} {path} Done')
+        return response
 
     @staticmethod
-    async def _parse_headers(reader: StreamReader):
+    async def _parse_headers(reader: StreamReader) -> Dict[str, str]:
+        """Headers of the request with names in lower case.
+
+        Raises a ValueError on a line which is not a header.
+        """
         headers = {}
         while True:
             line = await reader.readline()
-            if line == b'\r\n':
+            if line in (b'\r\n', b'\n', b''):
                 break
-            k, v = line.split(b':', 1)
-            headers[k] = v.strip()
+            k, colon, v = line.decode('latin-1').partition(':')
+            if not colon or not k.strip():
+                raise ValueError(f'Malformed header line {line!r}')
+            headers[k.strip().lower()] = v.strip()
         return headers
 
 
+class ResponseWriter:
+    """A proxy of the connection [StreamWriter] for writing a single response.
+
+    Knows if the connection is kept open after the response, and drops the body in response to a `HEAD` request.
+    """
+
+    def __init__(self, writer: StreamWriter, *, keep_alive: bool, head: bool):
+        self.writer = writer
+        self.keep_alive = keep_alive
+        self.head = head
+        self.started = False  # the headers are written
+        self.length_known = False  # the headers include Content-Length
+
+    def write(self, data: bytes):
+        if self.started and self.head:
+            return
+        self.writer.write(data)
+
+    def writelines(self, data: Iterable[bytes]):
+        for line in data:
+            self.write(line)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.writer, name)
+
+
+def _keep_alive(proto: str, headers: Dict[str, str]) -> bool:
+    connection = headers.get('connection', '').lower()
+    if proto == 'HTTP/1.1':
+        return connection != 'close'
+    return connection == 'keep-alive'
+
+
+def _has_body(headers: Dict[str, str]) -> bool:
+    """Request bodies are not read by the server, so the connection cannot be reused after one."""
+    return headers.get('content-length', '0') != '0' or 'transfer-encoding' in headers
+
+
+_NO_BODY = ('204', '304')  # statuses of responses ending with the headers
+
+VALIDATORS = ('ETag', 'Last-Modified', 'Cache-Control')
+
+
+def _normalized(location: str) -> str:
+    """The location without `.` and `..` segments, keeping a trailing slash."""
+    normalized = posixpath.normpath(location) if location else '.'
+    if normalized == '..' or normalized.startswith('../') or posixpath.isabs(normalized):
+        raise PermissionError()
+    if normalized == '.':
+        return ''
+    return normalized + '/' if location.endswith('/') else normalized
+
+
+def _validators(etag: str, stat: stat_result) -> Dict[str, str]:
+    return {
+        'ETag': f'"{etag}"',
+        'Last-Modified': formatdate(stat.st_mtime, usegmt=True),
+        'Cache-Control': 'no-cache',  # browsers keep the files but revalidate them on every use
+    }
+
+
+_SIBLING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def accepts(accept_encoding: Optional[str], encoding: str) -> bool:
+    """The encoding is listed in the `Accept-Encoding` header, directly or by `*`, with a non-zero quality."""
+    if not accept_encoding:
+        return False
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        name, _, value = params.partition('=')
+        if name.strip().lower() == 'q':
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0
+        qualities[coding.strip().lower()] = quality
+    return qualities.get(encoding, qualities.get('*', 0)) > 0
+
+
+def _encoding_headers(file: File, encoding: Optional[str]) -> Dict[str, str]:
+    """Content-Encoding of the response and Vary of every response that could be compressed."""
+    headers = {'Vary': 'Accept-Encoding'} if file.encoding is not None or file.path.suffix in COMPRESSIBLE_SUFFIXES \
+        else {}
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+    return headers
+
+
+@lru_cache(maxsize=None)
+def _can_compress(encoding: str) -> bool:
+    if encoding == 'br':
+        try:
+            import brotli  # type: ignore # noqa: F401 # optional dependency without typings
+        except ImportError:
+            return False
+    return encoding in _SIBLING_SUFFIXES
+
+
+def _compress(encoding: str, contents: bytes) -> bytes:
+    """Compress faster than into siblings written by `generate(compress=...)`, as the client waits."""
+    if encoding == 'br':
+        import brotli
+        return bytes(brotli.compress(contents, quality=5))
+    return gzip.compress(contents, compresslevel=6, mtime=0)
+
+
+def not_modified(request_headers: Dict[str, str], validators: Dict[str, str]) -> bool:
+    """The conditional request can be answered with `304 Not Modified`.
+
+    `If-None-Match` takes precedence over `If-Modified-Since`, which is ignored when unparseable.
+    """
+    if_none_match = request_headers.get('if-none-match')
+    if if_none_match is not None:
+        if if_none_match.strip() == '*':
+            return True
+        etags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return validators['ETag'] in etags
+    if_modified_since = request_headers.get('if-modified-since')
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return parsedate_to_datetime(validators['Last-Modified']) <= since
+
+
+MAX_RANGES = 16  # more ranges in a request are ignored, sending the whole file
+
+
+def parse_ranges(range_header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """Byte ranges of `Range: bytes=...` as `(start, end)` with the end exclusive, clamped to the size.
+
+    None when the header is invalid and should be ignored; an empty list when no range is satisfiable.
+    """
+    unit, _, specs = range_header.partition('=')
+    if unit.strip().lower() != 'bytes':
+        return None
+    ranges = []
+    for spec in specs.split(','):
+        first, dash, last = spec.strip().partition('-')
+        if not dash or not (first.isdigit() or first == '') or not (last.isdigit() or last == ''):
+            return None
+        if first == '':  # a suffix: the last bytes
+            if last == '':
+                return None
+            if int(last) > 0 and size > 0:
+                ranges.append((max(size - int(last), 0), size))
+            continue
+        start = int(first)
+        if last != '' and int(last) < start:
+            return None
+        if start < size:
+            ranges.append((start, min(int(last) + 1, size) if last != '' else size))
+    if len(ranges) > MAX_RANGES:
+        return None
+    return ranges
+
+
+def if_range(request_headers: Dict[str, str], validators: Dict[str, str]) -> bool:
+    """The `Range` of the request applies: there is no `If-Range` or it matches the current version.
+
+    A weak ETag never matches.
+    """
+    value = request_headers.get('if-range')
+    if value is None:
+        return True
+    if value.startswith('"') or value.startswith('W/'):
+        return value == validators['ETag']
+    return value == validators['Last-Modified']
+
+
+def _reason(status: str) -> str:
+    try:
+        return HTTPStatus(int(status)).phrase
+    except ValueError:
+        return 'NA'
+
+
+CHUNK_SIZE = 256 * 1024
+
+
+async def write_file(writer: StreamWriter, f: BinaryIO, size: int):
+    """Write size bytes of the file opened in binary mode.
+
+    Uses the kernel `sendfile` when the transport supports it.
+    Otherwise, the file is read in chunks in the default executor, waiting for every chunk to be sent,
+    so that neither the event loop is blocked by disk reads nor the whole file is held in memory.
+    """
+    if isinstance(writer, ResponseWriter) and writer.head:
+        return
+    await writer.drain()  # the headers go first
+    loop = get_running_loop()
+    offset = f.tell()
+    try:
+        await loop.sendfile(writer.transport, f, offset, size, fallback=False)
+        return
+    except (SendfileNotAvailableError, NotImplementedError):
+        f.seek(offset)
+    remaining = size
+    while remaining > 0:
+        chunk = await loop.run_in_executor(None, f.read, min(CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        writer.write(chunk)
+        await writer.drain()
+        remaining -= len(chunk)
+
+
+async def _completed(result: Any):
+    """Await the result of an overridable handler method, which may be a plain function in subclasses."""
+    if isawaitable(result):
+        await result
+
+
+def index_files(directory: Path) -> Dict[str, File]:
+    """Files of the directory by the locations resolving to them, relative and without a leading slash.
+
+    Follows nginx `try_files $uri $uri.html $uri/index.html`: `about` resolves to `about.html` unless there is an exact
+    `about` file; `blog` and `blog/` to `blog/index.html`, though `blog` prefers a `blog.html`.
+    Symbolic links are left to [find_file][DevServer.find_file], which checks they stay inside the directory.
+
+    The size and the encodings of precompressed siblings (`.gz`, `.br`) of every file are recorded as well.
+    """
+    exact: Dict[str, File] = {}
+    html: Dict[str, File] = {}
+    index: Dict[str, File] = {}
+    for dirpath, _, filenames in os.walk(directory):
+        parent = Path(dirpath)
+        relative = parent.relative_to(directory).as_posix()
+        prefix = '' if relative == '.' else f'{relative}/'
+        stats = {name: (parent / name).lstat() for name in filenames}
+        sizes = {name: st.st_size for name, st in stats.items() if not S_ISLNK(st.st_mode)}
+        for name, size in sizes.items():
+            path = parent / name
+            siblings = frozenset(encoding for encoding, suffix in _SIBLING_SUFFIXES.items() if name + suffix in sizes)
+            file = File(path=path, mime_type=MimeType.of(path), indexed_size=size, siblings=siblings)
+            exact[prefix + name] = file
+            if name.endswith('.html'):
+                html[prefix + name[:-len('.html')]] = file
+            if name == 'index.html':
+                index[prefix] = file
+                index[prefix[:-1]] = file
+    return {**index, **html, **exact}
+
+
 def check_directory(working_dir: Path):
     if not working_dir.exists():
         raise FileNotFoundError(f'Directory {working_dir} does not exist')
@@ -237,10 +832,21 @@ def check_directory(working_dir: Path):
 
 
 RunGenerate = Callable[[], None]
+CancelGenerate = Callable[[], None]
 
 
 class LiveReloadServer(DevServer):
+    """A [dev server][DevServer] regenerating the site on source changes and reloading the open pages.
+
+    Source changes are coalesced until none arrive for `debounce` seconds. A single regeneration runs at a time,
+    without blocking the server; changes arriving during it are regenerated once more right after it.
+    With `cancel_regeneration` the stale regeneration is stopped as soon as the changes arrive, instead of completing.
+
+    Pages listen to `/__live_reload__` — an event stream sending the current live reload id on connect
+    and the new one as soon as the regeneration completes. They poll `/__live_reload_id__` only if the stream fails.
+    """
     stopped: Event
+    heartbeat: float = 15  # seconds between comments keeping the event streams open and detecting closed ones
 
     def __init__(
         self,
@@ -248,13 +854,23 @@ class LiveReloadServer(DevServer):
         *,
         watch: Path,
         regenerate: RunGenerate,
-        ignored: Collection[Path] = tuple()
+        cancel_regeneration: Optional[CancelGenerate] = None,
+        ignored: Collection[Path] = tuple(),
+        debounce: float = 0.1,
     ):
         super().__init__(location)
         self.live_reload_id = self._new_id()
         self.watch_location = str(watch)
         self.regenerate = regenerate
+        self.cancel_regeneration = cancel_regeneration  # called from the event loop; regenerate then returns or raises
         self.ignored = ignored
+        self.debounce = debounce  # seconds without changes before regenerating
+        self._changed = False  # since the last regeneration started
+        self._last_change = 0.0  # event loop time
+        self._regeneration: Optional[Task] = None  # regenerating while there are changes
+        self._in_flight = False  # regenerate is running
+        self._cancelled = False  # the running regeneration is stale
+        self.listeners: Set[Queue[Optional[str]]] = set()  # of open event streams; None closes a stream
 
     def serve(self, host, port, loop):
         super().serve(host, port, loop)
@@ -262,46 +878,115 @@ class LiveReloadServer(DevServer):
         loop.create_task(self.watch_source())
 
     def shutdown(self, loop):
+        if self._in_flight and not self._cancelled and self.cancel_regeneration is not None:
+            self._cancelled = True
+            self.cancel_regeneration()  # instead of waiting for the build to finish
+        self.broadcast(None)
         super().shutdown(loop)
         self.stopped.set()
 
     def handle(self, writer: StreamWriter, request: HttpRequest):
+        if request.location == '/__live_reload__':
+            return self.stream_live_reload(writer, request)
         if request.location == '/__live_reload_id__':
             return self.send_live_reload_id(writer)
         else:
             return self.handle_static(writer, request)
 
-    def sendfile(self, writer: StreamWriter, file: File):
+    async def stream_live_reload(self, writer: StreamWriter, request: HttpRequest):
+        """Send the live reload id as Server-Sent Events until the connection or the server is closed."""
+        self.start_response(writer, 'text/event-stream', '200', {'Cache-Control': 'no-cache'})
+        if request.method == 'HEAD':
+            return
+        queue: Queue[Optional[str]] = Queue()
+        self.listeners.add(queue)
+        try:
+            writer.write(u(f'retry: 1000\ndata: {self.live_reload_id}\n\n'))
+            while not writer.is_closing():
+                await writer.drain()
+                try:
+                    live_reload_id = await wait_for(queue.get(), self.heartbeat)
+                except TimeoutError:
+                    writer.write(b': heartbeat\n\n')
+                    continue
+                if live_reload_id is None:
+                    break
+                writer.write(u(f'data: {live_reload_id}\n\n'))
+        finally:
+            self.listeners.discard(queue)
+
+    def broadcast(self, live_reload_id: Optional[str]):
+        """Push the live reload id to every open event stream; None closes them."""
+        for queue in self.listeners:
+            queue.put_nowait(live_reload_id)
+
+    def transforms(self, file: File) -> bool:
+        return file.mime_type == MimeType.html
+
+    def prepare_body(self, file: File, contents: bytes) -> bytes:
         if file.mime_type == MimeType.html:
-            self.start_response(writer, file.mime_type.value, '200')
-            writer.write(u(
-                file.read()
-                .decode('utf8')
-                .replace('</body>', f'{LIVE_RELOAD_JS}</body>')
-            ))
-        else:
-            super().sendfile(writer, file)
+            return u(contents.decode('utf8').replace('</body>', f'{LIVE_RELOAD_JS}</body>'))
+        return contents
 
     def send_live_reload_id(self, writer: StreamWriter):
-        self.start_response(writer)
+        self.start_response(writer, headers={'Content-Length': str(len(u(self.live_reload_id)))})
         writer.write(u(self.live_reload_id))
 
     async def watch_source(self):
         async for changes in awatch(str(self.watch_location), stop_event=self.stopped):
-            for change, location in changes:  # type: ignore # the type here is invalid
-                if not self._is_ignored_location(location):
-                    self.on_source_changed()
+            if any(not self._is_ignored_location(location) for _, location in changes):  # type: ignore # invalid type
+                self.on_source_changed()
 
     def _is_ignored_location(self, location) -> bool:
-        return len(self.ignored) != 0 and all(location.startswith(str(path.resolve())) for path in self.ignored)
+        return any(location == str(path.resolve()) or location.startswith(str(path.resolve()) + os.sep)
+                   for path in self.ignored)
 
     def on_source_changed(self):
+        """Schedule a regeneration, coalescing it with other changes within the debounce window."""
+        loop = get_running_loop()
+        self._changed = True
+        self._last_change = loop.time()
+        if self._in_flight and not self._cancelled and self.cancel_regeneration is not None:
+            logger.info('Source change during the regeneration. Cancelling it.')
+            self._cancelled = True
+            self.cancel_regeneration()
+        if self._regeneration is None or self._regeneration.done():
+            self._regeneration = loop.create_task(self._regenerate_while_changed())
+
+    async def _regenerate_while_changed(self):
+        loop = get_running_loop()
+        while self._changed and not self.stopped.is_set():
+            quiet_in = self._last_change + self.debounce - loop.time()
+            if quiet_in > 0:
+                await sleep(quiet_in)
+                continue
+            self._changed = False
+            await self.regenerate_site()
+
+    async def regenerate_site(self):
+        """Regenerate the site and [index][index_files] its files in the default executor; then reload the pages.
+
+        The new index is swapped in on the event loop, together with clearing the response cache.
+        """
         logger.info('Source change. Live reload triggered.')
-        self.live_reload_id = self._new_id()
+        loop = get_running_loop()
+        self._in_flight = True
+        self._cancelled = False
         try:
-            self.regenerate()
+            await loop.run_in_executor(None, self.regenerate)
         except Exception as e:
-            logger.exception('Exception when generating the site: ', exc_info=e)
+            if not self._cancelled:
+                logger.exception('Exception when generating the site: ', exc_info=e)
+        finally:
+            self._in_flight = False
+        if self._cancelled:  # pages are reloaded after the follow-up regeneration
+            logger.info('Regeneration cancelled.')
+            return
+        index = await loop.run_in_executor(None, index_files, self.working_dir)
+        self.live_reload_id = self._new_id()
+        self.cache.clear()
+        self.index = index
+        self.broadcast(self.live_reload_id)
 
     @staticmethod
     def _new_id():
@@ -312,34 +997,64 @@ LIVE_RELOAD_JS = """
 <!-- Script injected by the Lightweight Dev Server to reload in case of changes. -->
 <script type="application/javascript">
 const liveReload = function f() {
+    let currentId = null;
+    let source = null;
     let interval = null;
-    let stopped = null;
+    let stopped = false;
 
     return {
-        start: () => fetchId().then(reloadOnChange),
+        start: () => {
+            document.addEventListener('visibilitychange', () => document.hidden ? pause() : resume());
+            resume();
+        },
         stop: () => stop(),
     };
 
-    function fetchId() {
-        return fetch('/__live_reload_id__').then(data => data.text());
+    function reloadOnChange(newId) {
+        if (currentId === null) {
+            currentId = newId;
+        } else if (!stopped && newId !== currentId) {
+            location.reload();
+        }
     }
 
-    function reloadOnChange(currentId) {
-        stopped = false;
-        interval = setInterval(check, 1000);
+    function resume() {  // the id is sent on connecting, reloading for the changes made while hidden
+        if (stopped || document.hidden || source !== null || interval !== null) {
+            return;
+        }
+        typeof EventSource === 'undefined' ? poll() : listen();
+    }
 
-        function check() {
-            fetchId().then(newId => {
-                if (!stopped && newId !== currentId) {
-                    location.reload()
-                }
-            });
+    function pause() {  // hidden tabs do not hold a connection each
+        clearInterval(interval);
+        interval = null;
+        if (source !== null) {
+            source.close();
+            source = null;
         }
     }
 
+    function listen() {
+        const stream = new EventSource('/__live_reload__');
+        source = stream;
+        stream.onmessage = event => reloadOnChange(event.data);
+        stream.onerror = () => {
+            if (source === stream && stream.readyState === EventSource.CLOSED) {  // not retried by the browser
+                source = null;
+                poll();
+            }
+        };
+    }
+
+    function poll() {
+        const check = () => fetch('/__live_reload_id__').then(data => data.text()).then(reloadOnChange);
+        check();
+        interval = setInterval(check, 1000);
+    }
+
     function stop() {
-        clearInterval(interval);
-        stopped = false;
+        stopped = true;
+        pause();
     }
 }();
 liveReload.start();
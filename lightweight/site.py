@@ -6,20 +6,28 @@ import asyncio
 from asyncio import gather
 from collections import defaultdict
 from concurrent.futures.thread import ThreadPoolExecutor
+from contextlib import nullcontext
 from logging import getLogger
 from os import getcwd
 from os.path import abspath
 from pathlib import Path
 from shutil import rmtree
-from typing import overload, Union, Optional, List, Dict
+from typing import overload, Union, Optional, List, Dict, Sequence, Collection
 from urllib.parse import urlparse, urljoin
 
+from .assets import Assets, DEFAULT_EXCLUDE
 from .content.content_abc import Content
 from .content.copies import copy
 from .errors import AbsolutePathIncluded, IncludedDuplicate
 from .files import paths, directory
-from .generation import GenContext, GenTask
+from .generation import GenContext, GenTask, Shard, OutputStage
+from .generation.shard import WrittenFiles
 from .included import Includes, IncludedContent
+from .manifest import Manifest
+from .compression import Compression
+from .minify import HtmlMinification
+from .profiling import MemoryProfile
+from . import templates
 
 logger = getLogger('lw')
 
@@ -52,6 +60,7 @@ class Site:
     url: str
     content: Includes
     title: Optional[str]
+    assets: Assets  # locations of fingerprinted assets from the latest generation
 
     def __init__(
             self,
@@ -63,6 +72,7 @@ class Site:
         self.url = _check_site_url(url)
         self.title = title
         self.content = Includes() if not content else content
+        self.assets = Assets()
 
     @overload
     def add(self, location: str):
@@ -120,12 +130,54 @@ class Site:
             raise IncludedDuplicate(at=c.location)
         self.content.add(c)
 
-    def generate(self, out: Union[str, Path] = 'out'):
+    def generate(
+            self,
+            out: Union[str, Path] = 'out',
+            *,
+            immutable_templates: bool = False,
+            shard: Optional[Shard] = None,
+            manifest: Union[str, Path, None] = None,
+            compress: Collection[str] = (),
+            minify: bool = False,
+            fingerprint: bool = False,
+            fingerprint_exclude: Collection[str] = DEFAULT_EXCLUDE,
+            workers: Optional[int] = None,
+            profile_memory: Union[bool, str, Path, MemoryProfile] = False,
+    ):
         """Generate the site in directory provided as out.
 
         If the out directory does not exist — it will be created along with its whole hierarchy.
 
         If the out directory already exists – it will be deleted with all of it contents.
+
+        With `immutable_templates` the Jinja templates are treated as unchanging during the generation:
+        each template file is stat-ed once per build instead of on every render.
+
+        With a `shard` only its slice of the tasks is written, while the content still sees all of [GenContext.tasks].
+        Out directories of all shards are combined with `lw merge`.
+
+        With a `manifest` location the path, size, content hash and content type of every written file
+        are saved there as JSON. Manifests of two builds are compared with `lw diff`.
+
+        With `compress` encodings (`"gzip"`, `"br"`) compressed siblings are written next to text files,
+        e.g. `index.html.gz`.
+
+        With `minify` the whitespace of HTML files is collapsed and comments are dropped before they are written.
+
+        With `fingerprint` the [assets][lightweight.assets] (compiled Sass and copied files) are written
+        under names including their content hash, e.g. `style.3f2a9c01de.css`. They are written before the rest
+        of the content, which links to them by logical locations: `site / 'css/style.css'`.
+        Locations matching the `fingerprint_exclude` glob patterns keep their names; by default these are HTML pages
+        and well-known root files like `robots.txt` and `favicon.ico`.
+
+        Content is written by a pool of `workers` threads; the default is chosen by [ThreadPoolExecutor].
+        With `workers=0` the tasks are written one by one in the calling thread.
+
+        With `profile_memory` tracemalloc snapshots are taken at the boundaries of generation phases,
+        attributing the memory to content types and lightweight modules. The report is saved as JSON
+        to the provided location, or to `memory-profile.json` when `True`. A provided [MemoryProfile] records
+        the checkpoints instead of a saved report, e.g. `MemoryProfile(trace=False)` times the phases alone.
+        See [lightweight.profiling].
         """
         self.info(f"STARTED GENERATION")
         out = Path(abspath(out))
@@ -134,32 +186,121 @@ class Site:
             self.info(f"Deleting existing OUT")
             rmtree(out)
         out.mkdir(parents=True, exist_ok=True)
-        self._generate(out)
+        self.assets = Assets(fingerprint=fingerprint, exclude=fingerprint_exclude)
+        stages = []  # type: List[OutputStage]
+        if minify:
+            stages.append(HtmlMinification())
+        recorded = Manifest() if manifest is not None else None
+        if recorded is not None:
+            stages.append(recorded)
+        if compress:
+            stages.append(Compression(compress))
+        if isinstance(profile_memory, MemoryProfile):
+            profile: Optional[MemoryProfile] = profile_memory
+        else:
+            profile = MemoryProfile() if profile_memory else None
+        if profile is not None:
+            profile.start()
+        try:
+            if profile is not None:
+                if profile.trace:
+                    profile.content_types(ic.content for ic in self.content)
+                profile.checkpoint('included')
+            with templates.immutable_templates() if immutable_templates else nullcontext():
+                self._generate(out, shard=shard, stages=stages, workers=workers, profile=profile)
+            if recorded is not None and manifest is not None:
+                self.info(f"MANIFEST: {abspath(manifest)}")
+                recorded.save(manifest)
+            if profile is not None:
+                profile.checkpoint('completed')
+        finally:
+            if profile is not None:
+                profile.stop()
+        if profile is not None and not isinstance(profile_memory, MemoryProfile):
+            location = profile_memory if not isinstance(profile_memory, bool) else 'memory-profile.json'
+            for line in profile.summary():
+                self.info(f"MEMORY {line}")
+            self.info(f"MEMORY PROFILE: {abspath(location)}")
+            profile.save(location)
         self.info(f"COMPLETED GENERATION")
 
-    def _generate(self, out: Path):
+    def _generate(
+            self,
+            out: Path,
+            *,
+            shard: Optional[Shard] = None,
+            stages: Sequence[OutputStage] = (),
+            workers: Optional[int] = None,
+            profile: Optional[MemoryProfile] = None,
+    ):
         ctx = self.create_ctx(out)
-        tasks = defaultdict(list)  # type: Dict[str, List[GenTask]]
+        written = WrittenFiles() if shard is not None else None
+        ctx.stages = tuple(stages) if written is None else (*stages, written)
+        try:
+            self._write(ctx, shard=shard, workers=workers, profile=profile)
+        finally:
+            ctx.close()
+
+        if self.assets.fingerprint:
+            self.assets.save(ctx.path('assets.json'))
+        if shard is not None and written is not None:
+            planned = [self.assets.resolve(str(task.path)) for task in ctx.tasks]
+            shard.record(out, planned=planned, written=written.paths)
+
+    def _write(
+            self,
+            ctx: GenContext,
+            *,
+            shard: Optional[Shard] = None,
+            workers: Optional[int] = None,
+            profile: Optional[MemoryProfile] = None,
+    ) -> List[List[GenTask]]:
+        """Plan the tasks and write them in phases. Returns the written phases."""
         all_tasks = list()  # type: List[GenTask]
         for ic in self.content:
-            _tasks = ic.make_tasks(ctx)
-            for task in _tasks:
-                tasks[task.cwd].append(task)
-            all_tasks.extend(_tasks)
+            all_tasks.extend(ic.make_tasks(ctx))
         ctx.tasks = tuple(all_tasks)  # injecting tasks, for other content to have access to site structure
+        extra = [GenTask(path, ctx, content, task.cwd)
+                 for task in ctx.tasks for path, content in task.content.extra_files(task.path, ctx)]
+        if extra:
+            all_tasks.extend(extra)
+            ctx.tasks = tuple(all_tasks)
+        if profile is not None:
+            profile.checkpoint('planned')
+
+        phases = [all_tasks]  # type: List[List[GenTask]]
+        if self.assets.fingerprint:  # pages can link to assets once their fingerprinted locations are known
+            phases = [[t for t in all_tasks if t.content.asset], [t for t in all_tasks if not t.content.asset]]
+        if shard is not None:  # every shard writes all of the fingerprinted assets
+            phases[-1] = shard.select(phases[-1])
+            self.info(f"SHARD {shard}: {sum(map(len, phases))} of {len(all_tasks)} tasks")
 
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
-        executor = ThreadPoolExecutor()
+        executor = ThreadPoolExecutor(max_workers=workers) if workers != 0 else None
 
         async def scheduled(task):
+            if executor is None:
+                return task.execute()
             return await loop.run_in_executor(executor, task.execute)
 
-        for cwd, _tasks in tasks.items():
-            with directory(cwd):
-                writes = map(scheduled, _tasks)
-                loop.run_until_complete(gather(*writes))
-        loop.close()
+        try:
+            for phase in phases:
+                tasks = defaultdict(list)  # type: Dict[str, List[GenTask]]
+                for task in phase:
+                    tasks[task.cwd].append(task)
+                for cwd, _tasks in tasks.items():
+                    with directory(cwd):
+                        writes = map(scheduled, _tasks)
+                        loop.run_until_complete(gather(*writes))
+                self.assets.write_stylesheets()  # once the assets they reference are written
+                if profile is not None:
+                    profile.checkpoint('written')
+        finally:
+            if executor is not None:
+                executor.shutdown()  # lets the writes in flight finish before the loop is closed
+            loop.close()
+        return phases
 
     def create_ctx(self, out: Path) -> GenContext:
         """Override for custom context types."""
@@ -180,9 +321,11 @@ class Site:
         url = site / 'resource/images/photo-1.jpeg'
         print(url) # https://example.org/resource/images/photo-1.jpeg
         ```
+
+        Locations of fingerprinted assets resolve to their fingerprinted URLs.
         """
         # TODO:mdrachuk:04.06.2020: replace with <SiteUrl> which can be added a / further and checks file existence
-        return urljoin(self.url, location)
+        return urljoin(self.url, self.assets.resolve(location))
 
     # ------------ LOGGER ------------
     def info(self, text):
@@ -8,21 +8,78 @@ This is a safer approach in contrast to Jinja defaults.
 
 [`template`] is a shortcut for loading templates using this environment.
 
+Template modification times are checked through a shared [`template_mtimes`] cache.
+By default every check stats the file.
+Within [`immutable_templates()`] (used by `Site.generate(..., immutable_templates=True)`)
+templates are treated as unchanging: every template file is stat-ed once per build and auto reload is disabled.
+
 [1]: https://jinja.palletsprojects.com/en/2.11.x/api/#undefined-types
 """
-__all__ = ['template', 'jinja_env']
+__all__ = ['template', 'jinja_env', 'immutable_templates', 'template_mtimes']
 
 from collections import defaultdict
+from contextlib import contextmanager
 from os import getcwd, path, walk
 from pathlib import Path
-from typing import Union, Dict
+from threading import Lock
+from typing import Union, Dict, Optional
 
 from jinja2 import Environment, Template, StrictUndefined, BaseLoader, TemplateNotFound
 from jinja2.loaders import split_template_path
 from jinja2.utils import LRUCache, open_if_exists
 
 
+class MtimeCache:
+    """Modification times of template files shared by all of the [CwdLoader] `uptodate` checks.
+
+    A file is stat-ed on every check. While [frozen][MtimeCache.freeze] it is stat-ed only once, until thawed.
+    """
+    frozen: bool
+    _entries: Dict[str, Optional[float]]  # filename -> mtime
+
+    def __init__(self):
+        self.frozen = False
+        self._entries = {}
+        self._lock = Lock()
+
+    def getmtime(self, filename: str) -> Optional[float]:
+        """Modification time of the file or `None` if it cannot be accessed."""
+        if self.frozen and filename in self._entries:
+            return self._entries[filename]
+        try:
+            mtime: Optional[float] = path.getmtime(filename)
+        except OSError:
+            mtime = None
+        if self.frozen:
+            with self._lock:
+                self._entries[filename] = mtime
+        return mtime
+
+    def freeze(self):
+        """Stat every file only once, until thawed."""
+        with self._lock:
+            self._entries.clear()
+            self.frozen = True
+
+    def thaw(self):
+        """Forget the recorded times and stat on every check again."""
+        with self._lock:
+            self._entries.clear()
+            self.frozen = False
+
+
+template_mtimes = MtimeCache()
+
+
 class CwdLoader(BaseLoader):
+    """Loads templates relative to the current working directory.
+
+    Template freshness is checked against the shared [`template_mtimes`] cache.
+    """
+    mtimes: MtimeCache
+
+    def __init__(self, mtimes: MtimeCache):
+        self.mtimes = mtimes
 
     def get_source(self, environment, template):
         pieces = split_template_path(template)
@@ -36,13 +93,11 @@ class CwdLoader(BaseLoader):
         finally:
             f.close()
 
-        mtime = path.getmtime(filename)
+        mtime = self.mtimes.getmtime(filename)
+        mtimes = self.mtimes
 
         def uptodate():
-            try:
-                return path.getmtime(filename) == mtime
-            except OSError:
-                return False
+            return mtime is not None and mtimes.getmtime(filename) == mtime
 
         return contents, filename, uptodate
 
@@ -65,7 +120,7 @@ class CwdLoader(BaseLoader):
 
 
 jinja_env = Environment(
-    loader=CwdLoader(),
+    loader=CwdLoader(template_mtimes),
     cache_size=0,  # does not affect anything, cache set below
     lstrip_blocks=True,
     trim_blocks=True,
@@ -153,6 +208,40 @@ class LruCachePerCwd:
 jinja_env.cache = LruCachePerCwd(250)  # type: ignore
 
 
+@contextmanager
+def immutable_templates():
+    """Treat templates as unchanging for the duration of the block.
+
+    Templates cached by earlier generations are checked once on entering;
+    afterwards [`jinja_env`] does not auto reload and every template file is stat-ed only once.
+
+    ```python
+    with immutable_templates():
+        site.generate('out')
+    ```
+    """
+    auto_reload = jinja_env.auto_reload
+    template_mtimes.freeze()
+    _evict_outdated(jinja_env.cache)  # type: ignore
+    jinja_env.auto_reload = False
+    try:
+        yield
+    finally:
+        jinja_env.auto_reload = auto_reload
+        template_mtimes.thaw()
+
+
+def _evict_outdated(cache: LruCachePerCwd):
+    for lru in cache.by_cwd.values():
+        for key, cached in lru.items():
+            if not cached.is_up_to_date:
+                try:
+                    del lru[key]
+                except KeyError:
+                    pass
+
+
 def template(location: Union[str, Path]) -> Template:
     """A shorthand for loading a Jinja2 template from the current working directory."""
     return jinja_env.get_template(str(location))
+
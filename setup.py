@@ -42,6 +42,10 @@ setup(
         'mistune==0.8.4',
         'watchgod==0.8.2',
     ],
+    extras_require={
+        'brotli': ['Brotli>=1.0.9'],
+        'images': ['Pillow>=9.1'],
+    },
     classifiers=[
         "Intended Audience :: Developers",
         "Topic :: Utilities",
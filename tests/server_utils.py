@@ -2,10 +2,23 @@ import asyncio
 from urllib.parse import urlsplit
 
 
+async def connect(hostname, port, *, timeout: float = 1):
+    """Open a connection, retrying while the server is still starting."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        try:
+            return await asyncio.open_connection(hostname, port)
+        except ConnectionRefusedError:
+            if loop.time() > deadline:
+                raise
+            await asyncio.sleep(0.01)
+
+
 async def get(url_str: str) -> str:
     await asyncio.sleep(0.01)
     url = urlsplit(url_str)
-    reader, writer = await asyncio.open_connection(url.hostname, url.port)
+    reader, writer = await connect(url.hostname, url.port)
 
     writer.write((f"GET {url.path or '/'} HTTP/1.0\r\n"
                   f"Host: {url.hostname}\r\n"
@@ -15,3 +28,31 @@ async def get(url_str: str) -> str:
     writer.close()
     await writer.wait_closed()
     return response.decode('utf8')
+
+
+async def get_bytes(url_str: str) -> bytes:
+    """The raw response: the status line, headers and body."""
+    await asyncio.sleep(0.01)
+    url = urlsplit(url_str)
+    reader, writer = await connect(url.hostname, url.port)
+    writer.write(f"GET {url.path or '/'} HTTP/1.0\r\nHost: {url.hostname}\r\n\r\n".encode('utf8'))
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return response
+
+
+async def read_response(reader: asyncio.StreamReader, *, head: bool = False):
+    """Read a single response with Content-Length from a persistent connection: status line, headers and body.
+
+    A response to `HEAD` has no body."""
+    status = (await reader.readline()).decode('latin-1').strip()
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1')
+        if line == '\r\n':
+            break
+        k, v = line.split(':', 1)
+        headers[k.lower()] = v.strip()
+    body = b'' if head else await reader.readexactly(int(headers['content-length']))
+    return status, headers, body
@@ -0,0 +1,157 @@
+import json
+from pathlib import Path
+from shutil import copytree
+
+from lightweight import Site, jinja, markdown, sass, template
+from lightweight.assets import Assets, _fingerprinted_name
+from lightweight.generation import Shard
+from lightweight.generation.shard import merge_shards
+
+
+def test_fingerprinted_names(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('css/style.css', sass('resources/assets/style.scss'))
+    site.add('img', 'resources/assets/img')
+    site.add('robots.txt', 'resources/assets/robots.txt')
+    site.add('favicon.ico', 'resources/assets/img/photo.jpg')
+    site.add('index.html', jinja('templates/assets/index.html'))
+    site.generate(out, fingerprint=True)
+
+    locations = json.loads((out / 'assets.json').read_text())
+    assert set(locations) == {'css/style.css', 'img/photo.jpg'}
+    for logical, fingerprinted in locations.items():
+        assert not (out / logical).exists()
+        assert (out / fingerprinted).exists()
+    assert locations['img/photo.jpg'].startswith('img/photo.')
+    assert (out / 'css' / 'style.css.map').exists()
+    assert (out / 'index.html').exists()
+
+
+def test_well_known_files_are_not_fingerprinted(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('robots.txt', 'resources/assets/robots.txt')
+    site.add('favicon.ico', 'resources/assets/img/photo.jpg')
+    site.add('about.html', 'resources/assets/robots.txt')
+    site.generate(out, fingerprint=True)
+
+    for location in ['robots.txt', 'favicon.ico', 'about.html']:
+        assert (out / location).exists()
+        assert location not in site.assets.locations
+
+
+def test_fingerprint_exclude(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('css/style.css', sass('resources/assets/style.scss'))
+    site.add('img', 'resources/assets/img')
+    site.add('robots.txt', 'resources/assets/robots.txt')
+    site.generate(out, fingerprint=True, fingerprint_exclude=['img/*'])
+
+    assert (out / 'img' / 'photo.jpg').exists()
+    assert set(site.assets.locations) == {'css/style.css', 'robots.txt'}
+
+
+def test_urls_resolve_to_fingerprints(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('css/style.css', sass('resources/assets/style.scss'))
+    site.add('img', 'resources/assets/img')
+    site.add('index.html', jinja('templates/assets/index.html'))
+    site.add('post.html', markdown('resources/assets/post.md', template('templates/md/body.html')))
+    site.generate(out, fingerprint=True)
+
+    css = site.assets.locations['css/style.css']
+    photo = site.assets.locations['img/photo.jpg']
+    assert (out / 'index.html').read_text() == f'https://example.org/{css} https://example.org/{photo}'
+    post = (out / 'post.html').read_text()
+    assert f'src="https://example.org/{photo}"' in post
+    assert f'href="https://example.org/{css}"' in post
+
+
+def test_stylesheet_urls_resolve_to_fingerprints(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('css/hero.css', sass('resources/assets/hero.scss'))
+    site.add('css/site.css', 'resources/assets/css/site.css')
+    site.add('css/print.css', 'resources/assets/css/print.css')
+    site.add('img', 'resources/assets/img')
+    site.generate(out, fingerprint=True)
+
+    photo = Path(site.assets.locations['img/photo.jpg']).name
+    print_css = Path(site.assets.locations['css/print.css']).name
+    assert f'url("../img/{photo}")' in (out / site.assets.locations['css/hero.css']).read_text()
+    print_rules = f'.print {{ background: url("../img/{photo}"); }}\n'
+    assert (out / site.assets.locations['css/print.css']).read_text() == print_rules
+    assert (out / site.assets.locations['css/site.css']).read_text() == (
+        f'@import url({print_css});\n'
+        f'.hero {{ background: url(../img/{photo}) no-repeat; }}\n'
+        f'.logo {{ background: url("/img/{photo}?v=1#logo"); }}\n'
+        '.icon { background: url(data:image/gif;base64,R0lGODlhAQABAAAAACw=); }\n'
+        '.font { src: url(https://example.com/font.woff2); }\n'
+        '.missing { background: url(../img/missing.png); }\n'
+    )
+
+
+def test_copied_stylesheet_urls_resolve_to_fingerprints(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('static', 'resources/assets')
+    site.generate(out, fingerprint=True)
+
+    photo = Path(site.assets.locations['static/img/photo.jpg']).name
+    css = (out / site.assets.locations['static/css/print.css']).read_text()
+    assert css == f'.print {{ background: url("../img/{photo}"); }}\n'
+
+
+def test_fingerprint_is_content_hash(tmp_path: Path):
+    copytree('resources/assets', tmp_path / 'src')
+    site = Site(url='https://example.org/')
+    site.add('css/style.css', sass(str(tmp_path / 'src' / 'style.scss')))
+    site.add('img', str(tmp_path / 'src' / 'img'))
+    site.generate(tmp_path / 'out', fingerprint=True)
+    first = dict(site.assets.locations)
+
+    (tmp_path / 'src' / 'img' / 'photo.jpg').write_bytes(b'another photo')
+    site.generate(tmp_path / 'out', fingerprint=True)
+
+    assert site.assets.locations['css/style.css'] == first['css/style.css']
+    assert site.assets.locations['img/photo.jpg'] != first['img/photo.jpg']
+
+
+def test_disabled_by_default(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('css/style.css', sass('resources/assets/style.scss'))
+    site.add('img', 'resources/assets/img')
+    site.generate(out)
+
+    assert (out / 'css' / 'style.css').exists()
+    assert (out / 'img' / 'photo.jpg').exists()
+    assert not (out / 'assets.json').exists()
+
+
+def test_names():
+    assets = Assets(fingerprint=True)
+    assert assets.resolve('/missing.css') == '/missing.css'
+    assets.locations['a.css'] = 'a.123.css'
+    assert assets.resolve('/a.css') == '/a.123.css'
+    assert _fingerprinted_name('jquery.min.js', 'abc') == 'jquery.min.abc.js'
+    assert _fingerprinted_name('LICENSE', 'abc') == 'LICENSE.abc'
+    assert _fingerprinted_name('.htaccess', 'abc') == '.htaccess.abc'
+
+
+def test_sharded_fingerprints(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    site.add('css/style.css', sass('resources/assets/style.scss'))
+    site.add('img', 'resources/assets/img')
+    site.add('index.html', jinja('templates/assets/index.html'))
+    shards = [tmp_path / f'out-{i}' for i in range(2)]
+    for i, shard_out in enumerate(shards):
+        site.generate(shard_out, fingerprint=True, shard=Shard(i, 2))
+    merge_shards(tmp_path / 'out', shards)
+
+    css = site.assets.locations['css/style.css']
+    assert (tmp_path / 'out' / css).exists()
+    assert css in (tmp_path / 'out' / 'index.html').read_text()
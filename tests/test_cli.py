@@ -1,7 +1,9 @@
 import asyncio
+import json
 import shlex
 import subprocess
 import sys
+import threading
 import time
 from os import getcwd
 from pathlib import Path
@@ -11,7 +13,8 @@ from pytest import fixture
 
 from lightweight import directory, __version__, lw, Site, SiteCli, jinja
 from lightweight.errors import InvalidCommand
-from lightweight.lw import FailedGeneration, start_server
+from lightweight.lw import CancelledGeneration, FailedGeneration, Generator, start_server
+from lightweight.templates import template_mtimes
 from tests.server_utils import get
 
 
@@ -68,7 +71,7 @@ class TestTheCli:
         time.sleep(1)
         response = asyncio.run(get(f'http://localhost:{unused_tcp_port}'))
 
-        assert 'HTTP/1.0 200' in response
+        assert 'HTTP/1.1 200' in response
         assert '<!DOCTYPE html>' in response
         assert 'my-project' in response
         assert 'liveReload.start();' not in response
@@ -86,7 +89,7 @@ class TestTheCli:
         time.sleep(1)
         response = asyncio.run(get(f'http://localhost:{unused_tcp_port}'))
 
-        assert 'HTTP/1.0 200' in response
+        assert 'HTTP/1.1 200' in response
         assert 'liveReload.start();' in response
 
         p.kill()
@@ -111,12 +114,13 @@ class TestTheCli:
         assert mock.run_count == 1
         assert mock.last_args[0] == Path(__file__)
         assert mock.last_args[1] == 'build_func'
-        assert len(mock.last_kwargs) == 5
+        assert len(mock.last_kwargs) == 6
         assert mock.last_kwargs['source'] == Path(__file__).parent
         assert mock.last_kwargs['out'] == Path(getcwd()) / 'out'
         assert mock.last_kwargs['host'] == 'localhost'
         assert mock.last_kwargs['port'] == 8080
         assert mock.last_kwargs['enable_reload'] is True
+        assert mock.last_kwargs['debounce'] == 0.1
 
     def test_site_cli_custom_serve(self, mock_start_server):
         mock = mock_start_server
@@ -125,16 +129,18 @@ class TestTheCli:
                      "--out stout "
                      "--host 0.0.0.0 "
                      "--port 1212 "
-                     "--no-live-reload")
+                     "--no-live-reload "
+                     "--debounce 0.5")
         assert mock.run_count == 1
         assert mock.last_args[0] == Path(__file__)
         assert mock.last_args[1] == 'build_func'
-        assert len(mock.last_kwargs) == 5
+        assert len(mock.last_kwargs) == 6
         assert mock.last_kwargs['source'] == Path('this')
         assert mock.last_kwargs['out'] == Path('stout')
         assert mock.last_kwargs['host'] == '0.0.0.0'
         assert mock.last_kwargs['port'] == 1212
         assert mock.last_kwargs['enable_reload'] is False
+        assert mock.last_kwargs['debounce'] == 0.5
 
     def test_exit_on_failed_generation(self, mock_start_server):
         def raise_failed(*args, **kwargs):
@@ -225,6 +231,29 @@ class TestTheCli:
             result = tmp_path / 'out' / 'index'
             assert result.read_text() == "http://0.0.0.0:69/"
 
+    def test_build_shard(self, mock_start_server, tmp_path: Path):
+        with directory(tmp_path):
+            index = tmp_path / 'index'
+            index.write_text('{{ site }}')
+            run_site_cli("test_cli.py build --shard 0/1", build=build_jinja_file)
+            assert (tmp_path / 'out' / 'index').exists()
+            assert (tmp_path / 'out' / '.lw-shard.json').exists()
+            run_lw("lw merge merged out")
+            assert (tmp_path / 'merged' / 'index').read_text() == "http://localhost:8080/"
+
+    def test_build_profile_memory(self, mock_start_server, tmp_path: Path):
+        with directory(tmp_path):
+            index = tmp_path / 'index'
+            index.write_text('{{ site }}')
+            run_site_cli("test_cli.py build --profile-memory", build=build_jinja_file)
+            report = json.loads((tmp_path / 'memory-profile.json').read_text())
+            assert report['checkpoints'][0]['name'] == 'included'
+            assert report['checkpoints'][0]['content']['JinjaPage'] > 0
+
+    def test_build_error_with_invalid_shard(self, mock_start_server):
+        with pytest.raises(InvalidCommand):
+            run_site_cli("test_cli.py build --shard 1/1")
+
     def test_build_error_with_url_and_host(self, mock_start_server):
         with pytest.raises(InvalidCommand):
             run_site_cli("test_cli.py build --host 0.0.0.0 --url http://example.org/")
@@ -243,10 +272,99 @@ class TestTheCli:
             start_server(Path(__file__), 'build_func', source=tmp_path, out=tmp_path / 'out', host='localhost',
                          port=8080, enable_reload=False, loop=loop)
 
+    def test_generation_with_immutable_templates(self, tmp_path):
+        (tmp_path / 'recording_site.py').write_text(
+            'from pathlib import Path\n\n'
+            'from lightweight.templates import template_mtimes\n\n\n'
+            'class Recording:\n'
+            '    def generate(self, out):\n'
+            '        Path(out).mkdir()\n'
+            '        (Path(out) / "frozen").write_text(str(template_mtimes.frozen))\n\n\n'
+            'def build(url):\n'
+            '    return Recording()\n'
+        )
+        generator = Generator(tmp_path / 'recording_site.py', 'build', source=tmp_path, out=tmp_path / 'out',
+                              host='localhost', port=8080)
+        generator(tmp_path / 'out')
+        assert (tmp_path / 'out' / 'frozen').read_text() == 'True'
+        assert not template_mtimes.frozen
+
+    def test_cancel_generation(self, tmp_path):
+        (tmp_path / 'slow_site.py').write_text('import time\n\n\ndef build(url):\n    time.sleep(30)\n')
+        generator = Generator(tmp_path / 'slow_site.py', 'build', source=tmp_path, out=tmp_path / 'out',
+                              host='localhost', port=8080)
+        cancel = threading.Timer(0.5, generator.cancel)
+        cancel.start()
+        start = time.monotonic()
+        with pytest.raises(CancelledGeneration):
+            generator.generate()
+        assert time.monotonic() - start < 10
+        generator.cancel()  # nothing in progress
+
+    @pytest.mark.skipif(not Path('/proc').is_dir(), reason='Inspects the processes in /proc.')
+    def test_cancel_kills_workers(self, tmp_path):
+        (tmp_path / 'pool_site.py').write_text(
+            'import subprocess\n'
+            'import sys\n'
+            'import time\n'
+            'from pathlib import Path\n\n\n'
+            'class Pooled:\n'
+            '    def generate(self, out):\n'
+            '        Path(out).mkdir()\n'
+            '        (Path(out) / "partial.html").write_text("<p>")\n'
+            '        worker = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])\n'
+            f'        Path({str(tmp_path / "worker")!r}).write_text(str(worker.pid))\n'
+            '        time.sleep(30)\n\n\n'
+            'def build(url):\n'
+            '    return Pooled()\n'
+        )
+        (tmp_path / 'out').mkdir()
+        (tmp_path / 'out' / 'index.html').write_text('<p>Served</p>')
+        generator = Generator(tmp_path / 'pool_site.py', 'build', source=tmp_path, out=tmp_path / 'out',
+                              host='localhost', port=8080)
+        cancel = threading.Timer(1, generator.cancel)
+        cancel.start()
+        with pytest.raises(CancelledGeneration):
+            generator.generate()
+        worker = int((tmp_path / 'worker').read_text())
+        deadline = time.monotonic() + 5
+        while _running(worker) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert not _running(worker)
+        assert [p.name for p in (tmp_path / 'out').iterdir()] == ['index.html']
+        assert not generator.staging.exists()
+
+    def test_generation_swaps_output(self, tmp_path):
+        (tmp_path / 'fresh_site.py').write_text(
+            'from pathlib import Path\n\n\n'
+            'class Fresh:\n'
+            '    def generate(self, out):\n'
+            '        Path(out).mkdir()\n'
+            '        (Path(out) / "index.html").write_text("<p>Fresh</p>")\n\n\n'
+            'def build(url):\n'
+            '    return Fresh()\n'
+        )
+        (tmp_path / 'out').mkdir()
+        (tmp_path / 'out' / 'stale.html').write_text('<p>Stale</p>')
+        generator = Generator(tmp_path / 'fresh_site.py', 'build', source=tmp_path, out=tmp_path / 'out',
+                              host='localhost', port=8080)
+        generator.generate()
+        assert [p.name for p in (tmp_path / 'out').iterdir()] == ['index.html']
+        assert not generator.staging.exists()
+        assert not generator.previous.exists()
+
+
+def _running(pid: int) -> bool:
+    try:
+        stat = Path(f'/proc/{pid}/stat').read_text()
+    except FileNotFoundError:
+        return False
+    return stat.rsplit(')', 1)[1].split()[0] != 'Z'  # not a zombie
+
 
 def assert_help_in_out(capsys):
     captured = capsys.readouterr()
-    assert 'usage: lw [-h] {init,version}' in captured.out
+    assert 'usage: lw [-h] {init,version,merge,diff}' in captured.out
     assert captured.err == ''
 
 
@@ -0,0 +1,59 @@
+import gzip
+from pathlib import Path
+
+import pytest
+
+from lightweight import Site
+from lightweight.compression import Compression
+from lightweight.manifest import Manifest
+
+
+def test_gzip_siblings(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('big.html', 'resources/compression/big.html')
+    site.add('small.html', 'resources/compression/small.html')
+    site.add('image.png', 'resources/compression/image.png')
+    site.generate(out, compress=['gzip'], manifest=tmp_path / 'manifest.json')
+
+    assert gzip.decompress((out / 'big.html.gz').read_bytes()) == (out / 'big.html').read_bytes()
+    assert not (out / 'small.html.gz').exists()  # below the size threshold
+    assert not (out / 'image.png.gz').exists()  # not a text file
+    assert 'big.html.gz' in Manifest.load(tmp_path / 'manifest.json').entries
+
+
+def test_skips_larger_results(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('random.js', 'resources/compression/random.js')  # random bytes do not compress
+    site.generate(out, compress=['gzip'])
+
+    assert (out / 'random.js').exists()
+    assert not (out / 'random.js.gz').exists()
+
+
+def test_reproducible(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('big.html', 'resources/compression/big.html')
+    site.generate(out, compress=['gzip'])
+    first = (out / 'big.html.gz').read_bytes()
+    site.generate(out, compress=['gzip'])
+
+    assert (out / 'big.html.gz').read_bytes() == first
+
+
+def test_brotli_siblings(tmp_path: Path):
+    brotli = pytest.importorskip('brotli')
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('big.html', 'resources/compression/big.html')
+    site.generate(out, compress=['gzip', 'br'])
+
+    assert brotli.decompress((out / 'big.html.br').read_bytes()) == (out / 'big.html').read_bytes()
+    assert (out / 'big.html.gz').exists()
+
+
+def test_unknown_encoding():
+    with pytest.raises(ValueError):
+        Compression(['zip'])
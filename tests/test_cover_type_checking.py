@@ -8,20 +8,33 @@ Only covered after reloading module with TYPE_CHECKING = True.
 from importlib import reload
 from multiprocessing.context import Process
 
+import lightweight.assets
 import lightweight.cli
+import lightweight.compression
 import lightweight.content.content_abc
 import lightweight.content.copies
+import lightweight.content.feeds
+import lightweight.content.images
 import lightweight.content.jinja_page
 import lightweight.content.lwmd
 import lightweight.content.md_page
+import lightweight.content.pagination
 import lightweight.content.sass_scss
+import lightweight.content.search
+import lightweight.content.taxonomy
+import lightweight.content.sitemap
 import lightweight.errors
 import lightweight.files
 import lightweight.generation.context
 import lightweight.generation.path
+import lightweight.generation.shard
+import lightweight.generation.stage
 import lightweight.generation.task
 import lightweight.included
 import lightweight.lw
+import lightweight.manifest
+import lightweight.minify
+import lightweight.profiling
 import lightweight.server
 import lightweight.site
 import lightweight.templates
@@ -33,20 +46,33 @@ def cover_type_checking():
 
     reload(lightweight.content.content_abc)
     reload(lightweight.content.copies)
+    reload(lightweight.content.feeds)
+    reload(lightweight.content.images)
     reload(lightweight.content.jinja_page)
     reload(lightweight.content.lwmd)
     reload(lightweight.content.md_page)
+    reload(lightweight.content.pagination)
     reload(lightweight.content.sass_scss)
+    reload(lightweight.content.search)
+    reload(lightweight.content.taxonomy)
+    reload(lightweight.content.sitemap)
 
     reload(lightweight.generation.context)
     reload(lightweight.generation.path)
+    reload(lightweight.generation.shard)
+    reload(lightweight.generation.stage)
     reload(lightweight.generation.task)
 
+    reload(lightweight.assets)
     reload(lightweight.cli)
+    reload(lightweight.compression)
     reload(lightweight.errors)
     reload(lightweight.files)
     reload(lightweight.included)
     reload(lightweight.lw)
+    reload(lightweight.manifest)
+    reload(lightweight.minify)
+    reload(lightweight.profiling)
     reload(lightweight.server)
     reload(lightweight.site)
     reload(lightweight.template)
@@ -0,0 +1,83 @@
+from pathlib import Path
+from xml.etree import ElementTree
+
+from lightweight import Site, rss, atom, markdown, template
+from lightweight.content.md_page import MarkdownPage
+
+ATOM = {'a': 'http://www.w3.org/2005/Atom'}
+
+
+def test_rss_latest_created(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/', title='Example')
+    for i in range(5):
+        site.add(f'posts/{i}.html', markdown(f'resources/feeds/{i}.md', template('templates/md/body.html')))
+    site.add('draft.html', markdown('resources/feeds/draft.md', template('templates/md/body.html')))
+    site.add('rss.xml', rss(limit=3, include=lambda task: task.path.parts[0] == 'posts'))
+    site.generate(out)
+    channel = ElementTree.parse(out / 'rss.xml').getroot().find('channel')
+    assert channel.findtext('title') == 'Example'
+    items = channel.findall('item')
+    assert [item.findtext('title') for item in items] == ['Post 4', 'Post 3', 'Post 2']
+    assert items[0].findtext('link') == 'https://example.org/posts/4'
+    assert items[0].findtext('pubDate') == 'Tue, 14 Jan 2020 10:00:00 +0000'
+    assert 'Body &amp; more' in items[0].findtext('description')
+
+
+def test_atom_latest_updated(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/', title='Example')
+    for i in range(5):
+        site.add(f'posts/{i}.html', markdown(f'resources/feeds/{i}.md', template('templates/md/body.html')))
+    site.add('draft.html', markdown('resources/feeds/draft.md', template('templates/md/body.html')))
+    site.add('atom.xml', atom(title='Posts', limit=2, preview=True))
+    site.generate(out)
+    feed = ElementTree.parse(out / 'atom.xml').getroot()
+    assert feed.findtext('a:title', namespaces=ATOM) == 'Posts'
+    assert feed.findtext('a:updated', namespaces=ATOM) == '2020-03-20T10:00:00+00:00'
+    entries = feed.findall('a:entry', ATOM)
+    assert [e.findtext('a:title', namespaces=ATOM) for e in entries] == ['Post 0', 'Post 1']
+    content = entries[0].findtext('a:content', namespaces=ATOM)
+    assert 'Intro 0' in content and 'Body' not in content
+
+
+def test_markdown_rendered_once(tmp_path: Path, monkeypatch):
+    site = Site(url='https://example.org/', title='Example')
+    for i in range(5):
+        site.add(f'posts/{i}.html', markdown(f'resources/feeds/{i}.md', template('templates/md/body.html')))
+    site.add('draft.html', markdown('resources/feeds/draft.md', template('templates/md/body.html')))
+    rendered = []
+    original = MarkdownPage._render
+
+    def render(self, ctx):
+        rendered.append(self.source_path)
+        return original(self, ctx)
+
+    monkeypatch.setattr(MarkdownPage, '_render', render)
+    site.add('rss.xml', rss())
+    site.add('atom.xml', atom())
+    site.generate(tmp_path / 'out')
+    sources = ['draft.md', *(f'{i}.md' for i in range(5))]
+    assert sorted(map(str, rendered)) == sorted(f'resources/feeds/{source}' for source in sources)
+
+
+def test_rendered_markdown_is_released(tmp_path: Path, monkeypatch):
+    site = Site(url='https://example.org/', title='Example')
+    for i in range(5):
+        site.add(f'posts/{i}.html', markdown(f'resources/feeds/{i}.md', template('templates/md/body.html')))
+    site.add('draft.html', markdown('resources/feeds/draft.md', template('templates/md/body.html')))
+    contexts = []
+    create_ctx = site.create_ctx
+
+    def record_ctx(out):
+        contexts.append(create_ctx(out))
+        return contexts[-1]
+
+    monkeypatch.setattr(site, 'create_ctx', record_ctx)
+    site.add('rss.xml', rss(limit=2))
+    site.add('atom.xml', atom(limit=2))
+    site.generate(tmp_path / 'out')
+    renders = contexts[0].cached('markdown-renders', lambda: None)
+    pages = [included.content for included in site.content]
+    assert renders._remaining == {id(pages[i]): 0 for i in (0, 1, 3, 4)}  # read by atom: 0, 1 and rss: 4, 3
+    assert renders._rendered == {}
@@ -75,3 +75,13 @@ def test_slash(tmp_path: Path):
     bad_behaviour = 0
     with pytest.raises(ValueError):
         parent / bad_behaviour
+
+
+def test_create_encodes_str_as_utf8(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr('io.text_encoding', lambda encoding, *args: encoding or 'latin-1')  # a non-UTF-8 locale
+    site = Site('https://example.org/')
+    page = GenPath(Path('page.html'), tmp_path, lambda location: site / location)
+
+    page.create('Ünïcödé ✓')
+
+    assert (tmp_path / 'page.html').read_bytes() == 'Ünïcödé ✓'.encode('utf-8')
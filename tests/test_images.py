@@ -0,0 +1,103 @@
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from lightweight import Site, image, markdown, template
+from lightweight.content.images import image_size
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def test_writes_variants(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('img', image('resources/images/img', widths=(480, 960), cache=tmp_path / 'cache'))
+    site.add('post.html', markdown('resources/images/post.md', template('templates/md/body.html')))
+    site.generate(out)
+
+    assert {p.name for p in (out / 'img').iterdir()} == {
+        'cover.jpg', 'cover-480w.jpg', 'cover-960w.jpg', 'cover-480w.webp', 'cover-960w.webp', 'cover-1200w.webp',
+        'icon.png', 'icon-300w.webp', 'notes.txt',
+    }
+    with Image.open(out / 'img' / 'cover-480w.webp') as variant:
+        assert variant.size == (480, 240)
+        assert variant.format == 'WEBP'
+
+
+def test_reuses_cached_variants(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    site.add('img', image('resources/images/img', widths=(480, 960), cache=tmp_path / 'cache'))
+    site.add('post.html', markdown('resources/images/post.md', template('templates/md/body.html')))
+    site.generate(tmp_path / 'out')
+    cached = {p: p.stat().st_mtime_ns for p in (tmp_path / 'cache').iterdir()}
+    assert len(cached) == 6
+    site.generate(tmp_path / 'out')
+    assert {p: p.stat().st_mtime_ns for p in (tmp_path / 'cache').iterdir()} == cached
+
+
+def test_renders_srcset(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('img', image('resources/images/img', widths=(480, 960), cache=tmp_path / 'cache',
+                          sizes='(max-width: 600px) 100vw, 600px'))
+    site.add('post.html', markdown('resources/images/post.md', template('templates/md/body.html')))
+    site.generate(out)
+
+    with open('expected/images/post.html') as expected:
+        assert (out / 'post.html').read_text() == expected.read()
+
+
+def test_fingerprinted_variants(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('img', image('resources/images/img', widths=(480, 960), cache=tmp_path / 'cache'))
+    site.add('post.html', markdown('resources/images/post.md', template('templates/md/body.html')))
+    site.generate(out, fingerprint=True)
+
+    webp = site.assets.locations['img/cover-480w.webp']
+    assert webp.startswith('img/cover-480w.') and (out / webp).exists()
+    assert f'https://example.org/{webp} 480w' in (out / 'post.html').read_text()
+
+
+def test_exif_orientation(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('img/rotated.jpg', image('resources/images/rotated.jpg', widths=(100,), cache=tmp_path / 'cache'))
+    site.generate(out)
+
+    assert image_size(Path('resources/images/rotated.jpg')) == (200, 400)
+    with Image.open(out / 'img' / 'rotated-100w.jpg') as variant:
+        assert variant.size == (100, 200)
+        assert variant.getpixel((50, 10))[2] > 150  # the blue band stored on the left is displayed on top
+    with Image.open(out / 'img' / 'rotated-200w.webp') as variant:
+        assert variant.size == (200, 400)
+
+
+def test_cost():
+    assert image('resources/images/img/icon.png', widths=(480, 960)).cost() == 4
+    assert image('resources/images/img', widths=(480, 960)).cost() == 8
+
+
+def test_unsupported_format():
+    with pytest.raises(ValueError):
+        image('resources/images/img/icon.png', formats=('gif',))
+
+
+def test_pool_is_shut_down(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    site.add('img', image('resources/images/img', widths=(480, 960), cache=tmp_path / 'cache'))
+    site.add('post.html', markdown('resources/images/post.md', template('templates/md/body.html')))
+    site.generate(tmp_path / 'out')
+
+    assert multiprocessing.active_children() == []
+
+
+def test_source_is_absolute():
+    assert image('resources/images/img/icon.png').source == Path.cwd() / 'resources/images/img/icon.png'
+
+
+def test_avif_support_is_checked(monkeypatch):
+    monkeypatch.setattr('lightweight.content.images._supports', lambda format: False)
+    with pytest.raises(ImportError):
+        image('resources/images/img/icon.png', formats=('avif',))
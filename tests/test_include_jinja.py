@@ -1,11 +1,13 @@
 import asyncio
-from os import chdir, getcwd
+from os import chdir, getcwd, utime
 from pathlib import Path
 
 import pytest
 from jinja2 import TemplateNotFound, UndefinedError
 
+import lightweight.templates
 from lightweight import Site, jinja, Content, directory, GenContext, GenPath, from_ctx, jinja_env
+from lightweight.templates import MtimeCache, template_mtimes
 
 
 def test_render_jinja(tmp_path: Path):
@@ -81,3 +83,75 @@ def test_jinja_env_does_not_allow_undefined():
     asyncio.set_event_loop(loop)
     with pytest.raises(UndefinedError):
         jinja_env.from_string('{{something}}').render()
+
+
+def test_frozen_mtime_cache_stats_once(tmp_path: Path):
+    file = tmp_path / 'template.html'
+    file.write_text('original')
+    mtimes = MtimeCache()
+    mtimes.freeze()
+    mtime = mtimes.getmtime(str(file))
+    file.write_text('changed')
+    utime(file, (mtime + 10, mtime + 10))
+    assert mtimes.getmtime(str(file)) == mtime
+    mtimes.thaw()
+    assert mtimes.getmtime(str(file)) == mtime + 10
+
+
+def test_immutable_templates_reload_between_builds(tmp_path: Path):
+    src = tmp_path / 'src'
+    src.mkdir()
+    (src / 'base.html').write_text('{% block body %}{% endblock %} v1')
+    (src / 'page.html').write_text('{% extends "base.html" %}{% block body %}page{% endblock %}')
+    test_out = tmp_path / 'out'
+
+    def build():
+        with directory(src):
+            site = Site(url='https://example.org/')
+            site.add('page.html', jinja('page.html'))
+            site.generate(test_out, immutable_templates=True)
+        return (test_out / 'page.html').read_text()
+
+    assert build() == 'page v1'
+    mtime = (src / 'base.html').stat().st_mtime
+    (src / 'base.html').write_text('{% block body %}{% endblock %} v2')
+    utime(src / 'base.html', (mtime + 10, mtime + 10))
+    assert build() == 'page v2'
+    assert jinja_env.auto_reload
+    assert not template_mtimes.frozen
+
+
+def test_immutable_templates_stat_once(tmp_path: Path, monkeypatch):
+    (tmp_path / 'base.html').write_text('{% block body %}{% endblock %}')
+    (tmp_path / 'page.html').write_text('{% extends "base.html" %}{% block body %}page{% endblock %}')
+    stats = []
+    getmtime = lightweight.templates.path.getmtime
+    monkeypatch.setattr(lightweight.templates.path, 'getmtime', lambda f: stats.append(f) or getmtime(f))
+
+    with directory(tmp_path):
+        site = Site(url='https://example.org/')
+        for i in range(3):
+            site.add(f'page-{i}.html', jinja('page.html'))
+        for _ in range(2):  # the second build checks the cached templates
+            stats.clear()
+            site.generate(tmp_path / 'out', immutable_templates=True)
+            assert len(stats) == len(set(stats))  # including the templates cached by other tests
+            assert {str(tmp_path / 'base.html'), str(tmp_path / 'page.html')} <= set(stats)
+
+
+def test_templates_reload_between_builds(tmp_path: Path):
+    (tmp_path / 'page.html').write_text('v1')
+    test_out = tmp_path / 'out'
+
+    def build():
+        with directory(tmp_path):
+            site = Site(url='https://example.org/')
+            site.add('page.html', jinja('page.html'))
+            site.generate(test_out)
+        return (test_out / 'page.html').read_text()
+
+    assert build() == 'v1'
+    mtime = (tmp_path / 'page.html').stat().st_mtime
+    (tmp_path / 'page.html').write_text('v2')
+    utime(tmp_path / 'page.html', (mtime + 10, mtime + 10))
+    assert build() == 'v2'  # right away
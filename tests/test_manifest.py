@@ -0,0 +1,72 @@
+from hashlib import sha256
+from pathlib import Path
+
+from lightweight import Site, GenPath, jinja, sass
+from lightweight.manifest import Manifest, diff
+from tests.test_cli import run_lw
+
+
+def generate(tmp_path: Path, title: str) -> Manifest:
+    site = Site(url='https://example.org/')
+    site.add('title.html', jinja('resources/jinja/title.html', title=title))
+    site.add('resources/test.html')
+    site.add('nested', 'resources/test_nested')
+    site.add('css/style.css', sass('resources/scss/style.scss'))
+    manifest = tmp_path / f'{title}.json'
+    site.generate(tmp_path / 'out', manifest=manifest)
+    return Manifest.load(manifest)
+
+
+def test_manifest_matches_output(tmp_path: Path):
+    manifest = generate(tmp_path, 'first')
+    out = tmp_path / 'out'
+    assert set(manifest.entries) == {
+        'title.html',
+        'resources/test.html',
+        'nested/test2/test3/test.html',
+        'css/style.css',
+        'css/style.css.map',
+    }
+    for location, entry in manifest.entries.items():
+        contents = (out / location).read_bytes()
+        assert entry.size == len(contents)
+        assert entry.sha256 == sha256(contents).hexdigest()
+    assert manifest.entries['title.html'].content_type == 'text/html'
+    assert manifest.entries['css/style.css'].content_type == 'text/css'
+
+
+def test_diff(tmp_path: Path):
+    old = generate(tmp_path, 'first')
+    new = generate(tmp_path, 'second')
+    del new.entries['resources/test.html']
+    result = diff(old, new)
+    assert result.added == []
+    assert result.changed == ['title.html']
+    assert result.removed == ['resources/test.html']
+    assert diff(new, old).lines() == ['+ resources/test.html', '~ title.html']
+
+
+def test_diff_cli(tmp_path: Path, capsys):
+    generate(tmp_path, 'first')
+    generate(tmp_path, 'second')
+    run_lw(f'lw diff {tmp_path / "first.json"} {tmp_path / "second.json"}')
+    assert capsys.readouterr().out == '~ title.html\n'
+
+
+def test_copies_are_hashed_from_disk(tmp_path: Path, monkeypatch):
+    binary = tmp_path / 'blob.bin'
+    binary.write_bytes(bytes(range(256)) * 1024)
+
+    def create(self, contents):
+        raise AssertionError(f'{self} was read into memory')
+
+    monkeypatch.setattr(GenPath, 'create', create)
+    site = Site(url='https://example.org/')
+    site.add('blob.bin', str(binary))
+    manifest = tmp_path / 'manifest.json'
+    site.generate(tmp_path / 'out', manifest=manifest, compress=('gzip',))
+
+    entry = Manifest.load(manifest).entries['blob.bin']
+    assert entry.size == 256 * 1024
+    assert entry.sha256 == sha256(binary.read_bytes()).hexdigest()
+    assert entry.content_type == 'application/octet-stream'
@@ -0,0 +1,48 @@
+from pathlib import Path
+
+from lightweight import Site, jinja, markdown, template
+from lightweight.minify import minify_html
+
+
+def test_collapses_whitespace():
+    assert minify_html('  <p>\n    Hello,   world\n</p>\n') == '<p> Hello, world </p>'
+
+
+def test_drops_comments():
+    assert minify_html('<p>a <!-- note --> b</p>') == '<p>a b</p>'
+    assert minify_html('<p>a<!-- note -->b</p>') == '<p>ab</p>'
+
+
+def test_keeps_preview_and_conditional_comments():
+    assert minify_html('<p>a</p>\n<!--preview-->\n<p>b</p>') == '<p>a</p> <!--preview--> <p>b</p>'
+    assert minify_html('<!--[if IE]>  <p>ie</p>  <![endif]-->') == '<!--[if IE]>  <p>ie</p>  <![endif]-->'
+
+
+def test_keeps_preformatted():
+    html = '<pre>\n  a   b\n</pre>\n<textarea> c   d </textarea>\n<script>\n  let e;\n</script>'
+    assert minify_html(html) == html.replace('>\n<', '> <')
+
+
+def test_keeps_tags():
+    assert minify_html('<a  title="1 >  0"\n   href="#">x</a>') == '<a  title="1 >  0"\n   href="#">x</a>'
+
+
+def test_keeps_no_break_spaces():
+    assert minify_html('<p>a\u00a0\u00a0b</p>') == '<p>a\u00a0\u00a0b</p>'
+
+
+def test_minified_generation(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('title.html', jinja('resources/jinja/title.html', title='Minified'))
+    site.add('md.html', markdown('resources/md/plain.md', template('templates/md/plain.html')))
+    site.add('resources/test.html')
+    site.generate(out, minify=True)
+    for location in ['title.html', 'md.html']:
+        html = (out / location).read_text()
+        assert '\n' not in html
+        assert '  ' not in html
+    original = Site(url='https://example.org/')
+    original.add('md.html', markdown('resources/md/plain.md', template('templates/md/plain.html')))
+    original.generate(tmp_path / 'original')
+    assert (out / 'md.html').read_text() == minify_html((tmp_path / 'original' / 'md.html').read_text())
@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import pytest
+
+from lightweight import Site, paginate, sitemap, template
+from lightweight.generation import Shard
+from lightweight.generation.shard import merge_shards
+
+
+def test_pages(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    for i in range(5):
+        site.add(f'posts/{i:02}.html', 'resources/pagination/post.html')
+    site.add('blog/index.html', paginate(
+        template('templates/pagination/listing.html'),
+        select=lambda task: task.path.parts[0] == 'posts',
+        location='blog/page/{n}.html',
+        heading='Posts',
+        per_page=2,
+        sort=lambda task: str(task.path),
+        reverse=True,
+    ))
+    site.generate(out)
+
+    for location in ['blog/index.html', 'blog/page/2.html', 'blog/page/3.html']:
+        with open(f'expected/pagination/{location}') as expected:
+            assert (out / location).read_text() == expected.read()
+    assert not (out / 'blog' / 'page' / '4.html').exists()
+
+
+def test_empty_collection(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('blog/index.html', paginate(
+        template('templates/pagination/listing.html'),
+        select=lambda task: task.path.parts[0] == 'posts',
+        location='blog/page/{n}.html',
+        heading='Posts',
+    ))
+    site.generate(out)
+
+    assert (out / 'blog' / 'index.html').read_text() == '1/1 Posts:'
+    assert not (out / 'blog' / 'page').exists()
+
+
+def test_pages_are_tasks(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    for i in range(5):
+        site.add(f'posts/{i:02}.html', 'resources/pagination/post.html')
+    site.add('blog/index.html', paginate(
+        template('templates/pagination/listing.html'),
+        select=lambda task: task.path.parts[0] == 'posts',
+        location='blog/page/{n}.html',
+        heading='Posts',
+        per_page=2,
+    ))
+    site.add('sitemap.xml', sitemap())
+    shards = [tmp_path / f'out-{i}' for i in range(2)]
+    for i, shard_out in enumerate(shards):
+        site.generate(shard_out, shard=Shard(i, 2))
+    merge_shards(out, shards)
+
+    assert (out / 'blog' / 'page' / '2.html').read_text().startswith('2/3 Posts: posts/02.html posts/03.html')
+    assert (out / 'blog' / 'page' / '3.html').read_text().startswith('3/3 Posts: posts/04.html')
+    sitemap_xml = (out / 'sitemap.xml').read_text()
+    assert '<loc>https://example.org/blog/page/2</loc>' in sitemap_xml
+    assert '<loc>https://example.org/blog/page/3</loc>' in sitemap_xml
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        paginate(None, select=bool, location='blog/page/{n}.html', per_page=0)
+    with pytest.raises(ValueError):
+        paginate(None, select=bool, location='blog/page.html')
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from lightweight import Site, Content, GenContext, GenPath, markdown, template
+from lightweight.profiling import MemoryProfile
+
+
+def test_memory_report(tmp_path: Path):
+    report = tmp_path / 'memory.json'
+    site = Site(url='https://example.org/')
+    for i in range(10):
+        site.add(f'posts/{i}.html', markdown(f'resources/profiling/{i}.md', template('templates/md/body.html')))
+    site.generate(tmp_path / 'out', profile_memory=report)
+
+    checkpoints = json.loads(report.read_text())['checkpoints']
+    assert [c['name'] for c in checkpoints] == ['included', 'planned', 'written', 'completed']
+    written = checkpoints[2]
+    assert written['traced_peak_bytes'] >= written['traced_bytes'] > 0
+    assert written['peak_rss_bytes'] > 0
+    assert 'lightweight.content.md_page' in written['modules']
+    assert written['content']['MarkdownPage'] > 0
+    assert not tracemalloc.is_tracing()
+
+
+def test_phase_times(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    for i in range(10):
+        site.add(f'posts/{i}.html', markdown(f'resources/profiling/{i}.md', template('templates/md/body.html')))
+    profile = MemoryProfile(trace=False)
+    site.generate(tmp_path / 'out', profile_memory=profile)
+
+    assert [c.name for c in profile.checkpoints] == ['included', 'planned', 'written', 'completed']
+    seconds = [c.seconds for c in profile.checkpoints]
+    assert seconds == sorted(seconds) and seconds[-1] > 0
+    assert all(c.traced_bytes == 0 and not c.content for c in profile.checkpoints)
+    assert not tracemalloc.is_tracing()
+    assert not Path('memory-profile.json').exists()  # not saved
+
+
+def test_content_allocated_before_generation(tmp_path: Path):
+    tracemalloc.start(25)
+    try:
+        site = Site(url='https://example.org/')
+        for i in range(10):
+            site.add(f'posts/{i}.html', markdown(f'resources/profiling/{i}.md', template('templates/md/body.html')))
+        site.generate(tmp_path / 'out', profile_memory=tmp_path / 'memory.json')
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    included = json.loads((tmp_path / 'memory.json').read_text())['checkpoints'][0]
+    assert included['content']['MarkdownPage'] > 10 * 2800  # the retained text of the posts
+
+
+class Failing(Content):
+    def write(self, path: GenPath, ctx: GenContext):
+        raise RuntimeError('Failed to write')
+
+
+def test_stopped_on_failure(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    for i in range(10):
+        site.add(f'posts/{i}.html', markdown(f'resources/profiling/{i}.md', template('templates/md/body.html')))
+    site.add('failing.html', Failing())
+    with pytest.raises(RuntimeError):
+        site.generate(tmp_path / 'out', profile_memory=tmp_path / 'memory.json')
+    assert not tracemalloc.is_tracing()
+    assert asyncio.get_event_loop().is_closed()
+
+
+RETAINED = []
+
+
+class Retaining(Content):
+    size = 0
+
+    def write(self, path: GenPath, ctx: GenContext):
+        RETAINED.append(bytearray(self.size))
+        path.create('retained')
+
+
+class RetainingLittle(Retaining):
+    size = 100_000
+
+
+class RetainingMuch(Retaining):
+    size = 1_000_000
+
+
+def test_content_types_of_a_module(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    site.add('little.html', RetainingLittle())
+    site.add('much.html', RetainingMuch())
+    try:
+        site.generate(tmp_path / 'out', profile_memory=tmp_path / 'memory.json')
+    finally:
+        RETAINED.clear()
+    written = json.loads((tmp_path / 'memory.json').read_text())['checkpoints'][2]
+    assert 100_000 <= written['content']['RetainingLittle'] < 1_000_000
+    assert written['content']['RetainingMuch'] >= 1_000_000
@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from lightweight import Site, search_index, markdown, template
+from lightweight.content.search import tokenize, decode_postings
+
+
+def lookup(out: Path, term: str):
+    index = json.loads((out / 'search' / 'index.json').read_text())
+    shard = json.loads((out / 'search' / 'terms' / f'{term[:index["prefix_length"]]}.json').read_text())
+    postings = decode_postings(shard['postings'][shard['terms'].index(term)])
+    return [index['documents'][number]['url'] for number in postings]
+
+
+def test_search_index(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    for name in ['alpha', 'beta', 'gamma', 'delta']:
+        site.add(f'docs/{name}.html', markdown(f'resources/search/{name}.md', template('templates/md/body.html')))
+    site.add('about.html', markdown('resources/search/gamma.md', template('templates/md/body.html')))
+    site.add('search', search_index(include=lambda task: task.path.parts[0] == 'docs'))
+    site.generate(out)
+
+    assert lookup(out, 'generators') == [
+        'https://example.org/docs/alpha', 'https://example.org/docs/beta', 'https://example.org/docs/delta'
+    ]
+    assert lookup(out, 'jinja') == ['https://example.org/docs/gamma']
+    assert lookup(out, 'alpha') == ['https://example.org/docs/alpha']  # titles are indexed
+    with open('expected/search/index.json') as expected:
+        assert (out / 'search' / 'index.json').read_text() == expected.read()
+    index = json.loads((out / 'search' / 'index.json').read_text())
+    assert {p.stem for p in (out / 'search' / 'terms').iterdir()} == set(index['shards'])
+    with open('expected/search/terms/py.json') as expected:
+        assert (out / 'search' / 'terms' / 'py.json').read_text() == expected.read()
+
+
+def test_tokenize():
+    assert tokenize('<p>Fish &amp; <em>Chips</em> a la carte</p>') == {'fish', 'chips', 'la', 'carte'}
+
+
+def test_invalid_prefix():
+    with pytest.raises(ValueError):
+        search_index(prefix_length=0)
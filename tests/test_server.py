@@ -1,12 +1,17 @@
 import asyncio
+import gzip
+import threading
+import time
 from asyncio import gather
 from multiprocessing import Event
 from pathlib import Path
 
 import pytest
 
-from lightweight.server import LIVE_RELOAD_JS, DevServer, LiveReloadServer
-from tests.server_utils import get
+import lightweight.server
+from lightweight.server import LIVE_RELOAD_JS, CachedResponse, DevServer, File, LiveReloadServer, MimeType, \
+    ResponseCache, accepts, if_range, index_files, not_modified, parse_ranges
+from tests.server_utils import get, get_bytes, read_response
 
 
 class TestTheServer:
@@ -77,9 +82,142 @@ class TestTheServer:
         assert await get(f'http://127.0.0.1:{port}/__live_reload_id__')
         with (self.dir_path / 'new-file').open('w') as f:
             f.write('Test file changes')
-        await asyncio.sleep(0.5)  # wait for file change to get picked up
+        await asyncio.sleep(1)  # wait for file change to get picked up and debounced
         assert regenerate.called.is_set()
 
+    @pytest.mark.asyncio
+    async def test_reindex_in_executor(self, event_loop, monkeypatch):
+        threads = []
+        original = lightweight.server.index_files
+
+        def index_files(directory):
+            threads.append(threading.current_thread())
+            return original(directory)
+
+        monkeypatch.setattr(lightweight.server, 'index_files', index_files)
+        server = LiveReloadServer(
+            self.dir_path, watch=self.dir_path, regenerate=lambda: (self.dir_path / 'new.html').write_text('new'),
+            ignored=[],
+        )
+        threads.clear()
+        await server.regenerate_site()
+        assert threads and threading.main_thread() not in threads
+        assert server.index['new'].path == self.dir_path / 'new.html'
+
+    @pytest.mark.asyncio
+    async def test_live_reload_events(self, event_loop, unused_tcp_port):
+        generated = []
+        self.server = LiveReloadServer(
+            self.dir_path, watch=self.dir_path, regenerate=lambda: generated.append(True), ignored=[],
+        )
+        port = unused_tcp_port
+        self.server.serve('127.0.0.1', port, loop=event_loop)
+        await asyncio.sleep(0.1)
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /__live_reload__ HTTP/1.1\r\n\r\n')
+        assert await reader.readline() == b'HTTP/1.1 200 OK\r\n'
+        headers = await reader.readuntil(b'\r\n\r\n')
+        assert b'Content-Type: text/event-stream\r\n' in headers
+        assert await reader.readuntil(b'\n\n') == f'retry: 1000\ndata: {self.server.live_reload_id}\n\n'.encode()
+
+        (self.dir_path / 'new-file').write_text('Test file changes')
+        event = await asyncio.wait_for(reader.readuntil(b'\n\n'), 2)
+        assert generated  # sent once the site is regenerated
+        assert event == f'data: {self.server.live_reload_id}\n\n'.encode()
+        assert len(self.server.listeners) == 1
+
+        writer.close()
+        self.server.heartbeat = 0.1
+        self.server.broadcast('wake up')  # notices the closed connection
+        await asyncio.sleep(0.5)
+        assert not self.server.listeners
+
+    @pytest.mark.asyncio
+    async def test_regenerations_are_coalesced(self, event_loop, unused_tcp_port):
+        started = []
+        finished = []
+
+        def regenerate():
+            started.append(time.monotonic())
+            time.sleep(0.3)
+            finished.append(time.monotonic())
+
+        self.server = LiveReloadServer(
+            self.dir_path, watch=self.dir_path / 'sources', regenerate=regenerate, ignored=[], debounce=0.2,
+        )
+        (self.dir_path / 'sources').mkdir()
+        self.server.serve('127.0.0.1', unused_tcp_port, loop=event_loop)
+        await asyncio.sleep(0.1)
+
+        for _ in range(5):  # e.g. a checkout
+            self.server.on_source_changed()
+            await asyncio.sleep(0.05)
+        assert not started  # waits for the changes to settle
+        await asyncio.sleep(0.3)
+        assert len(started) == 1
+
+        for _ in range(3):  # while the site is regenerated
+            self.server.on_source_changed()
+        assert 'A test file.' in await get(f'http://127.0.0.1:{unused_tcp_port}/file')
+        assert not finished  # served during the regeneration
+        await asyncio.sleep(1)
+        assert len(started) == 2 and len(finished) == 2
+        assert started[1] >= finished[0]  # a single regeneration at a time
+
+    @pytest.mark.asyncio
+    async def test_stale_regeneration_is_cancelled(self, event_loop, unused_tcp_port):
+        cancelled = threading.Event()
+        calls = []
+        completed = []
+
+        def regenerate():
+            calls.append(True)
+            if len(calls) == 1 and cancelled.wait(5):
+                raise Exception('Cancelled')
+            completed.append(True)
+
+        self.server = LiveReloadServer(
+            self.dir_path, watch=self.dir_path / 'sources', regenerate=regenerate, cancel_regeneration=cancelled.set,
+            ignored=[], debounce=0.05,
+        )
+        (self.dir_path / 'sources').mkdir()
+        self.server.serve('127.0.0.1', unused_tcp_port, loop=event_loop)
+        await asyncio.sleep(0.1)
+        identifier = self.server.live_reload_id
+
+        self.server.on_source_changed()
+        await asyncio.sleep(0.2)  # the first regeneration is running
+        assert not completed
+        self.server.on_source_changed()
+        assert cancelled.is_set()
+        await asyncio.sleep(0.5)
+        assert len(calls) == 2 and completed == [True]  # only the follow-up completed
+        assert self.server.live_reload_id != identifier
+
+    def test_shutdown_cancels_regeneration(self, unused_tcp_port):
+        cancelled = threading.Event()
+
+        def regenerate():
+            if cancelled.wait(30):
+                raise Exception('Cancelled')
+
+        server = LiveReloadServer(
+            self.dir_path, watch=self.dir_path / 'sources', regenerate=regenerate, cancel_regeneration=cancelled.set,
+            ignored=[], debounce=0.05,
+        )
+        (self.dir_path / 'sources').mkdir()
+        loop = asyncio.new_event_loop()
+        server.serve('127.0.0.1', unused_tcp_port, loop=loop)
+        loop.call_soon(server.on_source_changed)
+        loop.run_until_complete(asyncio.sleep(0.3))  # the regeneration is running
+        start = time.monotonic()
+        server.shutdown(loop)
+        loop.run_until_complete(gather(*asyncio.all_tasks(loop=loop)))
+        loop.close()
+        assert cancelled.is_set()
+        assert time.monotonic() - start < 10
+
     @pytest.mark.asyncio
     async def test_live_reload_ignore(self, event_loop, unused_tcp_port):
         ignored_path = self.dir_path / 'ignore'
@@ -113,6 +251,288 @@ class TestTheServer:
 
         assert 'A test file.' in await get(f'http://127.0.0.1:{port}/file')
 
+    @pytest.mark.asyncio
+    async def test_serves_large_file(self, event_loop, unused_tcp_port):
+        contents = bytes(range(256)) * 40_000  # 10 MB
+        (self.dir_path / 'video.bin').write_bytes(contents)
+        self.server = DevServer(self.dir_path)
+        port = unused_tcp_port
+        self.server.serve('127.0.0.1', port, loop=event_loop)
+
+        head, body = (await get_bytes(f'http://127.0.0.1:{port}/video.bin')).split(b'\r\n\r\n', 1)
+        assert b'Content-Length: 10240000' in head
+        assert body == contents
+
+    @pytest.mark.asyncio
+    async def test_serves_file_in_chunks_without_sendfile(self, event_loop, unused_tcp_port, monkeypatch):
+        async def unavailable(*args, **kwargs):
+            raise asyncio.SendfileNotAvailableError()
+
+        monkeypatch.setattr(event_loop, 'sendfile', unavailable)
+        monkeypatch.setattr(lightweight.server, 'CHUNK_SIZE', 1000)
+        contents = bytes(range(256)) * 100
+        (self.dir_path / 'file.bin').write_bytes(contents)
+        self.server = LiveReloadServer(self.dir_path, watch=self.dir_path, regenerate=lambda: None, ignored=[])
+        port = unused_tcp_port
+        self.server.serve('127.0.0.1', port, loop=event_loop)
+
+        head, body = (await get_bytes(f'http://127.0.0.1:{port}/file.bin')).split(b'\r\n\r\n', 1)
+        assert b'Content-Length: 25600' in head
+        assert body == contents
+        head, body = (await get_bytes(f'http://127.0.0.1:{port}/')).split(b'\r\n\r\n', 1)
+        assert f'Content-Length: {len(body)}'.encode() in head
+        assert LIVE_RELOAD_JS.encode() in body
+
+    @pytest.mark.asyncio
+    async def test_keep_alive_and_pipelining(self, event_loop, unused_tcp_port):
+        self.server = DevServer(self.dir_path)
+        port = unused_tcp_port
+        self.server.serve('127.0.0.1', port, loop=event_loop)
+        await asyncio.sleep(0.1)
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /file HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        status, headers, body = await read_response(reader)
+        assert status == 'HTTP/1.1 200 OK'
+        assert headers['connection'] == 'keep-alive'
+        assert body == b'A test file.'
+
+        writer.write(b'GET / HTTP/1.1\r\n\r\nHEAD /file HTTP/1.1\r\n\r\nGET /missing HTTP/1.1\r\n\r\n'
+                     b'GET /file HTTP/1.1\r\nConnection: close\r\n\r\n')
+        assert (await read_response(reader))[2].startswith(b'<!DOCTYPE html>')
+        status, headers, _ = await read_response(reader, head=True)
+        assert headers['content-length'] == '12'
+        assert await read_response(reader) == ('HTTP/1.1 404 Not Found', {
+            'content-type': 'text/html; charset=utf-8', 'content-length': '3', 'connection': 'keep-alive',
+        }, b'404')
+        status, headers, body = await read_response(reader)
+        assert headers['connection'] == 'close' and body == b'A test file.'
+        assert await reader.read() == b''  # closed by the server
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_malformed_header(self, event_loop, unused_tcp_port):
+        self.server = DevServer(self.dir_path)
+        port = unused_tcp_port
+        self.server.serve('127.0.0.1', port, loop=event_loop)
+        await asyncio.sleep(0.1)
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /file HTTP/1.1\r\nNot a header\r\n\r\nGET /file HTTP/1.1\r\n\r\n')
+        status, headers, body = await read_response(reader)
+        assert status == 'HTTP/1.1 400 Bad Request'
+        assert headers['connection'] == 'close' and body == b'400'
+        assert await reader.read() == b''  # the pipelined request is dropped
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_head(self, event_loop, unused_tcp_port):
+        self.server = LiveReloadServer(self.dir_path, watch=self.dir_path, regenerate=lambda: None, ignored=[])
+        port = unused_tcp_port
+        self.server.serve('127.0.0.1', port, loop=event_loop)
+        await asyncio.sleep(0.1)
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'HEAD / HTTP/1.0\r\n\r\n')
+        response = await reader.read()
+        assert response.startswith(b'HTTP/1.1 200 OK\r\n')
+        assert response.endswith(b'Connection: close\r\n\r\n')
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_idle_timeout(self, event_loop, unused_tcp_port):
+        self.server = DevServer(self.dir_path)
+        self.server.idle_timeout = 0.2
+        port = unused_tcp_port
+        self.server.serve('127.0.0.1', port, loop=event_loop)
+        await asyncio.sleep(0.1)
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /file HTTP/1.1\r\n\r\n')
+        assert (await read_response(reader))[2] == b'A test file.'
+        assert await asyncio.wait_for(reader.read(), 2) == b''
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_caches_responses_until_modified(self, event_loop, unused_tcp_port, monkeypatch):
+        self.server = LiveReloadServer(self.dir_path, watch=self.dir_path, regenerate=lambda: None, ignored=[])
+        port = unused_tcp_port
+        self.server.serve('127.0.0.1', port, loop=event_loop)
+        reads = []
+        read = lightweight.server.File.read
+        monkeypatch.setattr(lightweight.server.File, 'read', lambda file: reads.append(file.path.name) or read(file))
+
+        assert LIVE_RELOAD_JS in await get(f'http://127.0.0.1:{port}/index.html')
+        assert LIVE_RELOAD_JS in await get(f'http://127.0.0.1:{port}/index.html')
+        assert reads == ['index.html']
+        assert len(self.server.cache) == 1
+
+        (self.dir_path / 'index.html').write_text('<html><body>Changed</body></html>')
+        response = await get(f'http://127.0.0.1:{port}/index.html')
+        assert 'Changed' in response and LIVE_RELOAD_JS in response
+        assert reads == ['index.html', 'index.html']
+
+    @pytest.mark.asyncio
+    async def test_conditional_requests(self, event_loop, unused_tcp_port):
+        self.server = DevServer(self.dir_path)
+        self.server.cache.max_file_size = 16  # "large" is streamed
+        (self.dir_path / 'large').write_bytes(b'x' * 100)
+        port = unused_tcp_port
+        self.server.serve('127.0.0.1', port, loop=event_loop)
+        await asyncio.sleep(0.1)
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for location in ('/file', '/large'):
+            writer.write(f'GET {location} HTTP/1.1\r\n\r\n'.encode())
+            status, headers, body = await read_response(reader)
+            assert status == 'HTTP/1.1 200 OK' and body
+            assert headers['cache-control'] == 'no-cache'
+            etag, last_modified = headers['etag'], headers['last-modified']
+            assert etag.startswith('"') and etag.endswith('"')
+
+            writer.write(f'GET {location} HTTP/1.1\r\nIf-None-Match: "other", W/{etag}\r\n\r\n'.encode())
+            status, headers, _ = await read_response(reader, head=True)  # a 304 has no body
+            assert status == 'HTTP/1.1 304 Not Modified'
+            assert headers['etag'] == etag and headers['connection'] == 'keep-alive'
+            assert 'content-length' not in headers
+
+            writer.write(f'GET {location} HTTP/1.1\r\nIf-Modified-Since: {last_modified}\r\n\r\n'.encode())
+            assert (await read_response(reader, head=True))[0] == 'HTTP/1.1 304 Not Modified'
+
+            writer.write(f'GET {location} HTTP/1.1\r\nIf-None-Match: "other"\r\n'
+                         f'If-Modified-Since: {last_modified}\r\n\r\n'.encode())
+            assert (await read_response(reader))[0] == 'HTTP/1.1 200 OK'  # If-None-Match takes precedence
+        writer.close()
+
+        (self.dir_path / 'large').write_bytes(b'y' * 100)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(f'GET /large HTTP/1.1\r\nIf-None-Match: {etag}\r\n\r\n'.encode())
+        status, headers, body = await read_response(reader)
+        assert body == b'y' * 100 and headers['etag'] != etag
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_compression(self, event_loop, unused_tcp_port):
+        self.server = DevServer(self.dir_path)
+        page = '<!DOCTYPE html><html><body>' + 'Lorem ipsum. ' * 200 + '</body></html>'
+        (self.dir_path / 'index.html').write_text(page)
+        (self.dir_path / 'index.html.gz').write_bytes(gzip.compress(b'precompressed'))
+        (self.dir_path / 'style.css').write_text('a { color: red; }\n' * 100)
+        self.server.reindex()  # records the siblings, as after a generation
+        port = unused_tcp_port
+        self.server.serve('127.0.0.1', port, loop=event_loop)
+        await asyncio.sleep(0.1)
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET / HTTP/1.1\r\nAccept-Encoding: gzip, deflate\r\n\r\n')
+        status, headers, body = await read_response(reader)
+        assert headers['content-encoding'] == 'gzip' and headers['vary'] == 'Accept-Encoding'
+        assert headers['content-type'] == 'text/html'
+        assert gzip.decompress(body) == b'precompressed'  # the sibling
+
+        writer.write(b'GET /style.css HTTP/1.1\r\nAccept-Encoding: br;q=0, gzip;q=0.5\r\n\r\n')
+        status, headers, body = await read_response(reader)
+        assert headers['content-encoding'] == 'gzip'
+        assert gzip.decompress(body) == (self.dir_path / 'style.css').read_bytes()
+        assert int(headers['content-length']) == len(body) < 1800
+        gzip_etag = headers['etag']
+
+        writer.write(b'GET /style.css HTTP/1.1\r\n\r\n')
+        status, headers, body = await read_response(reader)
+        assert 'content-encoding' not in headers and headers['vary'] == 'Accept-Encoding'
+        assert body == (self.dir_path / 'style.css').read_bytes()
+        assert headers['etag'] != gzip_etag
+
+        writer.write(b'GET /file HTTP/1.1\r\nAccept-Encoding: gzip\r\n\r\n')
+        status, headers, body = await read_response(reader)
+        assert 'content-encoding' not in headers and 'vary' not in headers
+
+        writer.write(b'GET /style.css HTTP/1.1\r\nAccept-Encoding: gzip\r\nRange: bytes=0-9\r\n\r\n')
+        status, headers, body = await read_response(reader)
+        assert '206' in status and 'content-encoding' not in headers
+        assert body == (self.dir_path / 'style.css').read_bytes()[:10]  # a range of the file, not of its gzip
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_compresses_injected_html(self, event_loop, unused_tcp_port):
+        brotli = pytest.importorskip('brotli')
+        self.server = LiveReloadServer(self.dir_path, watch=self.dir_path, regenerate=lambda: None, ignored=[])
+        (self.dir_path / 'index.html').write_text('<html><body>' + 'Lorem ipsum. ' * 200 + '</body></html>')
+        (self.dir_path / 'index.html.br').write_bytes(b'stale')
+        self.server.reindex()
+        port = unused_tcp_port
+        self.server.serve('127.0.0.1', port, loop=event_loop)
+        await asyncio.sleep(0.1)
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET / HTTP/1.1\r\nAccept-Encoding: gzip, br\r\n\r\n')
+        status, headers, body = await read_response(reader)
+        assert headers['content-encoding'] == 'br'  # compressed on the fly, the sibling lacks the script
+        assert LIVE_RELOAD_JS in brotli.decompress(body).decode()
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_ranges(self, event_loop, unused_tcp_port):
+        self.server = DevServer(self.dir_path)
+        self.server.cache.max_file_size = 16  # the video is streamed, "file" is cached
+        video = bytes(range(256)) * 4
+        (self.dir_path / 'video.mp4').write_bytes(video)
+        port = unused_tcp_port
+        self.server.serve('127.0.0.1', port, loop=event_loop)
+        await asyncio.sleep(0.1)
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /video.mp4 HTTP/1.1\r\n\r\n')
+        status, headers, body = await read_response(reader)
+        assert headers['accept-ranges'] == 'bytes' and headers['content-type'] == 'video/mp4'
+        etag = headers['etag']
+
+        writer.write(b'GET /video.mp4 HTTP/1.1\r\nRange: bytes=100-199\r\n\r\n')
+        status, headers, body = await read_response(reader)
+        assert status == 'HTTP/1.1 206 Partial Content'
+        assert headers['content-range'] == 'bytes 100-199/1024' and body == video[100:200]
+
+        writer.write(b'GET /file HTTP/1.1\r\nRange: bytes=-5\r\n\r\n')
+        status, headers, body = await read_response(reader)
+        assert headers['content-range'] == 'bytes 7-11/12' and body == b'file.'
+
+        writer.write(b'GET /video.mp4 HTTP/1.1\r\nRange: bytes=0-9, 1000-\r\n\r\n')
+        status, headers, body = await read_response(reader)
+        assert status == 'HTTP/1.1 206 Partial Content'
+        content_type, boundary = headers['content-type'].split('; boundary=')
+        assert content_type == 'multipart/byteranges'
+        assert body == (f'\r\n--{boundary}\r\nContent-Type: video/mp4\r\nContent-Range: bytes 0-9/1024\r\n\r\n'.encode()
+                        + video[:10]
+                        + f'\r\n--{boundary}\r\nContent-Type: video/mp4\r\nContent-Range: bytes 1000-1023/1024\r\n\r\n'
+                        .encode()
+                        + video[1000:]
+                        + f'\r\n--{boundary}--\r\n'.encode())
+
+        writer.write(f'GET /video.mp4 HTTP/1.1\r\nRange: bytes=0-9\r\nIf-Range: {etag}\r\n\r\n'.encode())
+        assert (await read_response(reader))[2] == video[:10]
+        writer.write(b'GET /video.mp4 HTTP/1.1\r\nRange: bytes=0-9\r\nIf-Range: "stale"\r\n\r\n')
+        status, headers, body = await read_response(reader)
+        assert status == 'HTTP/1.1 200 OK' and body == video
+
+        writer.write(b'GET /video.mp4 HTTP/1.1\r\nRange: bytes=2000-\r\n\r\n')
+        status, headers, body = await read_response(reader)
+        assert status.startswith('HTTP/1.1 416 ') and headers['content-range'] == 'bytes */1024'
+        assert headers['connection'] == 'keep-alive'
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_regeneration_clears_cache(self, event_loop, unused_tcp_port):
+        self.server = LiveReloadServer(self.dir_path, watch=self.dir_path, regenerate=lambda: None, ignored=[])
+        port = unused_tcp_port
+        self.server.serve('127.0.0.1', port, loop=event_loop)
+
+        assert 'A test file.' in await get(f'http://127.0.0.1:{port}/file')
+        assert len(self.server.cache) == 1
+        (self.dir_path / 'new-file').write_text('Test file changes')
+        await asyncio.sleep(1)  # wait for file change to get picked up
+        assert len(self.server.cache) == 0
+        assert self.server.index['new-file'].path == self.dir_path / 'new-file'
+
     @pytest.mark.asyncio
     async def test_403(self, event_loop, unused_tcp_port):
         self.server = DevServer(self.dir_path)
@@ -142,6 +562,164 @@ class TestTheServer:
         assert '500' in await get(f'http://127.0.0.1:{port}/../..')
 
 
+def test_response_cache_bounds(tmp_path: Path):
+    cache = ResponseCache(max_bytes=10, max_file_size=6)
+    files = {}
+    for name in 'abc':
+        (tmp_path / name).write_text('12345')
+        files[name] = File(tmp_path / name, MimeType.plaintext)
+
+    def response(name: str) -> CachedResponse:
+        stat = (tmp_path / name).stat()
+        return CachedResponse(stat.st_mtime_ns, stat.st_size, 'text/plain', {'Content-Length': '5'}, b'12345')
+
+    cache.put(files['a'], response('a'))
+    cache.put(files['b'], response('b'))
+    assert cache.get(files['a'], (tmp_path / 'a').stat()) is not None  # "b" is now the least recently used
+    cache.put(files['c'], response('c'))
+    assert len(cache) == 2
+    assert cache.get(files['b'], (tmp_path / 'b').stat()) is None
+    assert cache.get(files['c'], (tmp_path / 'c').stat()) is not None
+    assert cache.get(File(tmp_path / 'c', MimeType.plaintext, encoding='gzip'), (tmp_path / 'c').stat()) is None
+
+    cache.put(File(tmp_path / 'd', MimeType.plaintext), CachedResponse(0, 7, 'text/plain', {}, b'1234567'))  # too large
+    assert len(cache) == 2
+
+
+def test_accepts():
+    assert accepts('gzip, deflate, br', 'br')
+    assert accepts('gzip;q=0.5', 'gzip')
+    assert not accepts('gzip;q=0', 'gzip')
+    assert accepts('*', 'gzip')
+    assert not accepts('*, gzip;q=0', 'gzip')
+    assert not accepts('deflate', 'gzip')
+    assert not accepts(None, 'gzip')
+
+
+def test_parse_ranges():
+    assert parse_ranges('bytes=0-9', 100) == [(0, 10)]
+    assert parse_ranges('bytes=90-200', 100) == [(90, 100)]
+    assert parse_ranges('bytes=50-', 100) == [(50, 100)]
+    assert parse_ranges('bytes=-10', 100) == [(90, 100)]
+    assert parse_ranges('bytes=-200', 100) == [(0, 100)]
+    assert parse_ranges('bytes= 0-0, -1', 100) == [(0, 1), (99, 100)]
+    assert parse_ranges('bytes=100-', 100) == []
+    assert parse_ranges('bytes=-0', 100) == []
+    assert parse_ranges('bytes=5-1', 100) is None
+    assert parse_ranges('bytes=--1', 100) is None
+    assert parse_ranges('bytes=1', 100) is None
+    assert parse_ranges('items=0-1', 100) is None
+    assert parse_ranges('bytes=' + ','.join(['0-1'] * 17), 100) is None
+
+
+def test_if_range():
+    validators = {'ETag': '"abc"', 'Last-Modified': 'Sat, 01 Feb 2020 10:00:00 GMT', 'Cache-Control': 'no-cache'}
+    assert if_range({}, validators)
+    assert if_range({'if-range': '"abc"'}, validators)
+    assert not if_range({'if-range': 'W/"abc"'}, validators)
+    assert if_range({'if-range': 'Sat, 01 Feb 2020 10:00:00 GMT'}, validators)
+    assert not if_range({'if-range': 'Sun, 02 Feb 2020 10:00:00 GMT'}, validators)
+
+
+def test_not_modified():
+    validators = {'ETag': '"abc"', 'Last-Modified': 'Sat, 01 Feb 2020 10:00:00 GMT', 'Cache-Control': 'no-cache'}
+    assert not_modified({'if-none-match': '"abc"'}, validators)
+    assert not_modified({'if-none-match': 'W/"abc"'}, validators)
+    assert not_modified({'if-none-match': '*'}, validators)
+    assert not not_modified({'if-none-match': '"ab"'}, validators)
+    assert not_modified({'if-modified-since': 'Sat, 01 Feb 2020 10:00:00 GMT'}, validators)
+    assert not_modified({'if-modified-since': 'Sun, 02 Feb 2020 10:00:00 GMT'}, validators)
+    assert not not_modified({'if-modified-since': 'Sat, 01 Feb 2020 09:59:59 GMT'}, validators)
+    assert not not_modified({'if-modified-since': 'yesterday'}, validators)
+    assert not not_modified({}, validators)
+
+
+def test_index_files(tmp_path: Path):
+    (tmp_path / 'index.html').write_text('root')
+    (tmp_path / 'about.html').write_text('about')
+    (tmp_path / 'blog').mkdir()
+    (tmp_path / 'blog' / 'index.html').write_text('blog')
+    (tmp_path / 'blog.html').write_text('blog page')
+    (tmp_path / 'docs').mkdir()
+    (tmp_path / 'docs' / 'index.html').write_text('docs')
+    (tmp_path / 'docs' / 'style.css').write_text('css')
+
+    index = index_files(tmp_path)
+    assert index[''].path == tmp_path / 'index.html'
+    assert index['about'].path == index['about.html'].path == tmp_path / 'about.html'
+    assert index['blog'].path == tmp_path / 'blog.html'
+    assert index['blog/'].path == tmp_path / 'blog' / 'index.html'
+    assert index['docs'].path == index['docs/'].path == tmp_path / 'docs' / 'index.html'
+    assert index['docs/style.css'] == File(tmp_path / 'docs' / 'style.css', MimeType.css)
+    assert 'docs/style' not in index
+
+
+def test_select_encoding_from_index(tmp_path: Path, monkeypatch):
+    (tmp_path / 'style.css').write_text('a' * 2000)
+    (tmp_path / 'style.css.gz').write_bytes(gzip.compress(b'a' * 2000))
+    server = DevServer(tmp_path)
+    file = server.find_file('style.css')
+    assert file.siblings == {'gzip'} and file.indexed_size == 2000
+
+    def untouched(*args, **kwargs):
+        raise AssertionError('the disk is accessed')
+
+    monkeypatch.setattr(Path, 'is_file', untouched)
+    monkeypatch.setattr(Path, 'stat', untouched)
+    selected = server.select_encoding(file, 'gzip, br')
+    assert selected.path == tmp_path / 'style.css.gz'
+    assert selected.encoding == 'gzip' and selected.precompressed
+
+
+def test_find_file_with_index(tmp_path: Path):
+    (tmp_path / 'index.html').write_text('root')
+    server = DevServer(tmp_path)
+    assert server.find_file('index').path == tmp_path / 'index.html'
+
+    (tmp_path / 'new.html').write_text('new')
+    assert server.find_file('new').path == tmp_path / 'new.html'  # not indexed yet
+    assert 'new' not in server.index
+    server.reindex()
+    assert server.index['new'].path == tmp_path / 'new.html'
+    with pytest.raises(PermissionError):
+        server.find_file('../..')
+    with pytest.raises(FileNotFoundError):
+        server.find_file('missing')
+
+
+def test_find_file_normalises_location(tmp_path: Path, monkeypatch):
+    (tmp_path / 'blog').mkdir()
+    (tmp_path / 'blog' / 'index.html').write_text('blog')
+    server = DevServer(tmp_path)
+    assert server.find_file('blog/./../blog/').path == tmp_path / 'blog' / 'index.html'
+    assert server.find_file('./blog').path == tmp_path / 'blog' / 'index.html'
+
+    def untouched(*args, **kwargs):
+        raise AssertionError('the disk is accessed')
+
+    monkeypatch.setattr(Path, 'resolve', untouched)
+    monkeypatch.setattr(Path, 'exists', untouched)
+    for location in ('blog/../../secret.txt', '..', '/etc/passwd'):
+        with pytest.raises(PermissionError):
+            server.find_file(location)
+
+
+def test_streamed_etag_is_not_a_hash(tmp_path: Path, monkeypatch):
+    (tmp_path / 'video.mp4').write_bytes(b'x' * 100)
+    server = DevServer(tmp_path)
+    server.cache.max_file_size = 16
+    file = server.find_file('video.mp4')
+
+    def unread(*args, **kwargs):
+        raise AssertionError('the file is read')
+
+    monkeypatch.setattr(Path, 'open', unread)
+    monkeypatch.setattr(Path, 'read_bytes', unread)
+    stat = (tmp_path / 'video.mp4').stat()
+    validators = asyncio.run(server.validators(file))
+    assert validators['ETag'] == f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
 def test_file_not_found():
     with pytest.raises(FileNotFoundError):
         DevServer(Path('non-existing'))
@@ -0,0 +1,141 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from lightweight import Site, jinja, GenContext, GenPath, Content, from_ctx, markdown, template, rss
+from lightweight.errors import ShardMergeError
+from lightweight.generation import Shard
+from lightweight.generation.shard import merge_shards
+
+
+class Heavy(Content):
+    def cost(self) -> float:
+        return 10
+
+    def write(self, path: GenPath, ctx: GenContext):
+        path.create('heavy')
+
+
+def test_parse():
+    assert Shard.parse('1/4') == Shard(1, 4)
+    assert str(Shard(1, 4)) == '1/4'
+    with pytest.raises(ValueError):
+        Shard.parse('4/4')
+    with pytest.raises(ValueError):
+        Shard.parse('first')
+
+
+def test_shards_are_disjoint_and_complete(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    for i in range(20):
+        site.add(f'pages/{i}.html', jinja('templates/shard/page.html', pages=from_ctx(lambda ctx: len(ctx.tasks))))
+    site.add('heavy-1.html', Heavy())
+    site.add('heavy-2.html', Heavy())
+    ctx = GenContext(out=tmp_path / 'out', site=site)
+    tasks = [task for ic in site.content for task in ic.make_tasks(ctx)]
+    selections = [Shard(i, 3).select(tasks) for i in range(3)]
+    paths = [str(task.path) for selected in selections for task in selected]
+    assert sorted(paths) == sorted(str(task.path) for task in tasks)
+    heavy = [[str(task.path) for task in selected if task.path.name.startswith('heavy')] for selected in selections]
+    assert sorted(len(h) for h in heavy) == [0, 1, 1]  # heavy tasks are spread between shards
+    assert [Shard(i, 3).select(tasks) for i in range(3)] == selections
+
+
+def test_merge(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    for i in range(20):
+        site.add(f'pages/{i}.html', jinja('templates/shard/page.html', pages=from_ctx(lambda ctx: len(ctx.tasks))))
+    site.add('heavy-1.html', Heavy())
+    site.add('heavy-2.html', Heavy())
+    shards = [tmp_path / f'out-{i}' for i in range(2)]
+    for i, shard_out in enumerate(shards):
+        site.generate(shard_out, shard=Shard(i, 2))
+    assert 0 < len(list((shards[0] / 'pages').iterdir())) < 20
+
+    out = tmp_path / 'out'
+    merge_shards(out, shards)
+    assert len(list((out / 'pages').iterdir())) == 20
+    assert (out / 'pages' / '0.html').read_text() == '22'  # every shard sees all tasks
+    assert (out / 'heavy-1.html').exists()
+    assert not (out / '.lw-shard.json').exists()
+
+
+def test_merge_missing_shard(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    for i in range(20):
+        site.add(f'pages/{i}.html', jinja('templates/shard/page.html', pages=from_ctx(lambda ctx: len(ctx.tasks))))
+    site.add('heavy-1.html', Heavy())
+    site.add('heavy-2.html', Heavy())
+    site.generate(tmp_path / 'out-0', shard=Shard(0, 2))
+    with pytest.raises(ShardMergeError):
+        merge_shards(tmp_path / 'out', [tmp_path / 'out-0'])
+
+
+def test_merge_to_shard(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    for i in range(20):
+        site.add(f'pages/{i}.html', jinja('templates/shard/page.html', pages=from_ctx(lambda ctx: len(ctx.tasks))))
+    site.add('heavy-1.html', Heavy())
+    site.add('heavy-2.html', Heavy())
+    shards = [tmp_path / f'out-{i}' for i in range(2)]
+    for i, shard_out in enumerate(shards):
+        site.generate(shard_out, shard=Shard(i, 2))
+    for out in (shards[0], tmp_path / 'out-1' / '..' / 'out-0', shards[1] / 'merged', tmp_path):
+        with pytest.raises(ShardMergeError):
+            merge_shards(out, shards)
+    assert (shards[0] / '.lw-shard.json').exists()  # nothing deleted
+
+
+def test_merge_missing_output(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    for i in range(20):
+        site.add(f'pages/{i}.html', jinja('templates/shard/page.html', pages=from_ctx(lambda ctx: len(ctx.tasks))))
+    site.add('heavy-1.html', Heavy())
+    site.add('heavy-2.html', Heavy())
+    shards = [tmp_path / f'out-{i}' for i in range(2)]
+    for i, shard_out in enumerate(shards):
+        site.generate(shard_out, shard=Shard(i, 2))
+    (shards[1] / 'heavy-2.html').unlink(missing_ok=True)
+    (shards[1] / 'heavy-1.html').unlink(missing_ok=True)
+    with pytest.raises(ShardMergeError):
+        merge_shards(tmp_path / 'out', shards)
+
+
+def test_merge_written_records(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    for i in range(20):
+        site.add(f'pages/{i}.html', jinja('templates/shard/page.html', pages=from_ctx(lambda ctx: len(ctx.tasks))))
+    site.add('img', 'resources/assets/img')
+    shards = [tmp_path / f'out-{i}' for i in range(2)]
+    for i, shard_out in enumerate(shards):
+        site.generate(shard_out, shard=Shard(i, 2), fingerprint=True)
+    records = [json.loads((shard_out / '.lw-shard.json').read_text()) for shard_out in shards]
+    assets = set(records[0]['written']) & set(records[1]['written'])
+    assert 'assets.json' in assets  # written by every shard
+    assert any(path.startswith('img/photo.') for path in assets)
+    assert len(set(records[0]['written']) | set(records[1]['written'])) == 20 + len(assets)
+
+    merge_shards(tmp_path / 'out', shards)
+    assert len(list((tmp_path / 'out' / 'pages').iterdir())) == 20
+
+
+def test_merge_conflicting_files(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    for i in range(20):
+        site.add(f'pages/{i}.html', jinja('templates/shard/page.html', pages=from_ctx(lambda ctx: len(ctx.tasks))))
+    site.add('img', 'resources/assets/img')
+    shards = [tmp_path / f'out-{i}' for i in range(2)]
+    for i, shard_out in enumerate(shards):
+        site.generate(shard_out, shard=Shard(i, 2), fingerprint=True)
+    (shards[1] / 'assets.json').write_text('{}')
+    with pytest.raises(ShardMergeError):
+        merge_shards(tmp_path / 'out', shards)
+    assert not (tmp_path / 'out').exists()
+
+
+def test_markdown_and_feed_cost():
+    short = markdown('resources/feeds/1.md', template('templates/md/body.html'))
+    long = markdown('resources/md/collection/post-1.md', template('templates/md/body.html'))
+    assert 1 < short.cost() < long.cost()
+    assert rss(limit=3).cost() < rss(limit=30).cost()
@@ -22,6 +22,20 @@ def assert_site_render(src_location, content, tmp_path):
     assert (test_out / src_location).read_text() == src_content
 
 
+def test_single_worker(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    site.add('resources/test_nested')
+    site.generate(tmp_path / 'out', workers=1)
+    assert (tmp_path / 'out' / 'resources/test_nested/test2/test3/test.html').exists()
+
+
+def test_sequential(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    site.add('resources/test_nested')
+    site.generate(tmp_path / 'out', workers=0)
+    assert (tmp_path / 'out' / 'resources/test_nested/test2/test3/test.html').exists()
+
+
 def test_absolute_includes_not_allowed():
     site = Site('https://example.org/')
     with pytest.raises(AbsolutePathIncluded):
@@ -0,0 +1,100 @@
+import gzip
+import json
+from pathlib import Path
+from xml.etree import ElementTree
+
+import pytest
+
+from lightweight import Site, sitemap, markdown, template
+
+NS = {'s': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
+
+
+def locs(path: Path, tag: str = 'url'):
+    return [e.text for e in ElementTree.parse(path).getroot().findall(f's:{tag}/s:loc', NS)]
+
+
+def test_single_sitemap(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('index.html', 'templates/md/body.html')
+    for i in range(3):
+        site.add(f'posts/{i}.html', markdown('resources/sitemap/post.md', template('templates/md/body.html')))
+    site.add('robots.txt', 'resources/sitemap/robots.txt')
+    site.add('sitemap.xml', sitemap())
+    site.generate(out)
+
+    with open('expected/sitemap/sitemap.xml') as expected:
+        assert (out / 'sitemap.xml').read_text() == expected.read()
+    assert not (out / 'sitemap-1.xml').exists()
+
+
+def test_split_into_index(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('index.html', 'templates/md/body.html')
+    for i in range(4):
+        site.add(f'posts/{i}.html', markdown('resources/sitemap/post.md', template('templates/md/body.html')))
+    site.add('robots.txt', 'resources/sitemap/robots.txt')
+    site.add('sitemap.xml', sitemap(max_urls=2))
+    site.generate(out)
+
+    with open('expected/sitemap/index.xml') as expected:
+        assert (out / 'sitemap.xml').read_text() == expected.read()
+    assert locs(out / 'sitemap-1.xml') == ['https://example.org/', 'https://example.org/posts/0']
+    assert locs(out / 'sitemap-3.xml') == ['https://example.org/posts/3']
+
+
+def test_split_by_size(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('index.html', 'templates/md/body.html')
+    for i in range(3):
+        site.add(f'posts/{i}.html', markdown('resources/sitemap/post.md', template('templates/md/body.html')))
+    site.add('sitemap.xml', sitemap(max_size=300))
+    site.generate(out)
+
+    parts = locs(out / 'sitemap.xml', 'sitemap')
+    assert len(parts) > 1
+    for i in range(1, len(parts) + 1):
+        assert (out / f'sitemap-{i}.xml').stat().st_size <= 300
+
+
+def test_tasks_walked_once(tmp_path: Path):
+    included = []
+
+    def include(task):
+        included.append(task.path.relative_path)
+        return task.path.suffix == '.html'
+
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    for i in range(5):
+        site.add(f'posts/{i}.html', markdown('resources/sitemap/post.md', template('templates/md/body.html')))
+    site.add('sitemap.xml', sitemap(include=include, max_urls=2))
+    site.generate(out)
+
+    assert len(included) == len(set(included)) == 6
+    assert len(locs(out / 'sitemap.xml', 'sitemap')) == 3
+
+
+def test_gzip(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('index.html', 'templates/md/body.html')
+    for i in range(3):
+        site.add(f'posts/{i}.html', markdown('resources/sitemap/post.md', template('templates/md/body.html')))
+    site.add('robots.txt', 'resources/sitemap/robots.txt')
+    site.add('sitemap.xml', sitemap(gzip=True))
+    site.generate(out, manifest=out / 'manifest.json')
+
+    assert locs(out / 'sitemap.xml', 'sitemap') == ['https://example.org/sitemap-1.xml.gz']
+    with gzip.open(out / 'sitemap-1.xml.gz') as f:
+        assert len(locs(f)) == 4
+    files = json.loads((out / 'manifest.json').read_text())['files']
+    assert {'sitemap.xml', 'sitemap-1.xml.gz'} <= files.keys()
+
+
+def test_invalid_limit():
+    with pytest.raises(ValueError):
+        sitemap(max_urls=0)
@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import pytest
+
+from lightweight import Site, taxonomy, markdown, template, jinja
+from lightweight.errors import InvalidTaxonomyTerm, TermSlugCollision
+
+POSTS = ['one', 'two', 'three', 'draft']
+
+
+def test_taxonomy_pages(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    for name in POSTS:
+        site.add(f'posts/{name}.html', markdown(f'resources/taxonomy/{name}.md', template('templates/md/body.html')))
+    site.add('tags', taxonomy('tags', template('templates/taxonomy/tag.html'), heading='Tag'))
+    site.add('index.html', jinja('templates/taxonomy/index.html'))
+    site.generate(out)
+
+    assert {p.name for p in (out / 'tags').iterdir()} == {'python.html', 'jinja.html', 'static-sites.html'}
+    for location in ['tags/python.html', 'index.html']:
+        with open(f'expected/taxonomy/{location}') as expected:
+            assert (out / location).read_text() == expected.read()
+
+
+def test_created_archives(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    for name in POSTS:
+        site.add(f'posts/{name}.html', markdown(f'resources/taxonomy/{name}.md', template('templates/md/body.html')))
+    ctx = site.create_ctx(tmp_path / 'out')
+    ctx.tasks = tuple(task for ic in site.content for task in ic.make_tasks(ctx))
+    years = ctx.taxonomy('created:year')
+    assert years.terms == [2019, 2020]
+    assert [str(task.path) for task in years[2020]] == ['posts/two.html', 'posts/one.html']
+    assert list(ctx.taxonomy('created:month')) == ['2019-12', '2020-01', '2020-02']
+    assert ctx.taxonomy('tags') is ctx.taxonomy('tags')
+    with pytest.raises(KeyError):
+        ctx.taxonomy('tags')['missing']
+    assert ctx.taxonomy('tags').get('missing', ()) == ()
+    assert 'missing' not in ctx.taxonomy('tags')
+
+
+def test_slug_collision(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    for name in POSTS:
+        site.add(f'posts/{name}.html', markdown(f'resources/taxonomy/{name}.md', template('templates/md/body.html')))
+    site.add('posts/cpp.html', markdown('resources/taxonomy/cpp.md', template('templates/md/body.html')))
+    site.add('tags', taxonomy('tags', template('templates/taxonomy/tag.html'), heading='Tag'))
+    with pytest.raises(TermSlugCollision, match="'C', 'C\\+\\+'"):
+        site.generate(tmp_path / 'out')
+
+
+def test_terms_differing_in_case_are_merged(tmp_path: Path):
+    out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    for name in POSTS:
+        site.add(f'posts/{name}.html', markdown(f'resources/taxonomy/{name}.md', template('templates/md/body.html')))
+    capitalized = markdown('resources/taxonomy/capitalized.md', template('templates/md/body.html'))
+    site.add('posts/capitalized.html', capitalized)
+    site.add('tags', taxonomy('tags', template('templates/taxonomy/tag.html'), heading='Tag'))
+    site.generate(out)
+
+    assert {p.name for p in (out / 'tags').iterdir()} == {'python.html', 'jinja.html', 'static-sites.html'}
+    assert (out / 'tags' / 'python.html').read_text() == (
+        'Tag python: posts/capitalized.html posts/two.html posts/one.html posts/draft.html'
+    )
+    assert (out / 'tags' / 'jinja.html').read_text() == 'Tag Jinja: posts/capitalized.html posts/one.html'
+
+
+def test_unhashable_term(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    site.add('posts/nested.html', markdown('resources/taxonomy/nested.md', template('templates/md/body.html')))
+    site.add('tags', taxonomy('tags', template('templates/taxonomy/tag.html'), heading='Tag'))
+    with pytest.raises(InvalidTaxonomyTerm, match='resources/taxonomy/nested.md'):
+        site.generate(tmp_path / 'out')